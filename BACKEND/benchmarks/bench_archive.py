@@ -0,0 +1,78 @@
+"""
+Cold archive: 30-day queries over day partitions, with and without pruning.
+
+    cd BACKEND
+    python -m benchmarks.bench_archive --days 30 --sectors 10000 --steps-per-day 24
+
+Archives `days` days of a traffic-like history (one city-level column, one
+per-sector column) into storage.DayArchive, then times reads of the whole range:
+every column and sector, only the city-level column (column pruning), ten sectors
+(sector pushdown), and one sector between 08:00 and 18:00 of one day (time pushdown).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from storage import DayArchive, daily_means
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sectors", type=int, default=10_000)
+    parser.add_argument("--steps-per-day", type=int, default=24)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        archive = DayArchive(os.path.join(directory, "traffic"),
+                             {"avg_congestion": (), "sector_loads": (args.sectors,)})
+        rng = np.random.default_rng(0)
+        start = time.time() - args.days * 86400
+        step = 86400 / args.steps_per_day
+        t0 = time.perf_counter()
+        for day in range(args.days):
+            ts = start + (day * args.steps_per_day + np.arange(args.steps_per_day)) * step
+            loads = rng.uniform(0, 200, (args.steps_per_day, args.sectors)).astype(np.float32)
+            archive.write(ts, avg_congestion=loads.mean(axis=1), sector_loads=loads)
+        s_write = time.perf_counter() - t0
+        rows = args.days * args.steps_per_day
+        mib = rows * args.sectors * 4 / 2**20
+        print(f"{args.days} days x {args.steps_per_day} steps, {args.sectors} sectors: {len(archive.days())} partitions, "
+              f"{mib:.0f} MiB per-sector data, written in {s_write:.1f} s")
+
+        one_day = start + (args.days // 2) * 86400
+        queries = {
+            "all columns, all sectors": lambda: archive.read(start),
+            "city column only": lambda: archive.read(start, columns=["avg_congestion"]),
+            "10 sectors": lambda: archive.read(start, columns=["sector_loads"], sectors=np.arange(0, args.sectors,
+                                                                                                    args.sectors // 10)),
+            "1 sector, 08:00-18:00 of a day": lambda: archive.read(one_day + 8 * 3600, one_day + 18 * 3600,
+                                                                   columns=["sector_loads"], sectors=[7]),
+        }
+        for label, query in queries.items():
+            out, ms = timed(query)
+            cells = sum(col.size for name, col in out.items() if name != "ts")
+            print(f"    {label:32s} {ms:8.1f} ms  {out['ts'].size:6d} rows, {cells:10d} values")
+        full = archive.read(start, columns=["sector_loads"])
+        _, ms = timed(lambda: daily_means(full["ts"], full["sector_loads"]))
+        print(f"    {'daily means of every sector':32s} {ms:8.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Bin-level waste model: time-to-full forecast and sector aggregation for every bin.
+
+    cd BACKEND
+    python -m benchmarks.bench_bins --rows 50 --cols 50 --bins-per-sector 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import bins, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--cols", type=int, default=50)
+    parser.add_argument("--bins-per-sector", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sectors, rows, cols = grid.make_grid(args.rows, args.cols)
+    type_mult = grid.type_multipliers(grid.sector_types(sectors, cols))
+    fleet = bins.make_bins(rows, cols, type_mult, args.bins_per_sector, np.random.default_rng(0))
+
+    timings = {"advance": 0.0, "time_to_full": 0.0, "sector_summary": 0.0}
+    for step in range(args.repeat):
+        hour = step % 24
+        t0 = time.perf_counter()
+        bins.advance_bins(fleet, hour)
+        t1 = time.perf_counter()
+        ttf = bins.time_to_full(fleet, hour + 1)
+        t2 = time.perf_counter()
+        bins.sector_summary(fleet, len(sectors), ttf)
+        t3 = time.perf_counter()
+        timings["advance"] += t1 - t0
+        timings["time_to_full"] += t2 - t1
+        timings["sector_summary"] += t3 - t2
+
+    print(f"{len(fleet)} bins in {len(sectors)} sectors (ms per call):")
+    for name, total in timings.items():
+        print(f"  {name:15s} {total / args.repeat * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
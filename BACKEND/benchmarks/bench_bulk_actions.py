@@ -0,0 +1,56 @@
+"""
+Report store: bulk moderation (verify / assign / resolve every matching report) over 100k reports.
+
+    cd BACKEND
+    python -m benchmarks.bench_bulk_actions --reports 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_report_store import make_reports
+from storage import ReportStore
+
+ACTIONS = [
+    ("verify all", {"status": "Verified", "response_days": (0, 1)}),
+    ("assign all to Team A", {"status": "Assigned", "assigned_to": "Team A"}),
+    ("start work on Streetlight", {"status": "In Progress", "categories": ["Streetlight"]}),
+    ("resolve by id (50k ids)", {"status": "Resolved", "response_days": (0, 4), "ids": "half"}),
+    ("resolve search 'flood'", {"status": "Resolved", "search": "flood"}),
+    ("resolve all", {"status": "Resolved", "response_days": (0, 4)}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "reports.db")
+    store = ReportStore(path)
+    rng = np.random.default_rng(0)
+    reports = list(make_reports(args.reports, rng, time.time()))
+    for rec in reports:
+        rec["status"] = "Submitted"
+    t0 = time.perf_counter()
+    store.add_many(reports)
+    print(f"inserted {len(store)} reports in {time.perf_counter() - t0:.1f} s ({path})")
+
+    print(f"{'action':28s} {'ms':>8s} {'matched':>8s} {'moved':>8s} {'rejected':>9s} {'assigned':>9s}")
+    for label, kwargs in ACTIONS:
+        kwargs = dict(kwargs)
+        if kwargs.get("ids") == "half":
+            kwargs["ids"] = [rec["id"] for rec in reports[::2]]
+        t0 = time.perf_counter()
+        counts = store.transition(**kwargs)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{label:28s} {ms:8.1f} {counts['matched']:8d} {counts['moved']:8d} "
+              f"{counts['rejected']:9d} {counts['assigned']:9d}")
+    assert store.count(statuses=["Resolved"]) == len(store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Gorilla-style codec: compression ratio and throughput on the pages' history columns.
+
+    cd BACKEND
+    python -m benchmarks.bench_codec --steps 5000 --points 4000000
+
+Runs the city simulation for `steps` steps and records the columns the dashboard
+histories keep (as float32, like the ring buffers), plus timestamps at a fixed
+one-minute cadence and at irregular rerun times. For each column prints the size
+against raw float32 / float64 and the pickled list of dicts the pages used to
+keep, then the encode / decode throughput of each column tiled to `points` values.
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from engine import CitySimulation
+from storage.codec import decode_floats, decode_timestamps, encode_floats, encode_timestamps
+
+COLUMNS = {
+    "env temp": ("environment", "temp"),
+    "env humidity": ("environment", "humidity"),
+    "env city AQI": ("environment", "city_aqi"),
+    "env sector AQI": ("environment", "aqi"),
+    "traffic avg congestion": ("traffic", "avg_congestion"),
+    "traffic sector congestion": ("traffic", "congestion_pct"),
+    "waste sector fill": ("waste", "fill_pct"),
+    "energy sector storage": ("energy", "storage_pct"),
+}
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--points", type=int, default=4_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    city = CitySimulation(seed=args.seed)
+    steps = [city.step(hour=(i // 60) % 24) for i in range(args.steps)]
+    # per-sector columns sector-major (one sector's series contiguous), as the archive stores them
+    series = {label: np.asarray([s[domain][key] for s in steps], dtype=np.float32).T.copy()
+              for label, (domain, key) in COLUMNS.items()}
+    rng = np.random.default_rng(args.seed)
+    times = {
+        "ts fixed 60 s": 1.7e9 + 60.0 * np.arange(args.steps),
+        "ts irregular reruns": 1.7e9 + np.cumsum(rng.uniform(1, 30, args.steps)),
+    }
+
+    print(f"{args.steps} steps, {len(city.sectors)} sectors")
+    print(f"{'column':28s} {'points':>8s} {'bytes':>9s} {'vs f32':>7s} {'vs f64':>7s} {'encode':>12s} {'decode':>12s}")
+    total_raw32 = total_enc = 0
+    for label, values in list(series.items()) + list(times.items()):
+        is_ts = label.startswith("ts")
+        encode, decode = (encode_timestamps, decode_timestamps) if is_ts else (encode_floats, decode_floats)
+        data = encode(values)
+        restored = decode(data)
+        assert (np.allclose(restored, values, rtol=0, atol=1e-6) if is_ts
+                else np.array_equal(restored.view(np.uint32), values.view(np.uint32)))
+        big = np.resize(values.ravel(), args.points)
+        if is_ts:
+            big = values[0] + np.cumsum(np.resize(np.diff(values, prepend=values[0] - 60), args.points))
+        big_data = encode(big)
+        s_enc = best_of(lambda: encode(big), repeat=1)
+        s_dec = best_of(lambda: decode(big_data))
+        raw32 = values.size * (8 if is_ts else 4)
+        total_raw32 += raw32
+        total_enc += len(data)
+        print(f"{label:28s} {values.size:8d} {len(data):9d} {raw32 / len(data):6.1f}x "
+              f"{values.size * 8 / len(data):6.1f}x {big.size / s_enc / 1e6:7.1f} Mpt/s {big.size / s_dec / 1e6:7.1f} Mpt/s")
+
+    env = [{"temp": s["environment"]["temp"], "humidity": s["environment"]["humidity"],
+            "aqi": int(s["environment"]["city_aqi"])} for s in steps]
+    env_pickle = len(pickle.dumps(env))
+    env_enc = sum(len(encode_floats(series[label])) for label in ("env temp", "env humidity", "env city AQI"))
+    env_enc += len(encode_timestamps(times["ts irregular reruns"]))
+    print(f"all columns: {total_raw32} raw bytes -> {total_enc} ({total_raw32 / total_enc:.1f}x)")
+    print(f"environment readings as a pickled list of dicts: {env_pickle} bytes -> {env_enc} with timestamps "
+          f"({env_pickle / env_enc:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
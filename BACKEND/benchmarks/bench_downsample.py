@@ -0,0 +1,51 @@
+"""
+Chart downsampling: payload size and render time of a long history line chart.
+
+    cd BACKEND
+    python -m benchmarks.bench_downsample --points 1000000 --budget 1000
+
+Builds a `points`-long series (a random walk with occasional spikes, one sample a
+minute) and draws it as a Plotly line chart three ways: every point, cut to
+`budget` points by LTTB, and by the min/max envelope. For each prints the time to
+downsample, the time to build the figure and serialize it to the JSON Streamlit
+sends to the browser, the payload size, and how much of the series' range the
+chart still shows.
+"""
+import argparse
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from ui import downsample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--budget", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    x = np.datetime64("2025-01-01T00:00") + np.arange(args.points).astype("timedelta64[m]")
+    y = np.cumsum(rng.normal(0, 1, args.points))
+    spikes = rng.choice(args.points, max(1, args.points // 50_000), replace=False)
+    y[spikes] += rng.choice([-1, 1], spikes.size) * 40
+    span = y.max() - y.min()
+
+    print(f"{args.points} points, budget {args.budget}")
+    print(f"{'series':10s} {'points':>8s} {'downsample':>11s} {'render':>9s} {'payload':>10s} {'range kept':>10s}")
+    for label, mode in (("raw", None), ("lttb", "lttb"), ("minmax", "minmax")):
+        t0 = time.perf_counter()
+        xs, ys = (x, y) if mode is None else downsample(x, y, args.budget, mode)
+        t1 = time.perf_counter()
+        fig = go.Figure(go.Scatter(x=xs, y=ys, mode="lines"))
+        payload = fig.to_json()
+        t2 = time.perf_counter()
+        print(f"{label:10s} {len(ys):8d} {(t1 - t0) * 1000:8.1f} ms {(t2 - t1) * 1000:6.0f} ms "
+              f"{len(payload) / 2**20:7.2f} MiB {(ys.max() - ys.min()) / span:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Streetlight step: structured-array kernel vs. the energy page's original per-sector loop.
+
+    cd BACKEND
+    python -m benchmarks.bench_energy --lights 50000
+
+The loop below is the body of the original `for s in SECTORS:` loop from
+pages/energy.py, with its random draws (ped activity drift and outage decay)
+taken from the same arrays the kernel gets, so both produce identical state.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine.energy import (kinetic_generation_kW, make_streetlights, sector_light_consumption_kW,
+                           solar_generation_kW_per_panel, step_streetlights)
+
+
+def legacy_step(sectors, hour_now, cloudiness, ped_noise, outage_decay, global_kinetic_toggle=True,
+                dim_threshold=30, critical_threshold=15, manual_force_dim=False):
+    """Original dict-per-sector loop; returns (total generation, total consumption, outage count)."""
+    total_generation_kW = 0.0
+    total_consumption_kW = 0.0
+    outage_count = 0
+    for i, sec in enumerate(sectors):
+        solar_gen = sec["panels"] * solar_generation_kW_per_panel(hour_now, cloudiness)
+
+        kinetic_gen = 0.0
+        if global_kinetic_toggle and sec["kinetic_enabled"]:
+            sec["ped_activity"] = max(0.0, min(1.0, sec["ped_activity"] + ped_noise[i]))
+            kinetic_gen = kinetic_generation_kW(sec["ped_activity"])
+        gen_kW = solar_gen + kinetic_gen
+
+        if manual_force_dim:
+            dim = 0.5
+        else:
+            if sec["storage"] < critical_threshold:
+                dim = 0.0
+            elif sec["storage"] < dim_threshold:
+                dim = 0.5
+            else:
+                dim = 1.0
+        sec["light_dim_level"] = dim
+        cons_kW = float(sector_light_consumption_kW(dim))
+
+        timestep_hours = 1.0
+        net_kW = gen_kW - cons_kW
+        battery_capacity_kWh = sec["battery_capacity_kWh"]
+        stored_kWh = sec["storage"] * battery_capacity_kWh / 100.0
+        efficiency = 0.95
+        if net_kW > 0:
+            charge_kWh = min(net_kW * timestep_hours * efficiency, battery_capacity_kWh - stored_kWh)
+            stored_kWh += charge_kWh
+        else:
+            need_kWh = min(-net_kW * timestep_hours / efficiency, stored_kWh)
+            stored_kWh -= need_kWh
+            deficit_kWh = -net_kW * timestep_hours / efficiency - need_kWh
+            if deficit_kWh > 0:
+                sec.setdefault("last_outage_kWh", 0.0)
+                sec["last_outage_kWh"] += deficit_kWh
+
+        sec["storage"] = float(np.clip((stored_kWh / battery_capacity_kWh) * 100.0, 0.0, 100.0))
+
+        total_generation_kW += gen_kW
+        total_consumption_kW += cons_kW
+        if sec.get("last_outage_kWh", 0.0) > 0.0:
+            outage_count += 1
+            sec["last_outage_kWh"] = max(0.0, sec["last_outage_kWh"] - outage_decay[i])
+    return total_generation_kW, total_consumption_kW, outage_count
+
+
+def to_dicts(lights):
+    return [{name: rec[name].item() for name in lights.dtype.names} for rec in lights]
+
+
+def check_equivalence(n=2000, hours=72, seed=1):
+    """Run both implementations side by side through day/night cycles and compare state."""
+    rng = np.random.default_rng(seed)
+    lights = make_streetlights(n, rng)
+    lights["storage"] = rng.uniform(0, 100, size=n)  # exercise dim, shutdown and outage paths
+    sectors = to_dicts(lights)
+    for t in range(hours):
+        ped_noise = rng.normal(0, 0.05, size=n)
+        outage_decay = rng.uniform(0.1, 0.5, size=n)
+        kwargs = dict(dim_threshold=40, critical_threshold=20, global_kinetic=t % 24 != 5)
+        gen, cons, outage = step_streetlights(lights, t % 24, 0.3, ped_noise, outage_decay, **kwargs)
+        kwargs["global_kinetic_toggle"] = kwargs.pop("global_kinetic")
+        ref = legacy_step(sectors, t % 24, 0.3, ped_noise, outage_decay, **kwargs)
+        assert np.isclose(gen.sum(), ref[0]) and np.isclose(cons.sum(), ref[1]) and outage.sum() == ref[2]
+    for name in lights.dtype.names:
+        expected = np.array([sec[name] for sec in sectors])
+        if not np.array_equal(lights[name], expected):
+            raise AssertionError(f"field {name!r} differs from the legacy loop")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lights", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    check_equivalence()
+    print("kernel state matches the legacy loop exactly (72 steps, 2000 lights)")
+
+    rng = np.random.default_rng(0)
+    lights = make_streetlights(args.lights, rng)
+    sectors = to_dicts(lights)
+    ped_noise = rng.normal(0, 0.05, size=args.lights)
+    outage_decay = rng.uniform(0.1, 0.5, size=args.lights)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        step_streetlights(lights, 19, 0.25, ped_noise, outage_decay)
+    kernel_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    loop_repeat = max(1, args.repeat // 10)
+    start = time.perf_counter()
+    for _ in range(loop_repeat):
+        legacy_step(sectors, 19, 0.25, ped_noise, outage_decay)
+    loop_ms = (time.perf_counter() - start) / loop_repeat * 1000
+
+    print(f"{args.lights} lights: kernel {kernel_ms:.2f} ms/step, legacy loop {loop_ms:.1f} ms/step "
+          f"({loop_ms / kernel_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
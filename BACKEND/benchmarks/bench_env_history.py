@@ -0,0 +1,81 @@
+"""
+Environment history memory: resident set size over many page reruns.
+
+    cd BACKEND
+    python -m benchmarks.bench_env_history --reruns 100000 --interval 10
+
+Replays the environment page's per-rerun history work (one simulated step, one
+sample appended, the hourly trend read back) `reruns` times, one rerun every
+`interval` seconds of simulated time, and prints the RSS every tenth of the way.
+"List" is how the page kept history: a session list of dicts that never shrank.
+"Tiered" is storage.TieredSeries (a week of raw steps plus minute / hour / day
+rollups): its RSS stops growing once the rings have wrapped.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from engine import SECTORS, CitySimulation
+from storage import TieredSeries
+
+CONTROLS = dict(env_situation="Normal", humidity_control=60, aqi_control=0, purifier=False, dehumidifier=False,
+                flood_pumps=0)
+
+
+def rss_mib():
+    """Current resident set size (peak size where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(label, reruns, interval, record):
+    city = CitySimulation(seed=0)
+    marks = []
+    t0 = time.perf_counter()
+    for i in range(reruns):
+        step = city.step_environment(**CONTROLS)
+        record(i * interval, step)
+        if (i + 1) % max(1, reruns // 10) == 0:
+            marks.append(rss_mib())
+    us = (time.perf_counter() - t0) / reruns * 1e6
+    print(f"{label:6s} {us:6.1f} us/rerun   RSS MiB: " + " ".join(f"{m:6.1f}" for m in marks)
+          + f"   growth over the last 90%: {marks[-1] - marks[0]:+.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=100_000)
+    parser.add_argument("--interval", type=float, default=10.0, help="simulated seconds between reruns")
+    args = parser.parse_args()
+
+    history = []
+
+    def record_list(ts, step):
+        history.append({"temp": step["temp"], "humidity": float(step["humidity"]), "aqi": int(step["city_aqi"]),
+                        "sector_aqi": step["aqi"].astype(int).tolist()})
+        history[-24:]
+
+    series = TieredSeries(os.path.join(tempfile.mkdtemp(), "environment"),
+                          {"temp": (), "humidity": (), "aqi": (), "sector_aqi": (len(SECTORS),)})
+
+    def record_tiered(ts, step):
+        series.append(ts, temp=step["temp"], humidity=step["humidity"], aqi=step["city_aqi"],
+                      sector_aqi=step["aqi"].astype(int))
+        series.query(ts - 23 * 3600, resolution=3600, columns=["temp", "aqi"])
+
+    print(f"{args.reruns} reruns, one every {args.interval:g} s ({args.reruns * args.interval / 86400:.1f} days), "
+          f"{len(SECTORS)} sectors")
+    run("tiered", args.reruns, args.interval, record_tiered)
+    print(f"       {len(series)} raw samples kept, rollup buckets " +
+          ", ".join(f"{width} s: {len(level)}" for width, level in series.levels.items()))
+    run("list", args.reruns, args.interval, record_list)
+    print(f"       {len(history)} samples kept")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Sector grid lookups and heat-map rendering on large grids.
+
+    cd BACKEND
+    python -m benchmarks.bench_grid --size 100 1000 --points 1000000
+
+For each n x n grid (written to a JSON config and loaded back, like GRID_CONFIG):
+point -> sector for random points, the CellIndex bucketing them, 4- and 8-neighbour
+tables for every sector and (up to --max-render cells) the sector heat map figure.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from engine import Grid
+from ui import band_index, sector_grid
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, nargs="+", default=[100, 1000], help="grid rows = cols")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--max-render", type=int, default=20_000, help="skip the figure above this many cells")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.size:
+        path = os.path.join(tempfile.mkdtemp(), "grid.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rows": n, "cols": n, "inactive": ["A1"]}, f)
+        grid, ms_load = timed(Grid.from_file, path)
+        x = rng.uniform(-0.5, n + 0.5, args.points)
+        y = rng.uniform(-0.5, n + 0.5, args.points)
+        _, ms_locate = timed(grid.locate, x, y)
+        index, ms_index = timed(grid.index_points, x, y)
+        _, ms_n4 = timed(grid.neighbors)
+        _, ms_n8 = timed(grid.neighbors, diagonal=True)
+        print(f"{n}x{n} grid ({grid.n} sectors): load {ms_load:.0f} ms, locate {args.points} points {ms_locate:.0f} ms, "
+              f"CellIndex {ms_index:.0f} ms, neighbours 4 {ms_n4:.0f} ms / 8 {ms_n8:.0f} ms")
+        _, us_points = timed(lambda: [index.points(k) for k in range(min(grid.n, 10_000))])
+        print(f"    points of one sector: {us_points * 1000 / min(grid.n, 10_000):.1f} us")
+        if grid.n <= args.max_render:
+            load = rng.uniform(20, 140, grid.n)
+            fig = go.Figure()
+            _, ms_fig = timed(sector_grid, fig, grid.rows, grid.cols, band_index(load, [60, 85, 120]),
+                              ["green", "yellow", "orange", "red"])
+            payload, ms_json = timed(fig.to_json)
+            print(f"    heat map: build {ms_fig:.0f} ms, to_json {ms_json:.0f} ms, payload {len(payload) / 1e3:.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Sector heat map: batched traces vs. a shape, an annotation and a trace per item.
+
+    cd BACKEND
+    python -m benchmarks.bench_heatmap --reports 10 1000 5000
+
+"Per item" is how the traffic page drew its map: a rectangle shape and an annotation
+per sector and one Scatter trace per citizen report. "Batched" is ui.sector_grid plus
+ui.add_report_markers: one Heatmap, one border trace and one marker trace whose
+reports on the same spot share a marker, whatever the report count. Times are figure build plus to_json (what st.plotly_chart sends).
+"""
+import argparse
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from engine import COLS, ROWS, SECTORS
+from ui import add_report_markers, band_index, sector_centers, sector_grid
+
+ISSUE_COLORS = {"Accident": "red", "Heavy Traffic": "orange", "Road Hazard": "blue"}
+
+
+def make_reports(n, seed=0):
+    rng = np.random.default_rng(seed)
+    issues = list(ISSUE_COLORS)
+    return [{"sector": SECTORS[rng.integers(len(SECTORS))], "issue": issues[rng.integers(len(issues))],
+             "severity": int(rng.integers(1, 6)), "comment": f"report {i}"} for i in range(n)]
+
+
+def per_item(load, reports):
+    fig = go.Figure()
+    for i, s in enumerate(SECTORS):
+        color = ["green", "yellow", "orange", "red"][int(np.searchsorted([60, 85, 120], load[i], side="right"))]
+        fig.add_shape(type="rect", x0=COLS[i], y0=2 - ROWS[i], x1=COLS[i] + 1, y1=3 - ROWS[i],
+                      line=dict(color="black", width=2), fillcolor=color, opacity=0.55)
+        fig.add_annotation(x=COLS[i] + 0.5, y=2 - ROWS[i] + 0.5, text=f"{s}<br>{int(load[i])}%",
+                           showarrow=False, font=dict(color="black", size=11))
+    coords = {s: (c, r) for s, c, r in zip(SECTORS, COLS, ROWS)}
+    for r in reports:
+        x, y = coords[r["sector"]]
+        fig.add_trace(go.Scatter(
+            x=[x + 0.5], y=[2 - y + 0.5], mode="markers+text",
+            marker=dict(size=r["severity"] * 10 + 8, color=ISSUE_COLORS.get(r["issue"], "purple"), opacity=0.8,
+                        line=dict(color="black", width=1)),
+            text=[f"{r['issue']} ({r['severity']})"], textposition="top center",
+            hovertemplate=f"Sector: {r['sector']}<br>Issue: {r['issue']}<br>Severity: {r['severity']}<br>Comment: {r['comment']}",
+            showlegend=False))
+    fig.update_xaxes(visible=False, range=[0, 3])
+    fig.update_yaxes(visible=False, range=[0, 3])
+    fig.update_layout(height=450, margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+def batched(load, reports):
+    fig = go.Figure()
+    sector_grid(fig, ROWS, COLS, band_index(load, [60, 85, 120]), ["green", "yellow", "orange", "red"],
+                text=[f"{s}<br>{int(v)}%" for s, v in zip(SECTORS, load)], opacity=0.55)
+    add_report_markers(fig, reports, sector_centers(SECTORS, ROWS, COLS), ISSUE_COLORS, "purple")
+    fig.update_layout(height=450, margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-legacy", type=int, default=5000, help="skip the per-item figure above this many reports")
+    args = parser.parse_args()
+
+    load = np.random.default_rng(1).uniform(20, 140, len(SECTORS))
+    for n in args.reports:
+        reports = make_reports(n)
+        for label, build in [("per item", per_item), ("batched", batched)]:
+            if build is per_item and n > args.max_legacy:
+                continue
+            t_build = t_json = 0.0
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fig = build(load, reports)
+                t1 = time.perf_counter()
+                payload = fig.to_json()
+                t_build += t1 - t0
+                t_json += time.perf_counter() - t1
+            print(f"{n:6d} reports  {label:9s} {len(fig.data):5d} traces  build {t_build / args.repeat * 1000:8.1f} ms"
+                  f"  to_json {t_json / args.repeat * 1000:8.1f} ms  payload {len(payload) / 1e3:8.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Heat-map background: cached, pre-scaled data URI vs. opening the map on every rerun.
+
+    cd BACKEND
+    python -m benchmarks.bench_map_assets --size 3000
+
+A synthetic map (smooth colour field plus street-like lines, saved as PNG) stands in
+for map.png. "Per rerun" is what the pages did: Image.open, hand the PIL image to
+Plotly, serialize the figure. "Cached" builds the same figure with ui.add_map_background.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+from PIL import Image
+
+from ui import add_map_background
+
+
+def make_map(path, size, seed=0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size] / size
+    img = np.stack([180 + 40 * np.sin(6 * xx), 200 + 30 * np.cos(5 * yy), 170 + 20 * np.sin(4 * (xx + yy))], axis=-1)
+    for _ in range(40):  # streets
+        k = rng.integers(0, size - 8)
+        img[k:k + 6, :] = img[:, k:k + 6] = 245
+    img += rng.normal(0, 4, img.shape)
+    Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(path)
+
+
+def figure(background):
+    fig = go.Figure()
+    background(fig)
+    fig.update_xaxes(visible=False, range=[0, 3])
+    fig.update_yaxes(visible=False, range=[0, 3])
+    fig.update_layout(height=520, margin=dict(l=0, r=0, t=0, b=0))
+    return fig.to_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=3000, help="map width and height in pixels")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "map.png")
+    make_map(path, args.size)
+    print(f"map: {args.size}x{args.size} PNG, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+
+    def per_rerun(fig):
+        fig.add_layout_image(dict(source=Image.open(path), xref="x", yref="y", x=0, y=3, sizex=3, sizey=3,
+                                  sizing="stretch", opacity=1, layer="below"))
+
+    def cached(fig):
+        add_map_background(fig, path)
+
+    for label, background in [("per rerun (PIL image)", per_rerun), ("cached data URI", cached)]:
+        t0 = time.perf_counter()
+        payload = figure(background)  # first call fills the cache
+        first_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            payload = figure(background)
+        ms = (time.perf_counter() - t0) / args.repeat * 1000
+        print(f"{label:24s} first {first_ms:8.1f} ms, then {ms:8.1f} ms/figure, payload {len(payload) / 1e3:9.1f} kB")
+
+    os.utime(path)  # touching the file invalidates the cache
+    t0 = time.perf_counter()
+    figure(cached)
+    print(f"after an mtime change     {(time.perf_counter() - t0) * 1000:8.1f} ms (re-encoded once)")
+
+
+if __name__ == "__main__":
+    main()
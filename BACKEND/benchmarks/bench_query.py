@@ -0,0 +1,82 @@
+"""
+Time-range queries: rollup levels against scanning the raw history.
+
+    cd BACKEND
+    python -m benchmarks.bench_query --days 365 --interval 300 --sectors 100
+
+Records `days` days of an environment-like history (city temperature and AQI plus
+a per-sector AQI column), one sample every `interval` seconds, into a
+storage.TieredSeries with minute / hour / day rollups and a cold archive. Then
+times queries at different ranges and resolutions, each answered from the
+coarsest rollup that fits, against the same answer computed from the raw rows
+(ring plus archive) with daily_means.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from storage import DAY, HOUR, MINUTE, DayArchive, TieredSeries, daily_means
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--interval", type=float, default=300.0, help="seconds between samples")
+    parser.add_argument("--sectors", type=int, default=100)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        columns = {"temp": (), "aqi": (), "sector_aqi": (args.sectors,)}
+        archive = DayArchive(os.path.join(directory, "archive"), columns)
+        series = TieredSeries(os.path.join(directory, "history"), columns, archive=archive)
+        rng = np.random.default_rng(0)
+        samples = int(args.days * 86400 / args.interval)
+        now = time.time()
+        start = now - samples * args.interval
+        t0 = time.perf_counter()
+        for i in range(samples):
+            sector_aqi = rng.uniform(20, 180, args.sectors)
+            series.append(start + i * args.interval, temp=rng.normal(30, 2), aqi=sector_aqi.mean(),
+                          sector_aqi=sector_aqi)
+        series.flush()
+        print(f"{samples} samples over {args.days} days, {args.sectors} sectors: recorded in "
+              f"{time.perf_counter() - t0:.1f} s; rollup buckets "
+              + ", ".join(f"{width} s: {len(level)}" for width, level in series.levels.items()))
+
+        queries = {
+            "last day at 1 min": lambda: series.query(now - 86400, resolution=MINUTE, columns=["temp", "aqi"]),
+            "last week at 1 h": lambda: series.query(now - 7 * 86400, resolution=HOUR, columns=["temp", "aqi"]),
+            "whole range at 1 d": lambda: series.query(start, resolution=DAY, columns=["temp", "aqi"]),
+            "whole range at 1 d, 1 sector": lambda: series.query(start, resolution=DAY, columns=["sector_aqi"],
+                                                                 sectors=[7]),
+        }
+        for label, query in queries.items():
+            out, ms = timed(query)
+            print(f"    {label:36s} {ms:8.1f} ms  {out['ts'].size:6d} buckets, {int(out['count'].sum()):7d} samples")
+
+        def raw_daily():
+            rows = series.history(start, columns=["temp", "aqi"])
+            return daily_means(rows["ts"], np.column_stack([rows["temp"], rows["aqi"]]))
+
+        (days, _), ms = timed(raw_daily, repeat=1)
+        print(f"    {'whole range at 1 d, from raw rows':36s} {ms:8.1f} ms  {days.size:6d} days")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Report store: admin-panel queries (filters, text search, sort, one page) over 1M reports.
+
+    cd BACKEND
+    python -m benchmarks.bench_report_store --reports 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from storage import ReportStore
+
+CATEGORIES = ["Waste Management", "Streetlight", "Traffic", "Flooding", "Noise", "General Issue"]
+SEVERITIES = ["Minor", "Major", "Critical"]
+STATUSES = ["Submitted", "Verified", "Assigned", "In Progress", "Resolved"]
+PLACES = ["Main St.", "Ortigas Ave.", "ADB Ave.", "Emerald Ave.", "San Miguel Ave.", "Julia Vargas Ave.",
+          "Meralco Ave.", "Garnet Rd.", "Ruby Rd.", "Pearl Dr."]
+WORDS = ["garbage", "overflowing", "bin", "light", "flickering", "pothole", "flood", "noise", "traffic",
+         "blocked", "broken", "smell", "dumping", "crossing", "signal", "drain", "tree", "wire"]
+
+QUERIES = [
+    ("newest, no filters", {}),
+    ("one category", {"categories": ["Streetlight"]}),
+    ("severity sort, two statuses", {"statuses": ["Submitted", "Verified"], "sort": "Severity (Critical→Minor)"}),
+    ("status sort, critical only", {"severities": ["Critical"], "sort": "Status"}),
+    ("search common word", {"search": "flood"}),
+    ("search rare phrase", {"search": "garnet pothole"}),
+    ("search + category", {"search": "bin", "categories": ["Waste Management"]}),
+    ("page 200", {"offset": 200 * 50}),
+]
+
+
+def make_reports(n, rng, t_end):
+    ts = t_end - rng.uniform(0, 90 * 86400, n)
+    cat = rng.integers(0, len(CATEGORIES), n)
+    sev = rng.integers(0, len(SEVERITIES), n)
+    status = rng.integers(0, len(STATUSES), n)
+    place = rng.integers(0, len(PLACES), n)
+    words = rng.integers(0, len(WORDS), (n, 4))
+    for i in range(n):
+        yield {
+            "id": f"r{i:08d}", "ts": float(ts[i]), "name": f"Citizen {i % 5000}",
+            "category": CATEGORIES[cat[i]], "location_text": f"Near {PLACES[place[i]]} {i % 97}",
+            "severity": SEVERITIES[sev[i]], "description": " ".join(WORDS[w] for w in words[i]),
+            "status": STATUSES[status[i]], "assigned_to": "", "response_time_days": None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=None, help="database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "reports.db")
+    store = ReportStore(path)
+    rng = np.random.default_rng(0)
+    if len(store) < args.reports:
+        t0 = time.perf_counter()
+        batch = []
+        for rec in make_reports(args.reports, rng, time.time()):
+            batch.append(rec)
+            if len(batch) == 50_000:
+                store.add_many(batch)
+                batch = []
+        store.add_many(batch)
+        print(f"inserted {len(store)} reports in {time.perf_counter() - t0:.1f} s ({path})")
+
+    print(f"{'query':32s} {'page ms':>8s} {'count ms':>9s} {'matches':>9s}")
+    for label, kwargs in QUERIES:
+        filters = {k: v for k, v in kwargs.items() if k not in ("sort", "offset")}
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            page = store.query(**kwargs)
+        t1 = time.perf_counter()
+        for _ in range(args.repeat):
+            total = store.count(**filters)
+        t2 = time.perf_counter()
+        assert len(page) == min(50, max(0, total - kwargs.get("offset", 0)))
+        print(f"{label:32s} {(t1 - t0) / args.repeat * 1000:8.1f} {(t2 - t1) / args.repeat * 1000:9.1f} {total:9d}")
+
+    # keyset paging: walk 200 pages with cursors, then re-read the last one
+    for label, kwargs in [("newest", {}), ("status sort", {"sort": "Status"}), ("search 'flood'", {"search": "flood"})]:
+        cursor = None
+        t0 = time.perf_counter()
+        for _ in range(200):
+            last = cursor
+            page, cursor = store.page(cursor=cursor, **kwargs)
+        t1 = time.perf_counter()
+        for _ in range(args.repeat):
+            store.page(cursor=last, **kwargs)
+        t2 = time.perf_counter()
+        print(f"cursor paging, {label:17s} {(t1 - t0) / 200 * 1000:6.1f} ms/page over 200 pages, "
+              f"page 200 alone {(t2 - t1) / args.repeat * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
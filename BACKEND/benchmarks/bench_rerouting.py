@@ -0,0 +1,65 @@
+"""
+Emergency rerouting: incremental shortest-path trees vs. recomputing them from scratch.
+
+    cd BACKEND
+    python -m benchmarks.bench_rerouting --size 10 15 20 --pairs 5000
+
+For each n x n sector grid and a set of OD pairs, times one congestion update
+(road costs and tree repairs, or rebuilds past the repair caps) and the flows of
+every OD pair for several kinds of change, next to building every tree again with
+the new costs.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine.grid import Grid
+from engine.roads import RoadNetwork, Rerouter, sample_od
+
+
+def scenarios(rng, n):
+    yield "small drift (+-1%)", lambda c: c * rng.uniform(0.99, 1.01, n)
+    yield "incident (3 sectors)", lambda c: np.where(np.isin(np.arange(n), rng.integers(0, n, 3)), 190.0, c)
+    yield "noisy step (+-10%)", lambda c: c * rng.uniform(0.9, 1.1, n)
+    yield "all new congestion", lambda c: rng.uniform(30, 140, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, nargs="+", default=[10, 15, 20], help="grid rows = cols")
+    parser.add_argument("--pairs", type=int, default=5000, help="OD pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for size in args.size:
+        grid = Grid(size, size)
+        network = RoadNetwork(grid.neighbors())
+        od = sample_od(grid.n, rng, n_pairs=args.pairs)
+        t0 = time.perf_counter()
+        rerouter = Rerouter(network, *od)
+        print(f"{size}x{size} grid, {od[0].shape[0]} OD pairs from {rerouter.sources.shape[0]} origins: "
+              f"trees built in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        congestion = rng.uniform(30, 140, grid.n)
+        rerouter.update(congestion)
+        for label, change in scenarios(rng, grid.n):
+            congestion = change(congestion)
+            t0 = time.perf_counter()
+            trees = rerouter.update(congestion)
+            t1 = time.perf_counter()
+            rerouter.flows()
+            ms, ms_flows = (t1 - t0) * 1000, (time.perf_counter() - t1) * 1000
+            # the same trees from scratch
+            t0 = time.perf_counter()
+            costs = rerouter.costs.tolist()
+            for s in rerouter.sources.tolist():
+                network.tree(s, costs)
+            ms_scratch = (time.perf_counter() - t0) * 1000
+            diverted = rerouter.volumes[rerouter.rerouted()].sum() / rerouter.volumes.sum()
+            print(f"    {label:22s} update {ms:7.1f} ms ({trees:4d} trees touched) + flows {ms_flows:5.1f} ms   "
+                  f"trees from scratch {ms_scratch:7.1f} ms   diverted {diverted:.0%} of the volume")
+
+
+if __name__ == "__main__":
+    main()
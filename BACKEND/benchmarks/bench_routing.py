@@ -0,0 +1,43 @@
+"""
+Truck dispatch planner: tours for 5,000 bins and 50 trucks over one working shift.
+
+    cd BACKEND
+    python -m benchmarks.bench_routing --bins 5000 --trucks 50
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import routing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bins", type=int, default=5000)
+    parser.add_argument("--trucks", type=int, default=50)
+    parser.add_argument("--size", type=float, default=10.0, help="grid cells per side")
+    parser.add_argument("--capacity", type=float, default=100.0, help="full bins per truck")
+    parser.add_argument("--shift", type=float, default=8.0, help="shift length in hours")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    x = rng.uniform(0, args.size, args.bins)
+    y = rng.uniform(0, args.size, args.bins)
+    demand = rng.uniform(0.5, 1.0, args.bins)
+    # a third of the bins overflow during the shift and must be reached before that
+    due = np.where(rng.random(args.bins) < 1 / 3, rng.uniform(1, args.shift, args.bins), np.inf)
+    depot = (args.size / 2, args.size / 2)
+
+    for label, local_search in (("construction only", False), ("with local search", True)):
+        t0 = time.perf_counter()
+        plan = routing.plan_routes(x, y, demand, args.trucks, capacity=args.capacity, depot=depot, due=due,
+                                   shift_h=args.shift, local_search=local_search)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:18s} {elapsed:6.2f} s  served {plan['served'].shape[0]}/{args.bins}  "
+              f"{plan['distance_km'].sum():8.1f} km  longest tour {plan['duration_h'].max():.2f} h")
+
+
+if __name__ == "__main__":
+    main()
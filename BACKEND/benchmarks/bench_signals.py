@@ -0,0 +1,66 @@
+"""
+Traffic light optimization: batched green-split search over many intersections.
+
+    cd BACKEND
+    python -m benchmarks.bench_signals --intersections 1000 10000 --max-change 10 25 50
+
+For each intersection count (rush-hour sector loads, 4 intersections per sector),
+times signals.optimize for every max_change and reports the intersection delay
+before / after and the mean sector load factor fed to the fusion model. Next to it,
+the coarse grid scored the direct way (every candidate plan evaluated as an
+(intersections, candidates, phases) array) for the largest max_change.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import signals
+
+
+def direct_coarse(demand, saturation, cycle0, split0, max_change):
+    splits = signals.split_grid(demand.shape[1])
+    cycles = np.repeat(np.asarray(signals.CYCLES, dtype=float), splits.shape[0])
+    splits = np.tile(splits, (len(signals.CYCLES), 1))
+    u0 = signals.green_ratio(cycle0, split0)
+    best = np.empty(demand.shape[0])
+    block = max(1, signals.BLOCK_SIZE // (cycles.shape[0] * demand.shape[1]))
+    for i in range(0, demand.shape[0], block):
+        j = i + block
+        d = signals.delay(demand[i:j, None], saturation[i:j, None], cycles, splits)
+        ok = signals._allowed(cycles, splits, cycle0[i:j, None], u0[i:j, None], max_change)
+        best[i:j] = np.where(ok, d, np.inf).min(axis=1)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--intersections", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--max-change", type=int, nargs="+", default=[10, 25, 50], help="slider values (%%)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    per_sector = signals.INTERSECTIONS_PER_SECTOR
+    for m in args.intersections:
+        n_sectors = -(-m // per_sector)
+        inter = signals.make_intersections(n_sectors, per_sector, rng)[:m]
+        load = rng.uniform(360, 510, (n_sectors, 1))  # rush hour
+        demand = signals.phase_demand(inter, load)[:, 0]
+        print(f"{m} intersections ({len(signals.PHASES)} phases, "
+              f"{len(signals.CYCLES) * signals.split_grid(len(signals.PHASES)).shape[0]} grid plans each)")
+        for pct in args.max_change:
+            t0 = time.perf_counter()
+            plan = signals.optimize(demand, inter["saturation"], inter["cycle"], inter["split"], pct / 100)
+            ms = (time.perf_counter() - t0) * 1000
+            factor = signals.sector_load_factor(inter, demand.sum(axis=1)[:, None], plan["base_delay"][:, None],
+                                                plan["delay"][:, None], n_sectors)
+            print(f"    max change {pct:3d}%  optimize {ms:7.1f} ms   delay {plan['base_delay'].mean():5.1f} -> "
+                  f"{plan['delay'].mean():5.1f} s/veh   mean load factor {factor.mean():.3f}")
+        t0 = time.perf_counter()
+        direct_coarse(demand, inter["saturation"], inter["cycle"], inter["split"], args.max_change[-1] / 100)
+        print(f"    coarse grid scored directly {(time.perf_counter() - t0) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
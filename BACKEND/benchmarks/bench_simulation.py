@@ -0,0 +1,44 @@
+"""
+Full-year run of the headless city simulation.
+
+    cd BACKEND
+    python -m benchmarks.bench_simulation --rows 100 --cols 100 --steps 8760
+
+The default run takes 12-23 s on a single slow core here (float32 outputs); the
+spread is the machine's load, not the engine. Mean fill_pct comes out well above
+100: the truck fleet (waste.BASE_TRUCKS trucks of waste.TRUCK_CAPACITY_SECTORS sectors an hour)
+does not grow with the grid, so on 10,000 sectors almost none is ever collected and
+their bins overflow (fill is allowed up to waste.MAX_FILL_PCT).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import CitySimulation, waste
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=8760)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sim = CitySimulation.from_grid(args.rows, args.cols, seed=args.seed, dtype=np.float32)
+    start = time.perf_counter()
+    out = sim.run(args.steps)
+    elapsed = time.perf_counter() - start
+
+    cells = sim.n * args.steps
+    print(f"{sim.n} sectors x {args.steps} steps: {elapsed:.2f} s ({cells / elapsed / 1e6:.1f} M sector-steps/s)")
+    for name in ("congestion_pct", "fill_pct", "storage_pct", "aqi"):
+        print(f"  {name:15s} shape={out[name].shape} mean={float(out[name].mean()):.1f}")
+    over = float((out["fill_pct"] > 100).mean())
+    print(f"  fill_pct above 100% (overflowing) in {over:.0%} of sector-steps; trucks collect at most "
+          f"{waste.BASE_TRUCKS[1] * waste.TRUCK_CAPACITY_SECTORS} of the {sim.n} sectors a step")
+
+
+if __name__ == "__main__":
+    main()
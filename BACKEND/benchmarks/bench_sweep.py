@@ -0,0 +1,53 @@
+"""
+Fusion-weight sweep: random weight combinations scored on a simulated history.
+
+    cd BACKEND
+    python -m benchmarks.bench_sweep --weights 1000 4000 10000 --hours 720 --workers 1 4
+
+For traffic (Rush Hour) and waste (Overflow Alerts) histories on the default grid,
+times the history itself and engine.sweep.sweep for every combination count and
+worker count (1 = in-process), and prints the best combination by agreement next to
+the page's default weights.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import CitySimulation
+from engine.sweep import sample_weights, sweep
+
+DOMAINS = {
+    "traffic": ({"situation": "Rush Hour"}, (0.6, 0.3, 0.1)),
+    "waste": ({"scenario": "Overflow Alerts"}, (0.6, 0.25, 0.15)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weights", type=int, nargs="+", default=[1000, 4000, 10000])
+    parser.add_argument("--hours", type=int, default=720)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for domain, (controls, current) in DOMAINS.items():
+        t0 = time.perf_counter()
+        history = CitySimulation(seed=args.seed).fusion_history(domain, args.hours, **controls)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{domain}: {history['outcome'].size} sector-hours, {history['outcome'].mean():.1%} events, "
+              f"history {ms:.0f} ms")
+        for n in args.weights:
+            weights = sample_weights(n, len(current), np.random.default_rng(args.seed), current)
+            for workers in args.workers:
+                t0 = time.perf_counter()
+                result = sweep(history["inputs"], history["outcome"], weights, workers=workers)
+                s = time.perf_counter() - t0
+                best = result["rank"][0]
+                print(f"    {n:6d} combinations  workers {workers}  {s:6.2f} s   best {np.round(weights[best], 2)} "
+                      f"agreement {result['agreement'][best]:.3f} (default {result['agreement'][0]:.3f}), "
+                      f"Pareto front {len(result['front'])}")
+
+
+if __name__ == "__main__":
+    main()
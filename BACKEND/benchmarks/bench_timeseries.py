@@ -0,0 +1,57 @@
+"""
+Page histories: persistent ring buffer vs. a session list of dicts sliced to the last N.
+
+    cd BACKEND
+    python -m benchmarks.bench_timeseries --steps 100000 --sectors 9 10000
+
+"List" is how the pages kept history: append a dict, then `history = history[-N:]`,
+which copies the list every step. "Ring" is storage.RingSeries (memory-mapped
+columns, N = capacity): append one row in place, read the latest window as views.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from storage import RingSeries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--sectors", type=int, nargs="+", default=[9, 10_000])
+    parser.add_argument("--capacity", type=int, nargs="+", default=[24, 10_080])
+    args = parser.parse_args()
+
+    for n in args.sectors:
+        loads = np.random.default_rng(0).uniform(0, 200, (64, n)).astype(np.float32)
+        steps = args.steps if n <= 100 else args.steps // 100
+        for capacity in args.capacity:
+            history = []
+            t0 = time.perf_counter()
+            for i in range(steps):
+                history.append({"ts": datetime.now(), "avg": float(i), "sector_loads": loads[i % 64].tolist()})
+                history = history[-capacity:]
+            us_list = (time.perf_counter() - t0) / steps * 1e6
+
+            series = RingSeries(os.path.join(tempfile.mkdtemp(), "bench"), {"avg": (), "sector_loads": (n,)}, capacity)
+            t0 = time.perf_counter()
+            for i in range(steps):
+                series.append(i, avg=i, sector_loads=loads[i % 64])
+            us_ring = (time.perf_counter() - t0) / steps * 1e6
+            t0 = time.perf_counter()
+            window = series.window()
+            us_window = (time.perf_counter() - t0) * 1e6
+            t0 = time.perf_counter()
+            RingSeries(series.directory, series.columns, capacity).window()
+            ms_reopen = (time.perf_counter() - t0) * 1000
+            print(f"{n:6d} sectors  capacity {capacity:6d}  {steps} steps: list append+slice {us_list:8.1f} us/step   "
+                  f"ring append {us_ring:6.1f} us/step, window of {window['avg'].size} {us_window:5.0f} us, "
+                  f"reopen {ms_reopen:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Headless simulation engine for the Ortigas dashboard.
+
+Pure NumPy (no Streamlit): the pages call into it and only render the results. The
+simulation clock (scheduler) steps it on a background thread.
+"""
+from .grid import COLS, DEFAULT_GRID, ROWS, SECTORS, SECTOR_TYPE, TYPE_BASE_MULT, CellIndex, Grid, load_grid, make_grid
+from .scheduler import TICK_SECONDS, TickScheduler, default_scheduler
+from .simulation import DEFAULT_CONTROLS, CitySimulation
+from .snapshot import freeze
+
+__all__ = [
+    "COLS", "DEFAULT_GRID", "ROWS", "SECTORS", "SECTOR_TYPE", "TYPE_BASE_MULT",
+    "CellIndex", "Grid", "load_grid", "make_grid",
+    "DEFAULT_CONTROLS", "CitySimulation",
+    "TICK_SECONDS", "TickScheduler", "default_scheduler", "freeze",
+]
@@ -0,0 +1,104 @@
+"""
+Bin-level waste model: every bin accumulates fill following the daily generation
+curve (waste.daily_pattern) scaled by its sector type (TYPE_BASE_MULT) and its own
+generation rate. Bins are records of a structured array, like the streetlights.
+
+Time-to-full is solved in closed form from the cumulative daily curve, so a
+forecast for every bin is a handful of array operations plus one searchsorted.
+"""
+import numpy as np
+
+from .waste import BASE_AVG_FILL, HOURLY_PATTERN, MAX_FILL_PCT
+
+BIN_DTYPE = np.dtype([
+    ("sector", np.int32),  # index into the sector list
+    ("x", np.float64),  # position in grid units (column axis)
+    ("y", np.float64),  # position in grid units (row axis)
+    ("type_mult", np.float64),  # TYPE_BASE_MULT of the bin's sector
+    ("rate", np.float64),  # fill % per hour at pattern 1.0 and type multiplier 1.0
+    ("fill_pct", np.float64),  # 0..200 (allow overflow >100 for critical)
+    ("hours_since_collection", np.float64),
+], align=True)
+
+# generation over a full day in "pattern hours", and the cumulative curve starting
+# at each hour of the day: CUM_PATTERN[h, k] = sum of the pattern over hours h..h+k-1
+DAY_PATTERN_TOTAL = float(HOURLY_PATTERN.sum())
+CUM_PATTERN = np.concatenate(
+    [np.zeros((24, 1)), np.cumsum([np.roll(HOURLY_PATTERN, -h) for h in range(24)], axis=1)], axis=1)
+
+# a bin at base rate gains about BASE_AVG_FILL percent per day
+BASE_RATE = BASE_AVG_FILL / DAY_PATTERN_TOTAL
+COLLECT_MIN_FILL = 50.0  # trucks skip bins that are less than half full
+
+
+def make_bins(rows, cols, type_mult, bins_per_sector, rng):
+    """
+    Random bins spread over the sector grid. rows/cols/type_mult are per sector;
+    bins_per_sector is an int or a per-sector array of counts.
+    """
+    counts = np.broadcast_to(np.asarray(bins_per_sector, dtype=np.int64), (len(rows),))
+    sector = np.repeat(np.arange(len(rows), dtype=np.int32), counts)
+    n = sector.shape[0]
+    bins = np.zeros(n, dtype=BIN_DTYPE)
+    bins["sector"] = sector
+    bins["x"] = np.asarray(cols)[sector] + rng.uniform(0.05, 0.95, size=n)
+    bins["y"] = np.asarray(rows)[sector] + rng.uniform(0.05, 0.95, size=n)
+    bins["type_mult"] = np.asarray(type_mult)[sector]
+    bins["rate"] = BASE_RATE * rng.lognormal(0.0, 0.3, size=n)
+    bins["hours_since_collection"] = rng.integers(6, 25, size=n)
+    bins["fill_pct"] = np.clip(bins["rate"] * bins["type_mult"] * bins["hours_since_collection"], 0, MAX_FILL_PCT)
+    return bins
+
+
+def advance_bins(bins, hour, scale=1.0, noise=None):
+    """One hour of generation at the given hour of day (scale follows the scenario). In place."""
+    gain = bins["rate"] * bins["type_mult"] * (scale * HOURLY_PATTERN[hour % 24])
+    if noise is not None:
+        gain += noise
+    bins["fill_pct"] = np.clip(bins["fill_pct"] + gain, 0, MAX_FILL_PCT)
+    bins["hours_since_collection"] = np.minimum(bins["hours_since_collection"] + 1, 72)
+
+
+def empty_bins(bins, idx):
+    """Collection empties the selected bins (index array or boolean mask)."""
+    bins["fill_pct"][idx] = 0.0
+    bins["hours_since_collection"][idx] = 0.0
+
+
+def time_to_full(bins, hour, scale=1.0, threshold=100.0):
+    """
+    Hours until each bin reaches `threshold` percent, starting at the given hour of day
+    (0 for bins already at or above it). Fractional within the hour it fills up.
+    """
+    rate = bins["rate"] * bins["type_mult"] * scale
+    need = np.maximum(threshold - bins["fill_pct"], 0.0) / rate  # in pattern hours
+    days = np.floor(need / DAY_PATTERN_TOTAL)
+    rem = need - days * DAY_PATTERN_TOTAL
+    cum = CUM_PATTERN[hour % 24]
+    k = np.clip(np.searchsorted(cum, rem, side="left"), 1, 24)
+    frac = (rem - cum[k - 1]) / (cum[k] - cum[k - 1])
+    return days * 24 + (k - 1) + frac
+
+
+def sector_summary(bins, n_sectors, ttf=None, overflow_threshold=85):
+    """
+    Aggregate bins per sector for the heat map: mean / max fill, bins over the
+    overflow threshold and (if ttf is given) the soonest time-to-full.
+    """
+    sector = bins["sector"]
+    fill = bins["fill_pct"]
+    count = np.bincount(sector, minlength=n_sectors)
+    mean_fill = np.bincount(sector, weights=fill, minlength=n_sectors) / np.maximum(count, 1)
+    max_fill = np.zeros(n_sectors)
+    np.maximum.at(max_fill, sector, fill)
+    summary = {
+        "bins": count,
+        "mean_fill": mean_fill,
+        "max_fill": max_fill,
+        "overflow_bins": np.bincount(sector, weights=fill > overflow_threshold, minlength=n_sectors).astype(np.int64),
+    }
+    if ttf is not None:
+        min_ttf = np.full(n_sectors, np.inf)
+        np.minimum.at(min_ttf, sector, ttf)
+        summary["min_time_to_full"] = min_ttf
+    return summary
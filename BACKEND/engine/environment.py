@@ -0,0 +1,48 @@
+"""
+Environment simulation: city-wide temperature / humidity / AQI and per-sector AQI sensors.
+"""
+import numpy as np
+
+BASE_TEMP, BASE_HUMIDITY, BASE_AQI = 28, 65, 40
+
+# situation -> (temp, humidity, aqi) offsets from the base values
+SITUATION_OFFSETS = {
+    "Normal": (0, 0, 0),
+    "Heatwave": (10, -10, 20),
+    "Flood": (-3, 20, 5),
+    "Pollution Spike": (2, -5, 60),
+}
+
+# situation -> sensor AQI range per sector (anything else is a pollution spike)
+SECTOR_AQI_RANGE = {
+    "Normal": (40, 60),
+    "Heatwave": (50, 80),
+    "Flood": (30, 60),
+}
+POLLUTION_AQI_RANGE = (150, 300)
+
+
+def simulate_environment(situation):
+    """Base temperature, humidity and AQI for a situation."""
+    dt, dh, da = SITUATION_OFFSETS.get(situation, (0, 0, 0))
+    return BASE_TEMP + dt, BASE_HUMIDITY + dh, BASE_AQI + da
+
+
+def apply_overrides(humidity, aqi, humidity_control=60, aqi_control=0,
+                    purifier=False, dehumidifier=False, flood_pumps=0):
+    """Manual overrides and actuator effects on humidity and AQI."""
+    humidity = (humidity + humidity_control) / 2
+    aqi = np.maximum(0, aqi - aqi_control)
+    if purifier:
+        aqi = np.maximum(0, aqi - 15)
+    if dehumidifier:
+        humidity = np.maximum(0, humidity - 10)
+    if flood_pumps > 0:
+        humidity = np.maximum(0, humidity - flood_pumps * 4)
+    return humidity, aqi
+
+
+def sector_aqi(situation, rng, size):
+    """Sensor AQI per sector (size may be (sectors,) or (sectors, timesteps))."""
+    low, high = SECTOR_AQI_RANGE.get(situation, POLLUTION_AQI_RANGE)
+    return rng.integers(low, high, size=size, dtype=np.int16)
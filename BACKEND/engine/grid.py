@@ -0,0 +1,202 @@
+"""
+Sector grid shared by the simulation engine and the dashboard pages.
+
+The Ortigas prototype uses a 3x3 grid (A1..C3). Larger grids keep the same
+naming scheme: row letters (A, B, .., Z, AA, AB, ..) followed by a 1-based
+column number.
+
+A `Grid` numbers its cells row-major (cell = row * n_cols + col); the sectors
+are the active cells in cell order, so a grid may leave cells out (water,
+outside the city). Every lookup (name or (row, col) -> sector, neighbours,
+point -> sector) is a vectorized array operation over a dense cell table.
+
+The default grid is the 3x3 Ortigas grid, or the JSON file named by the
+GRID_CONFIG environment variable:
+
+    {
+      "rows": 100, "cols": 100,
+      "inactive": ["A1", "CV100"],              optional, sectors left out
+      "types": {"B2": "Commercial"},            optional, else the 3x3 pattern
+      "origin": [121.05, 14.59],                optional, point of cell A1's corner
+      "cell_size": [0.0037, -0.0037]            optional, cell width / height in point units
+    }
+"""
+import json
+import os
+
+import numpy as np
+
+GRID_CONFIG_ENV = "GRID_CONFIG"
+
+# Sector types: impacts base daily waste generation (commercial generates more)
+SECTOR_TYPE = {
+    "A1":"Residential","A2":"Commercial","A3":"Residential",
+    "B1":"Residential","B2":"Commercial","B3":"Residential",
+    "C1":"Residential","C2":"Commercial","C3":"Residential"
+}
+TYPE_BASE_MULT = {"Residential":1.0, "Commercial":1.6}
+
+# (row, col) offsets of the edge neighbours, then the diagonal ones
+NEIGHBOR_OFFSETS = np.array([(-1, 0), (0, -1), (0, 1), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)])
+
+
+def row_label(row):
+    """Spreadsheet-style row letters: 0 -> A, 25 -> Z, 26 -> AA."""
+    label = ""
+    row += 1
+    while row > 0:
+        row, rem = divmod(row - 1, 26)
+        label = chr(ord("A") + rem) + label
+    return label
+
+
+def make_grid(n_rows, n_cols):
+    """Return (sectors, rows, cols) for an n_rows x n_cols grid in row-major order."""
+    rows = np.repeat(np.arange(n_rows), n_cols)
+    cols = np.tile(np.arange(n_cols), n_rows)
+    sectors = [f"{label}{c}" for label in map(row_label, range(n_rows)) for c in range(1, n_cols + 1)]
+    return sectors, rows, cols
+
+
+def sector_types(sectors, cols):
+    """Sector type per sector; unknown sectors repeat the 3x3 pattern (middle column commercial)."""
+    return [SECTOR_TYPE.get(s, "Commercial" if c % 3 == 1 else "Residential") for s, c in zip(sectors, cols)]
+
+
+def type_multipliers(types):
+    """Array of TYPE_BASE_MULT values for a list of sector types."""
+    return np.array([TYPE_BASE_MULT.get(t, 1.0) for t in types], dtype=float)
+
+
+def neighbor_table(rows, cols, diagonal=False):
+    """Grid.neighbors for sectors given as (rows, cols) lists, in their order."""
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    table = np.full((rows.max() + 3, cols.max() + 3), -1, dtype=np.int64)  # padded by one cell
+    table[rows + 1, cols + 1] = np.arange(rows.shape[0])
+    offsets = NEIGHBOR_OFFSETS[:8 if diagonal else 4]
+    return table[rows[:, None] + 1 + offsets[:, 0], cols[:, None] + 1 + offsets[:, 1]]
+
+
+class CellIndex:
+    """
+    Points bucketed by sector (CSR layout): the points of sector k are
+    order[offsets[k]:offsets[k + 1]]; `sector` is each point's sector (-1 outside).
+    """
+
+    def __init__(self, grid, x, y):
+        self.sector = grid.locate(x, y)
+        inside = np.flatnonzero(self.sector >= 0)
+        self.order = inside[np.argsort(self.sector[inside], kind="stable")]
+        self.counts = np.bincount(self.sector[inside], minlength=grid.n)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+    def points(self, sector):
+        """Indexes of the points in one sector."""
+        return self.order[self.offsets[sector]:self.offsets[sector + 1]]
+
+    def within(self, sectors):
+        """Indexes of the points in any of the given sectors."""
+        sectors = np.asarray(sectors)
+        if sectors.size == 0:
+            return self.order[:0]
+        return np.concatenate([self.points(s) for s in sectors.tolist()])
+
+
+class Grid:
+    """
+    n_rows x n_cols sectors; `inactive` names cells that are not sectors. Points
+    (x, y) map to cells through origin + cell_size: col = floor((x - x0) / w),
+    row = floor((y - y0) / h); the default is grid units (x along the columns,
+    y along the rows from the top), the units the bins and trucks use.
+    """
+
+    def __init__(self, n_rows, n_cols, inactive=(), types=None, origin=(0.0, 0.0), cell_size=(1.0, 1.0)):
+        self.n_rows, self.n_cols = int(n_rows), int(n_cols)
+        names, rows, cols = make_grid(self.n_rows, self.n_cols)
+        inactive = set(inactive)
+        if inactive:
+            self.cells = np.flatnonzero([name not in inactive for name in names])
+            self.sectors = [names[c] for c in self.cells.tolist()]
+        else:
+            self.cells = np.arange(self.n_rows * self.n_cols)
+            self.sectors = names
+        self.rows, self.cols = rows[self.cells], cols[self.cells]
+        self.n = len(self.sectors)
+        self.index = {s: i for i, s in enumerate(self.sectors)}
+        # cell -> sector index, -1 for inactive cells
+        self._sector_of_cell = np.full(self.n_rows * self.n_cols, -1, dtype=np.int64)
+        self._sector_of_cell[self.cells] = np.arange(self.n)
+        types = types or {}
+        self.types = [types.get(s, t) for s, t in zip(self.sectors, sector_types(self.sectors, self.cols))]
+        self.origin = np.asarray(origin, dtype=float)
+        self.cell_size = np.asarray(cell_size, dtype=float)
+
+    @classmethod
+    def from_file(cls, path):
+        """Grid from a JSON config (see the module docstring)."""
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config["rows"], config["cols"], inactive=config.get("inactive", ()),
+                   types=config.get("types"), origin=config.get("origin", (0.0, 0.0)),
+                   cell_size=config.get("cell_size", (1.0, 1.0)))
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def type_mult(self):
+        return type_multipliers(self.types)
+
+    def cell(self, rows, cols):
+        """Row-major cell number of (row, col); -1 outside the grid."""
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        inside = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        return np.where(inside, rows * self.n_cols + cols, -1)
+
+    def row_col(self, cells):
+        """(rows, cols) of cell numbers."""
+        return np.divmod(np.asarray(cells), self.n_cols)
+
+    def sector_at(self, rows, cols):
+        """Sector index at (row, col); -1 outside the grid or on an inactive cell."""
+        cell = self.cell(rows, cols)
+        return np.where(cell >= 0, self._sector_of_cell[np.maximum(cell, 0)], -1)
+
+    def sector_index(self, names):
+        """Sector indexes of sector names; -1 for unknown names."""
+        return np.array([self.index.get(s, -1) for s in names], dtype=np.int64)
+
+    def neighbors(self, sectors=None, diagonal=False):
+        """
+        (len(sectors), 4) sector indexes of the neighbours above, left, right and below
+        (8 with diagonal=True, diagonals last); -1 where there is none.
+        """
+        idx = np.arange(self.n) if sectors is None else np.asarray(sectors)
+        offsets = NEIGHBOR_OFFSETS[:8 if diagonal else 4]
+        return self.sector_at(self.rows[idx][..., None] + offsets[:, 0], self.cols[idx][..., None] + offsets[:, 1])
+
+    def locate(self, x, y):
+        """Sector index of the cell containing each point (x, y); -1 outside the grid."""
+        col = np.floor((np.asarray(x, dtype=float) - self.origin[0]) / self.cell_size[0])
+        row = np.floor((np.asarray(y, dtype=float) - self.origin[1]) / self.cell_size[1])
+        valid = np.isfinite(col) & np.isfinite(row)
+        return np.where(valid, self.sector_at(np.where(valid, row, -1).astype(np.int64),
+                                              np.where(valid, col, -1).astype(np.int64)), -1)
+
+    def index_points(self, x, y):
+        """CellIndex of the points (x, y): the points of a sector as one slice."""
+        return CellIndex(self, x, y)
+
+
+def load_grid(path=None):
+    """Grid from `path`, else from the GRID_CONFIG file, else the 3x3 Ortigas grid."""
+    path = path or os.environ.get(GRID_CONFIG_ENV)
+    if path:
+        return Grid.from_file(path)
+    return Grid(3, 3)
+
+
+DEFAULT_GRID = load_grid()
+SECTORS = DEFAULT_GRID.sectors
+ROWS = DEFAULT_GRID.rows.tolist()
+COLS = DEFAULT_GRID.cols.tolist()
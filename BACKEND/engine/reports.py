@@ -0,0 +1,275 @@
+"""
+Citizen-report index: per-sector aggregates that the fusion models read.
+
+The pages keep their reports as a list of dicts ({"id", "sector", "issue",
+"severity", ...}). `ReportIndex` mirrors that list and keeps report counts,
+severity sums and severe-incident counts per sector as arrays, updated one
+report at a time on submit / remove instead of rescanning every report.
+
+What the fusion models read comes from `ReportWindow`: severity decayed
+exponentially with report age over a sliding window, so old reports fade out
+and the state stays bounded however many reports come in. The index only holds
+the reports of that window: a report that falls out of it is dropped too (the
+admin store keeps every report).
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+
+HALF_LIFE_H = 6.0  # a report counts half as much after six hours
+WINDOW_H = 48.0  # and not at all after two days
+
+
+def _seconds(ts):
+    """Report timestamp (datetime or epoch seconds; missing means now) as epoch seconds."""
+    if ts is None:
+        ts = datetime.now()
+    return ts.timestamp() if isinstance(ts, datetime) else float(ts)
+
+
+class ReportWindow:
+    """
+    Per-sector severity with exponential time decay over a sliding window.
+
+    Uses forward decay: a report of severity s at time t adds s * exp(rate * (t - t_ref))
+    to its sector, and reading at time `now` scales everything by exp(-rate * (now - t_ref)).
+    Adding a report is O(1); reports older than the window are expired in bulk from
+    column arrays kept in arrival order, and `on_expire` (if set) is called with
+    their ids.
+    """
+
+    def __init__(self, n_sectors, half_life_h=HALF_LIFE_H, window_h=WINDOW_H, capacity=1024):
+        self.rate = math.log(2) / (half_life_h * 3600.0)
+        self.window_s = window_h * 3600.0
+        self.t_ref = None
+        self.decayed = np.zeros(n_sectors)  # forward-decayed severity sums
+        self.count = np.zeros(n_sectors, dtype=np.int64)  # reports in the window
+        self.severe = np.zeros(n_sectors, dtype=np.int64)  # severe reports in the window
+        self.severe_total = 0  # severe reports in the window, including sectors outside the grid
+        # live events are slots [head, tail); ids map to absolute event numbers (slot + base)
+        self._order = np.empty(capacity)  # non-decreasing arrival time, used for expiry
+        self._ts = np.empty(capacity)
+        self._sector = np.empty(capacity, dtype=np.int64)  # -1: outside the grid or removed
+        self._severity = np.empty(capacity)
+        self._is_severe = np.empty(capacity, dtype=bool)
+        self._ids = np.empty(capacity, dtype=object)
+        self._head = self._tail = self._base = 0
+        self._pos = {}
+        self.on_expire = None
+
+    def __len__(self):
+        return len(self._pos)
+
+    def _columns(self):
+        return (self._order, self._ts, self._sector, self._severity, self._is_severe, self._ids)
+
+    def _make_room(self):
+        live = self._tail - self._head
+        cap = self._order.shape[0]
+        new_cap = cap * 2 if live > cap // 2 else cap
+        cols = []
+        for col in self._columns():
+            new = np.empty(new_cap, dtype=col.dtype)
+            new[:live] = col[self._head:self._tail]
+            cols.append(new)
+        self._order, self._ts, self._sector, self._severity, self._is_severe, self._ids = cols
+        self._base += self._head
+        self._head, self._tail = 0, live
+
+    def _rebase(self, t):
+        # keep the forward-decay weights in floating point range
+        self.decayed *= math.exp(-self.rate * (t - self.t_ref))
+        self.t_ref = t
+
+    def add(self, report_id, sector, severity, severe=False, ts=None):
+        """Count a report (sector is an index, or None outside the grid)."""
+        t = _seconds(ts)
+        if self.t_ref is None:
+            self.t_ref = t
+        elif self.rate * (t - self.t_ref) > 50:
+            self._rebase(t)
+        if self._tail == self._order.shape[0]:
+            self.expire(max(t, self._order[self._tail - 1]))
+            self._make_room()
+        i = self._tail
+        # out-of-order reports expire with the latest report before them
+        self._order[i] = max(t, self._order[i - 1]) if i > self._head else t
+        self._ts[i] = t
+        self._sector[i] = -1 if sector is None else sector
+        self._severity[i] = severity
+        self._is_severe[i] = severe
+        self._ids[i] = report_id
+        self._pos[report_id] = self._base + i
+        self._tail += 1
+        if sector is not None:
+            self.decayed[sector] += severity * math.exp(self.rate * (t - self.t_ref))
+            self.count[sector] += 1
+            self.severe[sector] += severe
+        self.severe_total += severe
+
+    def remove(self, report_id):
+        """Stop counting a report that is still in the window (no-op otherwise)."""
+        pos = self._pos.pop(report_id, None)
+        if pos is None:
+            return
+        i = pos - self._base
+        sector = self._sector[i]
+        if sector >= 0:
+            self.decayed[sector] -= self._severity[i] * math.exp(self.rate * (self._ts[i] - self.t_ref))
+            self.count[sector] -= 1
+            self.severe[sector] -= self._is_severe[i]
+        self.severe_total -= bool(self._is_severe[i])
+        self._sector[i] = -1
+        self._is_severe[i] = False
+
+    def expire(self, now=None):
+        """Drop every report older than the window at `now`, all at once."""
+        cutoff = _seconds(now) - self.window_s
+        h, t = self._head, self._tail
+        k = int(np.searchsorted(self._order[h:t], cutoff, side="left"))
+        if not k:
+            return
+        sector = self._sector[h:h + k]
+        is_severe = self._is_severe[h:h + k]
+        valid = sector >= 0
+        n = self.decayed.shape[0]
+        weight = self._severity[h:h + k] * np.exp(self.rate * (self._ts[h:h + k] - self.t_ref))
+        self.decayed -= np.bincount(sector[valid], weights=weight[valid], minlength=n)
+        self.count -= np.bincount(sector[valid], minlength=n)
+        self.severe -= np.bincount(sector[valid], weights=is_severe[valid], minlength=n).astype(np.int64)
+        self.severe_total -= int(np.count_nonzero(is_severe))
+        expired = []
+        for report_id in self._ids[h:h + k]:
+            # removed reports have already left the id map
+            if self._pos.get(report_id) is not None and self._pos[report_id] < self._base + h + k:
+                del self._pos[report_id]
+                expired.append(report_id)
+        self._ids[h:h + k] = None
+        self._head += k
+        if self._head == self._tail:
+            # empty window: start over exactly (no rounding left in the sums)
+            self.decayed[:] = 0.0
+            self.t_ref = None
+        else:
+            np.maximum(self.decayed, 0.0, out=self.decayed)
+        if expired and self.on_expire is not None:
+            self.on_expire(expired)
+
+    def severity(self, now=None):
+        """Decayed severity sum per sector at `now` (expires old reports first)."""
+        now = _seconds(now)
+        self.expire(now)
+        if self.t_ref is None:
+            return np.zeros_like(self.decayed)
+        return self.decayed * math.exp(-self.rate * (now - self.t_ref))
+
+
+class ReportIndex:
+    """
+    Per-sector report aggregates, plus report lookup by id and by (issue, severity), over
+    the reports in the window; `on_evict` (if set) is called with each report that leaves it.
+    """
+
+    def __init__(self, sectors, severe_issue="Accident", severe_min=3, half_life_h=HALF_LIFE_H, window_h=WINDOW_H):
+        self.sectors = list(sectors)
+        self.sector_idx = {s: i for i, s in enumerate(self.sectors)}
+        n = len(self.sectors)
+        self.severe_issue = severe_issue
+        self.severe_min = severe_min
+        self.count = np.zeros(n, dtype=np.int64)
+        self.severity_sum = np.zeros(n)
+        self.severe_count = np.zeros(n, dtype=np.int64)
+        self.severe_total = 0  # severe reports anywhere, including sectors outside the grid
+        self._reports = {}  # id -> report
+        self._buckets = {}  # (issue, severity) -> {id: report}
+        self.on_evict = None
+        self.window = ReportWindow(n, half_life_h, window_h)
+        self.window.on_expire = self._evict
+
+    @classmethod
+    def from_reports(cls, reports, sectors, **kwargs):
+        index = cls(sectors, **kwargs)
+        for r in reports:
+            index.add(r)
+        return index
+
+    def __len__(self):
+        return len(self._reports)
+
+    def __contains__(self, report_id):
+        return report_id in self._reports
+
+    def __iter__(self):
+        return iter(self._reports.values())
+
+    def is_severe(self, report):
+        """Severe accident reports count as incidents in the traffic fusion."""
+        return report["issue"] == self.severe_issue and report["severity"] >= self.severe_min
+
+    def _count(self, report, sign):
+        i = self.sector_idx.get(report["sector"])
+        severe = self.is_severe(report)
+        if i is not None:
+            self.count[i] += sign
+            self.severity_sum[i] += sign * report["severity"]
+            self.severe_count[i] += sign * severe
+        self.severe_total += sign * severe
+        return i, severe
+
+    def _update(self, report, sign):
+        i, severe = self._count(report, sign)
+        if sign > 0:
+            self.window.add(report["id"], i, report["severity"], severe, report.get("ts"))
+        else:
+            self.window.remove(report["id"])
+
+    def _evict(self, report_ids):
+        # the window has already let these go
+        for report_id in report_ids:
+            report = self._reports.pop(report_id)
+            del self._buckets[(report["issue"], report["severity"])][report_id]
+            self._count(report, -1)
+            if self.on_evict is not None:
+                self.on_evict(report)
+
+    def add(self, report):
+        """Index a new report (a report with an id already indexed replaces the old one)."""
+        self.remove(report["id"])
+        self._reports[report["id"]] = report
+        self._buckets.setdefault((report["issue"], report["severity"]), {})[report["id"]] = report
+        self._update(report, 1)
+
+    def remove(self, report_id):
+        """Drop a report by id; returns the removed report or None if there was none."""
+        report = self._reports.pop(report_id, None)
+        if report is not None:
+            del self._buckets[(report["issue"], report["severity"])][report_id]
+            self._update(report, -1)
+        return report
+
+    def citizen_norm(self, max_severity, now=None):
+        """
+        Time-decayed severity per sector (reports in the window at `now`) divided by
+        the maximum severity a sector is expected to reach.
+        """
+        return self.window.severity(now) / max_severity
+
+    def incidents_norm(self, now=None):
+        """1.0 for sectors with at least one severe report in the window, else 0.0."""
+        self.window.expire(now)
+        return (self.window.severe > 0).astype(float)
+
+    def recent_severe(self, now=None):
+        """Severe reports in the window, in any sector."""
+        self.window.expire(now)
+        return self.window.severe_total
+
+    def select(self, issues, min_severity=1):
+        """Reports of the given issue types with at least min_severity, oldest first (ties by id)."""
+        out = []
+        for (issue, severity), bucket in self._buckets.items():
+            if issue in issues and severity >= min_severity:
+                out.extend(bucket.values())
+        out.sort(key=lambda r: (_seconds(r.get("ts")), r["id"]))
+        return out
@@ -0,0 +1,311 @@
+"""
+Road network over the sector grid and the emergency rerouting engine.
+
+Every sector is a node with roads to its four edge neighbours. Crossing a sector
+takes longer the more congested it is (BPR curve: 1 + 0.15 * (congestion / 100) ** 4,
+in free-flow crossing times) and a road costs the mean crossing time of its two
+ends, so road costs follow `congestion_pct` directly.
+
+Through traffic is a set of origin-destination (OD) pairs with volumes. Normally
+trips take the free-flow shortest path; with rerouting on they take the shortest
+path under the current congestion, and the difference in flow per sector is moved
+onto the sector loads.
+
+Routes come from one shortest-path tree per origin (Dijkstra), cached between
+congestion updates. An update only changes roads whose cost moved by more than a
+tolerance and repairs the trees in place: roads that got dearer re-settle just
+the subtree below them (from its unaffected border), roads that got cheaper
+restart Dijkstra from the sectors they bring closer. Both are exact, so the
+trees always match a fresh Dijkstra on the current road costs. A repair costs
+more per sector than a fresh Dijkstra, so it only pays off for small changes:
+beyond REPAIR_MAX_ROADS of the roads (or REBUILD_SHARE of a tree) the trees are
+built again instead.
+"""
+import heapq
+
+import numpy as np
+
+BPR_ALPHA = 0.15
+BPR_BETA = 4.0
+OD_PAIRS = 2000  # OD pairs sampled for grids with more ordered sector pairs than this
+THROUGH_SHARE = 0.4  # share of a sector's vehicle load that is through traffic
+COST_TOLERANCE = 0.02  # relative change in road cost below which cached routes are kept
+REBUILD_SHARE = 0.25  # rebuild a tree instead of repairing it when this share of it is cut off
+REPAIR_MAX_ROADS = 0.04  # rebuild every tree when more than this share of the roads changed
+
+EPS = 1e-9
+
+
+def crossing_time(congestion_pct):
+    """Time to cross a sector relative to free flow (BPR curve on congestion / 100)."""
+    return 1.0 + BPR_ALPHA * (np.maximum(np.asarray(congestion_pct, dtype=float), 0.0) / 100.0) ** BPR_BETA
+
+
+def sample_od(n_sectors, rng, n_pairs=OD_PAIRS):
+    """
+    (origins, destinations, volumes) of the through traffic: every ordered pair of
+    distinct sectors when there are at most n_pairs of them, else n_pairs random ones.
+    """
+    if n_sectors * (n_sectors - 1) <= n_pairs:
+        origins, dests = np.nonzero(~np.eye(n_sectors, dtype=bool))
+    else:
+        origins = rng.integers(0, n_sectors, size=n_pairs)
+        dests = (origins + rng.integers(1, n_sectors, size=n_pairs)) % n_sectors
+    return origins, dests, rng.lognormal(0.0, 0.5, size=origins.shape[0])
+
+
+class RoadNetwork:
+    """Directed roads between neighbouring sectors; `neighbors` is a (sectors, k) table, -1 for none."""
+
+    def __init__(self, neighbors):
+        neighbors = np.asarray(neighbors)
+        self.n = neighbors.shape[0]
+        src = np.repeat(np.arange(self.n), neighbors.shape[1])
+        dst = neighbors.ravel()
+        keep = dst >= 0
+        self.src, self.dst = src[keep], dst[keep]
+        # adjacency lists of (neighbour, road) for the Dijkstra loops, outgoing and incoming
+        self.adj = [[] for _ in range(self.n)]
+        self.radj = [[] for _ in range(self.n)]
+        for e, (u, v) in enumerate(zip(self.src.tolist(), self.dst.tolist())):
+            self.adj[u].append((v, e))
+            self.radj[v].append((u, e))
+
+    def costs(self, congestion_pct):
+        """Road costs for per-sector congestion (%)."""
+        t = crossing_time(congestion_pct)
+        return (t[self.src] + t[self.dst]) / 2
+
+    def tree(self, origin, costs):
+        """Shortest-path tree from origin: (distance, parent sector, parent road) per sector."""
+        n = self.n
+        dist = [np.inf] * n
+        parent = [-1] * n
+        via = [-1] * n
+        dist[origin] = 0.0
+        heap = [(0.0, origin)]
+        adj = self.adj
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            d, u = pop(heap)
+            if d > dist[u]:
+                continue
+            for v, e in adj[u]:
+                nd = d + costs[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    via[v] = e
+                    push(heap, (nd, v))
+        return dist, parent, via
+
+    def settle(self, dist, parent, via, heap, costs, within=None):
+        """
+        Dijkstra from the labels in `heap` (a heap of (distance, sector)), updating the
+        tree lists in place; with `within` (a set), only those sectors are relabelled.
+        """
+        adj = self.adj
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, e in adj[u]:
+                nd = d + costs[e]
+                if nd < dist[v] and (within is None or v in within):
+                    dist[v] = nd
+                    parent[v] = u
+                    via[v] = e
+                    heapq.heappush(heap, (nd, v))
+
+    def resettle(self, dist, parent, via, sectors, costs):
+        """Relabel `sectors` (a subtree cut off by dearer roads) from the rest of the tree."""
+        within = set(sectors)
+        for v in sectors:
+            dist[v], parent[v], via[v] = np.inf, -1, -1
+        heap = []
+        for v in sectors:
+            for u, e in self.radj[v]:
+                if u not in within and dist[u] + costs[e] < dist[v]:
+                    dist[v], parent[v], via[v] = dist[u] + costs[e], u, e
+            if dist[v] < np.inf:
+                heap.append((dist[v], v))
+        heapq.heapify(heap)
+        self.settle(dist, parent, via, heap, costs, within)
+
+
+class Rerouter:
+    """
+    Shortest-path trees of the OD origins, kept current as congestion changes, and the
+    sector flows of the OD pairs routed on them.
+    """
+
+    def __init__(self, network, origins, dests, volumes, tolerance=COST_TOLERANCE):
+        self.network = network
+        self.origins = np.asarray(origins, dtype=np.int64)
+        self.dests = np.asarray(dests, dtype=np.int64)
+        self.volumes = np.asarray(volumes, dtype=float)
+        self.tolerance = tolerance
+        self.sources = np.unique(self.origins)
+        self._row = np.full(network.n, -1, dtype=np.int64)
+        self._row[self.sources] = np.arange(self.sources.shape[0])
+        k, n = self.sources.shape[0], network.n
+        self.dist = np.empty((k, n))
+        self.parent = np.empty((k, n), dtype=np.int64)
+        self.via = np.empty((k, n), dtype=np.int64)
+        self.costs = np.ones(network.src.shape[0])  # free flow
+        self._build(np.arange(k))
+        self.recomputed = k
+        # free-flow routes and flows, what rerouting is measured against
+        self.base_via = self.via.copy()
+        self.base_flow = self.flows()
+
+    def _build(self, rows):
+        costs = self.costs.tolist()
+        for r in rows.tolist():
+            self.dist[r], self.parent[r], self.via[r] = self.network.tree(int(self.sources[r]), costs)
+
+    def _tree_lists(self, r):
+        return self.dist[r].tolist(), self.parent[r].tolist(), self.via[r].tolist()
+
+    def _store(self, r, dist, parent, via, sectors=None):
+        if sectors is None:
+            self.dist[r], self.parent[r], self.via[r] = dist, parent, via
+        else:
+            # only these sectors were relabelled
+            idx = sectors.tolist()
+            self.dist[r, sectors] = [dist[v] for v in idx]
+            self.parent[r, sectors] = [parent[v] for v in idx]
+            self.via[r, sectors] = [via[v] for v in idx]
+
+    def _raise(self, roads, rebuild):
+        """
+        Repair the trees after `roads` got dearer; trees cut too deep are marked in
+        `rebuild` instead. Returns the trees touched.
+        """
+        dearer = np.zeros(self.costs.shape[0] + 1, dtype=bool)
+        dearer[roads] = True
+        hit = dearer[self.via]  # sectors reached over a dearer road (via -1 reads the trailing False)
+        rows = np.flatnonzero(hit.any(axis=1))
+        if not rows.size:
+            return rows
+        # ... and everything below them, by pointer jumping: after pass i a sector knows
+        # about the marks of its 2 ** i nearest ancestors (roots point to themselves)
+        n = self.network.n
+        parent = self.parent[rows]
+        anc = (np.where(parent >= 0, parent, np.arange(n)) + n * np.arange(rows.shape[0])[:, None]).ravel()
+        cut = hit[rows].ravel()
+        for _ in range(n.bit_length()):
+            cut = cut | cut[anc]
+            anc = anc[anc]
+        cut = cut.reshape(rows.shape[0], n)
+        deep = cut.sum(axis=1) > REBUILD_SHARE * n
+        rebuild[rows[deep]] = True
+        costs = self.costs.tolist()
+        for r, mask in zip(rows[~deep].tolist(), cut[~deep]):
+            sectors = np.flatnonzero(mask)
+            dist, parent, via = self._tree_lists(r)
+            self.network.resettle(dist, parent, via, sectors.tolist(), costs)
+            self._store(r, dist, parent, via, sectors)
+        return rows
+
+    def _lower(self, roads, rebuild):
+        """Repair the trees after `roads` got cheaper (skipping those in `rebuild`); returns the trees touched."""
+        src, dst = self.network.src[roads], self.network.dst[roads]
+        shorter = self.dist[:, src] + self.costs[roads] < self.dist[:, dst] - EPS
+        rows = np.flatnonzero(shorter.any(axis=1) & ~rebuild)
+        costs = self.costs.tolist()
+        for r in rows.tolist():
+            dist, parent, via = self._tree_lists(r)
+            heap = []
+            for e in roads[shorter[r]].tolist():
+                u, v = int(self.network.src[e]), int(self.network.dst[e])
+                if dist[u] + costs[e] < dist[v]:
+                    dist[v], parent[v], via[v] = dist[u] + costs[e], u, e
+                    heap.append((dist[v], v))
+            heapq.heapify(heap)
+            self.network.settle(dist, parent, via, heap, costs)
+            self._store(r, dist, parent, via)
+        return rows
+
+    def update(self, congestion_pct):
+        """
+        Move to the road costs of `congestion_pct` (roads that changed by more than the
+        tolerance) and bring the trees up to date. Dearer roads are handled first, then
+        cheaper ones, so each repair starts from trees that are exact for the costs so far.
+        Returns the number of trees that were repaired or rebuilt.
+        """
+        new = self.network.costs(congestion_pct)
+        changed = np.abs(new - self.costs) > self.tolerance * self.costs
+        up = np.flatnonzero(changed & (new > self.costs))
+        down = np.flatnonzero(changed & (new < self.costs))
+        if up.size + down.size > REPAIR_MAX_ROADS * changed.shape[0]:
+            # repairs would touch most trees anyway, and cost more per sector than a rebuild
+            self.costs[changed] = new[changed]
+            self._build(np.arange(self.sources.shape[0]))
+            self.recomputed = self.sources.shape[0]
+            return self.recomputed
+        touched = np.zeros(self.sources.shape[0], dtype=bool)
+        rebuild = np.zeros(self.sources.shape[0], dtype=bool)
+        if up.size:
+            self.costs[up] = new[up]
+            touched[self._raise(up, rebuild)] = True
+        if down.size:
+            self.costs[down] = new[down]
+            touched[self._lower(down, rebuild)] = True
+        self._build(np.flatnonzero(rebuild))
+        self.recomputed = int(touched.sum())
+        return self.recomputed
+
+    def flows(self):
+        """
+        Through-traffic volume crossing each sector (origin and destination included).
+        All OD paths are walked back from their destinations together, one hop per pass.
+        """
+        rows = self._row[self.origins]
+        flow = np.zeros(self.network.n)
+        cur = self.dests.copy()
+        active = np.flatnonzero(np.isfinite(self.dist[rows, cur]))
+        while active.size:
+            flow += np.bincount(cur[active], weights=self.volumes[active], minlength=self.network.n)
+            active = active[cur[active] != self.origins[active]]
+            cur[active] = self.parent[rows[active], cur[active]]
+        return flow
+
+    def rerouted(self):
+        """
+        Boolean per OD pair: its current route beats its free-flow route under the current
+        road costs by more than the tolerance (ties between equally short routes do not count).
+        """
+        rows = self._row[self.origins]
+        best = self.dist[rows, self.dests]
+        base = np.zeros(self.origins.shape[0])
+        cur = self.dests.copy()
+        active = np.flatnonzero(np.isfinite(best))
+        while active.size:
+            road = self.base_via[rows[active], cur[active]]
+            more = road >= 0  # -1 once the walk is back at the origin
+            active, road = active[more], road[more]
+            base[active] += self.costs[road]
+            cur[active] = self.network.src[road]
+        return base > best * (1 + self.tolerance)
+
+    def path(self, origin, dest):
+        """Sectors on the current route from origin to dest (empty when unreachable)."""
+        r = self._row[origin]
+        parent = self.parent[r] if r >= 0 else self.network.tree(origin, self.costs.tolist())[1]
+        path = [dest]
+        while path[-1] != origin:
+            if parent[path[-1]] < 0:
+                return []
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    def reroute(self, vehicle_load, congestion_pct):
+        """
+        Vehicle load per sector after moving the through traffic onto the shortest paths
+        under `congestion_pct`. Through traffic is THROUGH_SHARE of the mean load.
+        """
+        self.update(congestion_pct)
+        vehicle_load = np.asarray(vehicle_load)
+        scale = THROUGH_SHARE * vehicle_load.mean() / max(self.base_flow.mean(), EPS)
+        return np.maximum(vehicle_load + scale * (self.flows() - self.base_flow), 0.0).astype(vehicle_load.dtype)
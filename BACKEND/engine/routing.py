@@ -0,0 +1,268 @@
+"""
+Truck dispatch: collection tours for several trucks with load limits and bin time windows.
+
+Stops are bins at (x, y) positions in grid units. Trucks drive the street grid
+(Manhattan distance) from a depot and back, must be home by the end of the shift,
+may not carry more than their capacity and must start emptying each bin inside its
+[ready, due] window.
+
+Tours are built with a time-oriented nearest-neighbour heuristic (every truck keeps
+taking the cheapest feasible next bin, where bins close to their due time are
+cheaper) and improved by local search: 2-opt within each tour, relocating bins
+between tours and inserting bins that were left out wherever they still fit.
+"""
+import numpy as np
+
+CELL_KM = 0.4  # one sector of the Ortigas grid is roughly 400 m across
+TRUCK_SPEED_KMH = 18.0
+SERVICE_H = 2 / 60  # emptying a bin takes about two minutes
+TRUCK_CAPACITY_BINS = 30.0  # truck load in full bins (a bin at 100% fill counts as 1.0)
+SHIFT_H = 1.0  # trucks are dispatched for one simulation timestep
+URGENCY_WEIGHT = 0.2  # hours of driving worth spending to serve a bin an hour closer to its due time
+
+EPS = 1e-9
+
+
+def manhattan(x0, y0, x1, y1):
+    """Street-grid distance in grid units."""
+    return np.abs(x1 - x0) + np.abs(y1 - y0)
+
+
+class _Tours:
+    """Working state of the planner: stop arrays with the depot appended as the last node."""
+
+    def __init__(self, x, y, demand, ready, due, capacity, depot, shift_h, hours_per_unit, service_h):
+        n = x.shape[0]
+        self.n = n
+        self.px = np.append(np.asarray(x, dtype=float), depot[0])
+        self.py = np.append(np.asarray(y, dtype=float), depot[1])
+        self.demand = np.asarray(demand, dtype=float)
+        self.ready = np.zeros(n) if ready is None else np.broadcast_to(np.asarray(ready, dtype=float), (n,))
+        self.waits = ready is not None
+        self.due = np.broadcast_to(np.asarray(due, dtype=float), (n,))
+        self.capacity = capacity
+        self.shift_h = shift_h
+        self.h = hours_per_unit
+        self.service_h = service_h
+        self.routes = [np.empty(0, dtype=np.int64) for _ in range(capacity.shape[0])]
+        self.load = np.zeros(capacity.shape[0])
+
+    def seq(self, route):
+        return np.concatenate(([self.n], route, [self.n]))
+
+    def legs(self, route):
+        s = self.seq(route)
+        return manhattan(self.px[s[:-1]], self.py[s[:-1]], self.px[s[1:]], self.py[s[1:]])
+
+    def times(self, route):
+        """Service start at every stop plus the arrival back at the depot, shape (m + 1,)."""
+        m = route.shape[0]
+        arrive = np.cumsum(self.legs(route) * self.h) + np.arange(m + 1) * self.service_h
+        if self.waits and m:
+            # waiting for a window to open delays everything after it
+            early = np.maximum(np.append(self.ready[route], 0.0) - arrive, 0.0)
+            arrive = arrive + np.maximum.accumulate(early)
+        return arrive
+
+    def slack(self, route, start):
+        """How much later each position (stops, then the depot) could start and still be on time."""
+        late = np.append(self.due[route], self.shift_h) - start
+        return np.minimum.accumulate(late[::-1])[::-1]
+
+    def feasible(self, route, start=None):
+        start = self.times(route) if start is None else start
+        return bool((start[:-1] <= self.due[route] + EPS).all() and start[-1] <= self.shift_h + EPS)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    def construct(self, urgency_weight):
+        """Time-oriented nearest neighbour, one truck after the other."""
+        back_h = manhattan(self.px[:-1], self.py[:-1], self.px[-1], self.py[-1]) * self.h
+        # latest service start that still makes the window and gets the truck home in time
+        latest = np.minimum(self.due, self.shift_h - self.service_h - back_h)
+        # stops that no truck could ever serve are dropped up front
+        keep = np.flatnonzero((self.demand <= self.capacity.max() + EPS)
+                              & (np.maximum(back_h, self.ready) <= latest + EPS))
+        # open stops are packed at the front of these arrays; taking one swaps the last open stop in
+        idx, x, y, dem, due, ready, latest = (a[keep] for a in (np.arange(self.n), self.px[:-1], self.py[:-1],
+                                                                  self.demand, self.due, self.ready, latest))
+        size = keep.shape[0]
+        horizon = 2 * self.shift_h
+        for k in range(self.capacity.shape[0]):
+            pos, t, load, route = self.n, 0.0, 0.0, []
+            while size:
+                start = t + manhattan(self.px[pos], self.py[pos], x[:size], y[:size]) * self.h
+                if self.waits:
+                    start = np.maximum(start, ready[:size])
+                ok = (start <= latest[:size] + EPS) & (dem[:size] <= self.capacity[k] - load + EPS)
+                if not ok.any():
+                    break
+                cost = (start - t) + urgency_weight * np.minimum(due[:size] - start, horizon)
+                cost[~ok] = np.inf
+                j = int(np.argmin(cost))
+                pos = int(idx[j])
+                route.append(pos)
+                t = start[j] + self.service_h
+                load += dem[j]
+                size -= 1
+                for a in (idx, x, y, dem, due, ready, latest):
+                    a[j] = a[size]
+            self.routes[k] = np.asarray(route, dtype=np.int64)
+            self.load[k] = load
+            if not size:
+                break
+
+    # ------------------------------------------------------------------
+    # Local search
+    # ------------------------------------------------------------------
+    def two_opt(self, k, max_moves=500):
+        """Reverse tour segments while that shortens tour k and keeps it on time."""
+        route = self.routes[k]
+        for _ in range(max_moves):
+            m = route.shape[0]
+            if m < 3:
+                break
+            s = self.seq(route)
+            sx, sy = self.px[s], self.py[s]
+            d = np.abs(sx[:, None] - sx[None, :]) + np.abs(sy[:, None] - sy[None, :])
+            edge = d[np.arange(m + 1), np.arange(1, m + 2)]
+            # delta[i, j]: reverse s[i + 1 .. j], replacing edges (i, i+1) and (j, j+1)
+            delta = d[:-1, :-1] + d[1:, 1:] - edge[:, None] - edge[None, :]
+            delta[np.tril_indices(m + 1, 1)] = 0.0
+            cand = np.flatnonzero(delta < -EPS)
+            if not cand.shape[0]:
+                break
+            moved = False
+            for c in cand[np.argsort(delta.ravel()[cand], kind="stable")][:20]:
+                i, j = divmod(int(c), m + 1)
+                trial = route.copy()
+                trial[i:j] = route[i:j][::-1]  # s[i + 1 .. j] is route[i .. j - 1]
+                if self.feasible(trial):
+                    route, moved = trial, True
+                    break
+            if not moved:
+                break
+        self.routes[k] = route
+
+    def _route_edges(self, k):
+        route = self.routes[k]
+        start = self.times(route)
+        s = self.seq(route)
+        depart = np.concatenate(([0.0], start[:-1] + self.service_h))
+        d_uv = manhattan(self.px[s[:-1]], self.py[s[:-1]], self.px[s[1:]], self.py[s[1:]])
+        return {"route": np.full(route.shape[0] + 1, k), "pos": np.arange(route.shape[0] + 1),
+                "ux": self.px[s[:-1]], "uy": self.py[s[:-1]], "vx": self.px[s[1:]], "vy": self.py[s[1:]],
+                "d_uv": d_uv, "depart": depart, "arrive_v": depart + d_uv * self.h,
+                "slack": self.slack(route, start)}
+
+    def _edges(self, changed=None):
+        """
+        Every tour edge (u -> v) with what an insertion on it has to respect. Per-tour
+        parts are cached; `changed` lists the tours to recompute (None: all of them).
+        """
+        if changed is None:
+            self._parts = [self._route_edges(k) for k in range(len(self.routes))]
+        else:
+            for k in changed:
+                self._parts[k] = self._route_edges(k)
+        return {name: np.concatenate([part[name] for part in self._parts]) for name in self._parts[0]}
+
+    def _best_insertion(self, e, stop, exclude=-1):
+        """(added distance, edge index) of the cheapest feasible insertion of stop, or None."""
+        sx, sy = self.px[stop], self.py[stop]
+        d_us = manhattan(e["ux"], e["uy"], sx, sy)
+        d_sv = manhattan(sx, sy, e["vx"], e["vy"])
+        start = e["depart"] + d_us * self.h
+        if self.waits:
+            start = np.maximum(start, self.ready[stop])
+        push = start + self.service_h + d_sv * self.h - e["arrive_v"]
+        ok = ((start <= self.due[stop] + EPS) & (push <= e["slack"] + EPS)
+              & (self.load[e["route"]] + self.demand[stop] <= self.capacity[e["route"]] + EPS)
+              & (e["route"] != exclude))
+        if not ok.any():
+            return None
+        added = d_us + d_sv - e["d_uv"]
+        added[~ok] = np.inf
+        j = int(np.argmin(added))
+        return added[j], j
+
+    def _insert(self, e, j, stop):
+        k, pos = int(e["route"][j]), int(e["pos"][j])
+        self.routes[k] = np.insert(self.routes[k], pos, stop)
+        self.load[k] += self.demand[stop]
+        return k
+
+    def relocate(self):
+        """Move single stops to another tour where that shortens the total driving distance."""
+        e = self._edges()
+        moved = 0
+        for k in range(len(self.routes)):
+            p = 0
+            while p < self.routes[k].shape[0]:
+                route = self.routes[k]
+                stop = route[p]
+                s = self.seq(route)
+                a, b, c = s[p], s[p + 1], s[p + 2]
+                saving = (manhattan(self.px[a], self.py[a], self.px[b], self.py[b])
+                          + manhattan(self.px[b], self.py[b], self.px[c], self.py[c])
+                          - manhattan(self.px[a], self.py[a], self.px[c], self.py[c]))
+                best = self._best_insertion(e, stop, exclude=k) if saving > EPS else None
+                if best is not None and best[0] < saving - EPS:
+                    # dropping a stop only makes the rest of its tour earlier, so it stays on time
+                    self.routes[k] = np.delete(route, p)
+                    self.load[k] -= self.demand[stop]
+                    e = self._edges((k, self._insert(e, best[1], stop)))
+                    moved += 1
+                else:
+                    p += 1
+        return moved
+
+    def insert_unserved(self, urgency_weight):
+        """Cheapest feasible insertion of the stops left out, most urgent first."""
+        served = np.zeros(self.n, dtype=bool)
+        for route in self.routes:
+            served[route] = True
+        left = np.flatnonzero(~served)
+        if not left.shape[0]:
+            return
+        e = self._edges()
+        for stop in left[np.argsort(self.due[left], kind="stable")]:
+            best = self._best_insertion(e, stop)
+            if best is not None:
+                e = self._edges((self._insert(e, best[1], stop),))
+
+
+def plan_routes(x, y, demand, n_trucks, capacity=TRUCK_CAPACITY_BINS, depot=(0.0, 0.0), ready=None, due=np.inf,
+                shift_h=SHIFT_H, cell_km=CELL_KM, speed_kmh=TRUCK_SPEED_KMH, service_h=SERVICE_H,
+                urgency_weight=URGENCY_WEIGHT, local_search=True):
+    """
+    Plan collection tours for n_trucks trucks over the stops at (x, y) in grid units.
+
+    demand is the load each stop adds to a truck (full bins); capacity is per truck
+    (scalar or (n_trucks,)). ready / due are the time windows in hours from dispatch.
+    Returns {"routes": list of stop index arrays in visiting order, one per truck,
+    "served", "unserved", and per truck "load", "distance_km", "duration_h"}.
+    """
+    x = np.asarray(x, dtype=float)
+    n_trucks = max(0, int(n_trucks))
+    capacity = np.broadcast_to(np.asarray(capacity, dtype=float), (n_trucks,))
+    tours = _Tours(x, np.asarray(y, dtype=float), demand, ready, due, capacity, depot, shift_h,
+                   cell_km / speed_kmh, service_h)
+    if n_trucks and x.shape[0]:
+        tours.construct(urgency_weight)
+        if local_search:
+            for k in range(n_trucks):
+                tours.two_opt(k)
+            if tours.relocate():
+                for k in range(n_trucks):
+                    tours.two_opt(k)
+            tours.insert_unserved(urgency_weight)
+
+    routes = tours.routes
+    served = np.concatenate(routes) if routes else np.empty(0, dtype=np.int64)
+    unserved = np.setdiff1d(np.arange(x.shape[0]), served)
+    distance = np.array([tours.legs(r).sum() if r.shape[0] else 0.0 for r in routes]) * cell_km
+    duration = np.array([tours.times(r)[-1] if r.shape[0] else 0.0 for r in routes])
+    return {"routes": routes, "served": served, "unserved": unserved, "load": tours.load.copy(),
+            "distance_km": distance.reshape(n_trucks), "duration_h": duration.reshape(n_trucks)}
@@ -0,0 +1,160 @@
+"""
+Background simulation clock: one thread advances every domain of a CitySimulation
+at a fixed cadence, whatever the pages do.
+
+Streamlit reruns the whole page script on every widget interaction, so stepping the
+simulation from the page made the simulated clock run as fast as operators click.
+The scheduler owns the simulation instead. The pages hand it their controls and
+citizen inputs (picked up on the next tick) and read `latest`, the snapshot of the
+last tick, so a rerun only renders. Snapshots are frozen (see snapshot.freeze): every
+session reads the same arrays, none gets a copy.
+
+There is one simulation for every session, so controls are city-wide: the last
+session to change a control sets it for everyone, and a session that merely reruns
+changes nothing (see set_controls). Citizen inputs come from the shared report
+indexes, so they are the same whichever session hands them over; they are kept per
+domain and a domain without any is stepped with none. One-shot controls (an early
+collection) apply to the next tick only.
+
+Subscribers run after every tick, still holding the lock (e.g. to record history);
+they are registered by name, so a page that subscribes on every rerun replaces its
+callback instead of piling up copies.
+"""
+import threading
+import time
+from datetime import datetime
+
+from .simulation import DEFAULT_CONTROLS, CitySimulation
+from .snapshot import freeze
+
+TICK_SECONDS = 10.0  # simulated timestep cadence
+DOMAINS = ("traffic", "waste", "energy", "environment")
+ONE_SHOT_CONTROLS = ("early_collection",)  # actions: cleared once a tick has applied them
+NO_CITIZEN_INPUTS = (0.0, 0.0, 0)  # citizen_norm, incidents_norm, report_incidents
+
+
+class TickScheduler:
+    """
+    Advances `city` (a CitySimulation) one timestep of every domain each `interval`
+    seconds on a daemon thread. `lock` guards the simulation state: hold it to change
+    the city outside set_controls / set_citizen_inputs (e.g. to attach bins).
+    """
+
+    def __init__(self, city, interval=TICK_SECONDS):
+        self.city = city
+        self.interval = float(interval)
+        self.lock = threading.RLock()
+        self.latest = None  # read-only {"ts", "tick", domain: step} of the last tick
+        self.last_error = None
+        self._controls = {domain: {} for domain in DOMAINS}
+        self._citizen = {}
+        self._subscribers = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_controls(self, domain, previous=None, **controls):
+        """
+        Change controls (see simulation.DEFAULT_CONTROLS) of the domain from its next tick
+        on; the others stay as they are. With `previous`, the controls the caller set last
+        time, only the ones that differ from it are changed, so a session rerunning with
+        the values it already had does not undo another session's change. Returns the
+        controls in effect (defaults included).
+        """
+        if domain not in self._controls:
+            raise ValueError(f"Unknown domain: {domain}")
+        if previous is not None:
+            controls = {name: value for name, value in controls.items()
+                        if name not in previous or previous[name] != value}
+        with self.lock:
+            self._controls[domain].update(controls)
+            return dict(DEFAULT_CONTROLS, **self._controls[domain])
+
+    def controls(self, domain):
+        """The domain's controls in effect (defaults included)."""
+        with self.lock:
+            return dict(DEFAULT_CONTROLS, **self._controls[domain])
+
+    def set_citizen_inputs(self, domain, citizen_norm, incidents_norm=None, report_incidents=None):
+        """Citizen inputs (see CitySimulation.set_citizen_inputs) the domain is stepped with."""
+        with self.lock:
+            self._citizen[domain] = (citizen_norm, incidents_norm, report_incidents)
+
+    def subscribe(self, name, callback):
+        """Call callback(ts, snapshot) after every tick; a later subscribe under `name` replaces it."""
+        with self.lock:
+            self._subscribers[name] = callback
+
+    def tick(self, ts=None):
+        """Advance every domain one timestep (at `ts`, epoch seconds, default now) and publish the snapshot."""
+        with self.lock:
+            # stamped under the lock, so ticks (and what subscribers record) stay in time order
+            ts = time.time() if ts is None else float(ts)
+            hour = datetime.fromtimestamp(ts).hour
+            city = self.city
+            steps = {}
+            for domain in DOMAINS:
+                # the city holds one set of citizen inputs: swap in the domain's own
+                city.set_citizen_inputs(*self._citizen.get(domain, NO_CITIZEN_INPUTS))
+                controls = self._controls[domain]
+                if domain == "traffic":
+                    steps[domain] = city.step_traffic(**controls)
+                elif domain == "waste":
+                    steps[domain] = city.step_waste(hour, **controls)
+                elif domain == "energy":
+                    steps[domain] = city.step_energy(hour, **controls)
+                else:
+                    steps[domain] = city.step_environment(**controls)
+                for name in ONE_SHOT_CONTROLS:
+                    controls.pop(name, None)
+            tick = 0 if self.latest is None else self.latest["tick"] + 1
+            snapshot = freeze(dict(steps, ts=ts, tick=tick))
+            # one reference swap: readers see either the old snapshot or the new one, never a mix
+            self.latest = snapshot
+            for callback in list(self._subscribers.values()):
+                callback(ts, snapshot)
+        return snapshot
+
+    def _run(self):
+        # fixed cadence: a slow tick shortens the next wait rather than shifting the clock
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            next_tick += self.interval
+            try:
+                self.tick()
+            except Exception as exc:  # keep the clock running; the pages show the error
+                self.last_error = exc
+
+    def start(self):
+        """Run the first tick now (so `latest` is set) and the rest on the background thread."""
+        with self.lock:
+            if self._thread is not None:
+                return self
+            self.tick()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="simulation-clock", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread (after the tick in progress)."""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler():
+    """The process-wide scheduler over a default CitySimulation, started on first use."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = TickScheduler(CitySimulation()).start()
+        return _default_scheduler
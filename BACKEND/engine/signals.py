@@ -0,0 +1,234 @@
+"""
+Signal timing: green splits of many intersections searched in one batch.
+
+Every intersection runs a fixed-time plan over PHASES: a cycle length and the share
+of the effective green (cycle minus the lost time of every phase) each phase gets.
+Demand arrives per phase (veh/h) and a phase discharges at its saturation flow while
+green, so the delay of a plan is Webster's uniform delay plus the HCM incremental
+(overflow) term, averaged over the arriving vehicles.
+
+`optimize` scores every candidate plan (CYCLES x a simplex grid of splits in
+1 / SPLIT_GRID steps) for every intersection at once as an (intersections,
+candidates) array, keeps the best and refines its split by moving green between
+pairs of phases in shrinking REFINE_STEPS, again for all intersections at once. A plan may
+move each phase's green share of the cycle, and the cycle itself, by at most
+max_change from the intersection's current plan; the current plan is always a
+candidate, so no intersection gets worse.
+
+`sector_load_factor` turns the delay saved into the load the fusion model sees:
+by Little's law the vehicles queued at a signal scale with their delay, and
+QUEUED_SHARE of a sector's load is queued at signals under the current plans.
+"""
+from itertools import combinations
+
+import numpy as np
+
+PHASES = ("NS", "NS left", "EW", "EW left")
+PHASE_SHARE_ALPHA = (4.0, 1.0, 4.0, 1.0)  # Dirichlet concentration of each intersection's demand split
+THROUGH_LANES = (1, 4)  # through lanes per approach (low, high exclusive); turn phases get one
+SAT_FLOW_PER_LANE = 1800  # veh/h of green per lane
+LOST_TIME_S = 4  # start-up + clearance lost per phase and cycle
+MIN_GREEN_S = 7  # shortest effective green of a phase
+CYCLES = (60, 90, 120, 150)  # s, candidate cycle lengths
+DEFAULT_CYCLE = 90  # s, cycle of the current fixed-time plans
+SPLIT_GRID = 12  # coarse search over splits in twelfths of the effective green
+REFINE_STEPS = (0.04, 0.02, 0.01)  # green moved between two phases per refinement pass
+REFINE_PASSES = 3  # passes per step size (stops early once nothing improves)
+ANALYSIS_PERIOD_H = 0.25  # T of the incremental delay term
+DEMAND_PER_LOAD = 2.0  # veh/h arriving at an intersection per unit of its sector's vehicle load
+QUEUED_SHARE = 0.3  # share of a sector's load queued at signals under the current plans
+INTERSECTIONS_PER_SECTOR = 4
+BLOCK_SIZE = 1 << 20  # (intersection, candidate, phase) values scored per block
+
+INTERSECTION_DTYPE = np.dtype([
+    ("sector", np.int32),
+    ("share", np.float64, (len(PHASES),)),  # demand split over the phases (sums to 1)
+    ("saturation", np.float64, (len(PHASES),)),  # veh/h of green per phase
+    ("cycle", np.float64),  # current plan: cycle length (s)
+    ("split", np.float64, (len(PHASES),)),  # current plan: share of the effective green per phase
+], align=True)
+
+
+def make_intersections(n_sectors, per_sector, rng):
+    """per_sector intersections in each sector, all on the untuned plan (DEFAULT_CYCLE, equal splits)."""
+    n = n_sectors * per_sector
+    inter = np.empty(n, dtype=INTERSECTION_DTYPE)
+    inter["sector"] = np.repeat(np.arange(n_sectors), per_sector)
+    inter["share"] = rng.dirichlet(PHASE_SHARE_ALPHA, size=n)
+    lanes = np.ones((n, len(PHASES)))
+    lanes[:, 0::2] = rng.integers(*THROUGH_LANES, size=(n, len(PHASES) // 2))
+    inter["saturation"] = lanes * SAT_FLOW_PER_LANE
+    inter["cycle"] = DEFAULT_CYCLE
+    inter["split"] = 1.0 / len(PHASES)
+    return inter
+
+
+def phase_demand(intersections, vehicle_load):
+    """Arrivals per phase (veh/h), shape (intersections, timesteps, phases), for (sectors, timesteps) loads."""
+    load = vehicle_load[intersections["sector"]] * DEMAND_PER_LOAD
+    return load[:, :, None] * intersections["share"][:, None, :]
+
+
+def split_grid(n_phases, steps=SPLIT_GRID):
+    """Every split into n_phases positive multiples of 1 / steps, shape (candidates, n_phases)."""
+    cuts = np.array(list(combinations(range(1, steps), n_phases - 1))).reshape(-1, n_phases - 1)
+    bounds = np.hstack([np.zeros((cuts.shape[0], 1)), cuts, np.full((cuts.shape[0], 1), steps)])
+    return np.diff(bounds, axis=1) / steps
+
+
+def green_ratio(cycle, split):
+    """Effective green / cycle per phase; cycle (...), split (..., phases)."""
+    cycle = np.asarray(cycle, dtype=float)
+    return split * ((cycle - LOST_TIME_S * split.shape[-1]) / cycle)[..., None]
+
+
+def phase_delay(demand, saturation, cycle, u):
+    """
+    Vehicle delay (veh * s/h) of each phase with green ratio u: arrivals times Webster's
+    uniform delay plus the incremental delay. Arguments broadcast elementwise.
+    """
+    capacity = saturation * u
+    x = demand / capacity
+    uniform = 0.5 * cycle * (1 - u) ** 2 / (1 - np.minimum(x, 1) * u)
+    t = ANALYSIS_PERIOD_H
+    incremental = 900 * t * ((x - 1) + np.sqrt((x - 1) ** 2 + 4 * x / (capacity * t)))
+    return demand * (uniform + incremental)
+
+
+def _per_vehicle(vehicle_delay, total):
+    return np.divide(vehicle_delay, total, out=np.zeros_like(vehicle_delay), where=total > 0)
+
+
+def delay(demand, saturation, cycle, split):
+    """
+    Average delay per vehicle (s) of plans (cycle, split) for arrivals `demand` at
+    `saturation` (veh/h per phase). Arguments broadcast; the last axis is the phases.
+    """
+    cycle = np.asarray(cycle, dtype=float)
+    vehicle_delay = phase_delay(demand, saturation, cycle[..., None], green_ratio(cycle, split)).sum(axis=-1)
+    return _per_vehicle(vehicle_delay, demand.sum(axis=-1))
+
+
+def _allowed(cycle, split, cycle0, u0, max_change):
+    """Plans that keep every phase's minimum green and stay within max_change of the current plan."""
+    cycle = np.asarray(cycle, dtype=float)
+    green = split * (cycle - LOST_TIME_S * split.shape[-1])[..., None]
+    ok = (green >= MIN_GREEN_S - 1e-9).all(axis=-1)
+    ok = ok & (np.abs(green_ratio(cycle, split) - u0).max(axis=-1) <= max_change + 1e-9)
+    return ok & (np.abs(cycle - cycle0) <= max_change * cycle0 + 1e-9)
+
+
+def _coarse(demand, saturation, cycle0, u0, max_change, cycles, steps):
+    """
+    Best grid plan per intersection: (cycle, split, delay); delay inf where no candidate
+    is allowed. A plan's delay is a sum over its phases, and on the grid a phase only
+    ever gets one of steps - 1 green levels per cycle, so the phase terms (and whether
+    each stays within max_change) are tabulated per (cycle, level, phase) once and every
+    candidate is scored by gathering its phases' entries from the table.
+    """
+    m, n_phases = demand.shape
+    splits = split_grid(n_phases, steps)
+    level = np.rint(splits * steps).astype(np.intp) - 1  # (splits, phases) index into the levels
+    flat = level * n_phases + np.arange(n_phases)
+    shares = np.arange(1, steps) / steps
+    best_cycle = np.empty(m)
+    best_split = np.empty((m, n_phases))
+    best_delay = np.empty(m)
+    total = demand.sum(axis=1)
+    block = max(1, BLOCK_SIZE // (len(cycles) * splits.shape[0] * n_phases))
+    for i in range(0, m, block):
+        j = min(m, i + block)
+        d = np.empty((j - i, len(cycles), splits.shape[0]))
+        for c, cycle in enumerate(cycles):
+            effective = cycle - LOST_TIME_S * n_phases
+            u = shares[:, None] * (effective / cycle)  # (levels, 1)
+            table = phase_delay(demand[i:j, None], saturation[i:j, None], cycle, u)  # (rows, levels, phases)
+            ok = np.abs(u - u0[i:j, None]) <= max_change + 1e-9
+            ok &= (shares[:, None] * effective >= MIN_GREEN_S - 1e-9)
+            cost = np.where(ok, table, np.inf).reshape(j - i, -1)[:, flat].sum(axis=2)
+            cost[np.abs(cycle - cycle0[i:j]) > max_change * cycle0[i:j] + 1e-9] = np.inf
+            d[:, c] = cost
+        d = d.reshape(j - i, -1)
+        k = d.argmin(axis=1)
+        best_cycle[i:j] = np.asarray(cycles)[k // splits.shape[0]]
+        best_split[i:j] = splits[k % splits.shape[0]]
+        best = d[np.arange(j - i), k]
+        best_delay[i:j] = np.where(np.isinf(best), np.inf, _per_vehicle(best, total[i:j]))
+    return best_cycle, best_split, best_delay
+
+
+def optimize(demand, saturation, cycle0, split0, max_change):
+    """
+    Best plan per intersection for arrivals demand (intersections, phases) veh/h, with
+    each phase's green share of the cycle and the cycle length moving at most max_change
+    (0..1) from the current plan (cycle0, split0).
+    Returns {"cycle", "split", "delay", "base_delay"} with delays in s per vehicle.
+    """
+    demand = np.asarray(demand, dtype=float)
+    saturation = np.broadcast_to(np.asarray(saturation, dtype=float), demand.shape)
+    cycle0 = np.broadcast_to(np.asarray(cycle0, dtype=float), demand.shape[:1])
+    split0 = np.broadcast_to(np.asarray(split0, dtype=float), demand.shape)
+    n_phases = demand.shape[1]
+    u0 = green_ratio(cycle0, split0)
+    base = delay(demand, saturation, cycle0, split0)
+
+    cycle, split, best = _coarse(demand, saturation, cycle0, u0, max_change,
+                                 np.asarray(CYCLES, dtype=float), SPLIT_GRID)
+    keep = best >= base
+    cycle = np.where(keep, cycle0, cycle)
+    split = np.where(keep[:, None], split0, split)
+    best = np.where(keep, base, best)
+
+    # refine: move `step` of the green from phase b to phase a, for every ordered pair (a, b)
+    eye = np.eye(n_phases)
+    moves = np.array([eye[a] - eye[b] for a in range(n_phases) for b in range(n_phases) if a != b])
+    for step in REFINE_STEPS:
+        active = np.arange(demand.shape[0])
+        for _ in range(REFINE_PASSES):
+            cand = split[active, None] + step * moves
+            d = delay(demand[active, None], saturation[active, None], cycle[active, None], cand)
+            ok = _allowed(cycle[active, None], cand, cycle0[active, None], u0[active, None], max_change)
+            d = np.where(ok, d, np.inf)
+            k = d.argmin(axis=1)
+            d = d[np.arange(active.shape[0]), k]
+            better = d < best[active]
+            if not better.any():
+                break
+            idx = active[better]
+            split[idx] = cand[better, k[better]]
+            best[idx] = d[better]
+            active = idx
+    return {"cycle": cycle, "split": split, "delay": best, "base_delay": base}
+
+
+def retime(intersections, vehicle_load, max_change):
+    """
+    Optimize every intersection for every timestep of (sectors, timesteps) loads.
+    Returns the optimize() result with arrays shaped (intersections, timesteps[, phases]).
+    """
+    q = phase_demand(intersections, vehicle_load)
+    m, steps, n_phases = q.shape
+    rows = (m, steps, n_phases)
+    plan = optimize(
+        q.reshape(-1, n_phases),
+        np.broadcast_to(intersections["saturation"][:, None], rows).reshape(-1, n_phases),
+        np.repeat(intersections["cycle"], steps),
+        np.broadcast_to(intersections["split"][:, None], rows).reshape(-1, n_phases),
+        max_change,
+    )
+    return {k: v.reshape((m, steps) + v.shape[1:]) for k, v in plan.items()}
+
+
+def sector_load_factor(intersections, demand, base_delay, new_delay, n_sectors):
+    """
+    Load multiplier per sector and timestep, shape (sectors, timesteps): the queued
+    share of the load shrinks with the sector's vehicle delay at its signals.
+    demand is the total arrivals per intersection and timestep, (intersections, timesteps).
+    """
+    steps = demand.shape[1]
+    cell = (intersections["sector"][:, None] * steps + np.arange(steps)).ravel()
+    size = n_sectors * steps
+    before = np.bincount(cell, (demand * base_delay).ravel(), minlength=size).reshape(n_sectors, steps)
+    after = np.bincount(cell, (demand * new_delay).ravel(), minlength=size).reshape(n_sectors, steps)
+    saved = np.divide(before - after, before, out=np.zeros_like(before), where=before > 0)
+    return 1 - QUEUED_SHARE * saved
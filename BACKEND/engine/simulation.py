@@ -0,0 +1,365 @@
+"""
+Headless city simulation across all four domains (traffic, waste, energy, environment).
+
+`CitySimulation.step` advances one timestep and returns (sectors,) arrays, which is
+what the dashboard pages render. `CitySimulation.run` advances many timesteps and
+returns (sectors, timesteps) arrays; traffic and environment are generated a chunk
+of timesteps at a time, waste and energy carry state so they loop over timesteps
+with every operation vectorized across sectors.
+"""
+import numpy as np
+
+from . import bins, energy, environment, grid, roads, routing, signals, traffic, waste
+
+DEFAULT_CONTROLS = {
+    # traffic
+    "situation": "Normal",
+    "green_light_boost": 0,
+    "lane_closure": 0,
+    "emergency_reroute": False,
+    "weight_sensor": 0.6,
+    "weight_citizen": 0.3,
+    "weight_incident": 0.1,
+    # waste
+    "scenario": "Normal",
+    "extra_trucks": 0,
+    "early_collection": False,  # one-shot: applied to the next waste step only
+    "w_sensor": 0.6,
+    "w_hours": 0.25,
+    "w_citizen": 0.15,
+    # energy
+    "cloudiness": 0.25,
+    "global_kinetic": True,
+    "dim_threshold": 30,
+    "critical_threshold": 15,
+    "manual_force_dim": False,
+    # environment
+    "env_situation": "Normal",
+    "humidity_control": 60,
+    "aqi_control": 0,
+    "purifier": False,
+    "dehumidifier": False,
+    "flood_pumps": 0,
+}
+
+# series returned by run(), all shaped (sectors, timesteps)
+SERIES = ("vehicle_load", "congestion_pct", "fill_pct", "risk_pct", "hours_since_collection",
+          "storage_pct", "generation_kW", "consumption_kW", "aqi")
+DEFAULT_SERIES = ("congestion_pct", "fill_pct", "storage_pct", "aqi")
+
+
+class CitySimulation:
+    """
+    Simulation state for a grid of sectors (a grid.Grid, or sectors / rows / cols lists);
+    defaults to grid.DEFAULT_GRID.
+    """
+
+    def __init__(self, sectors=None, rows=None, cols=None, seed=None, dtype=np.float64, sector_grid=None):
+        if sector_grid is None and sectors is None:
+            sector_grid = grid.DEFAULT_GRID
+        if sector_grid is not None:
+            sectors, rows, cols = sector_grid.sectors, sector_grid.rows, sector_grid.cols
+        self.grid = sector_grid
+        self.sectors = list(sectors)
+        self.rows = np.asarray(rows)
+        self.cols = np.asarray(cols)
+        self.n = len(self.sectors)
+        self.dtype = dtype
+        self.rng = np.random.default_rng(seed)
+        n, rng = self.n, self.rng
+
+        types = sector_grid.types if sector_grid is not None else grid.sector_types(self.sectors, self.cols)
+        self.type_mult = grid.type_multipliers(types).astype(dtype)
+        # per-sector citizen inputs (set from the report data by the caller)
+        self.citizen_norm = np.zeros(n, dtype=dtype)
+        self.incidents_norm = np.zeros(n, dtype=dtype)
+        self.report_incidents = 0
+
+        # waste state: hours since last collection per sector
+        self.hours_since_collection = rng.integers(6, 25, size=n).astype(dtype)
+
+        # optional bin-level waste model (see attach_bins); trucks leave from the grid centre
+        self.bins = None
+        self.depot = ((self.cols.max() + 1) / 2, (self.rows.max() + 1) / 2)
+
+        # road network and through-traffic routes for emergency rerouting (see rerouter)
+        self._rerouter = None
+        # signalized intersections for traffic light optimization (see intersections)
+        self._intersections = None
+
+        # energy state: one streetlight cluster per sector (energy.STREETLIGHT_DTYPE records)
+        self.lights = energy.make_streetlights(n, rng, float_dtype=dtype)
+
+    @classmethod
+    def from_grid(cls, n_rows, n_cols, **kwargs):
+        return cls(sector_grid=grid.Grid(n_rows, n_cols), **kwargs)
+
+    @classmethod
+    def from_config(cls, path, **kwargs):
+        """Simulation over the grid of a JSON grid config (see engine.grid)."""
+        return cls(sector_grid=grid.Grid.from_file(path), **kwargs)
+
+    def attach_bins(self, bins_per_sector):
+        """Model waste per bin (bins.BIN_DTYPE records) instead of one fill value per sector."""
+        self.bins = bins.make_bins(self.rows, self.cols, self.type_mult, bins_per_sector, self.rng)
+        return self.bins
+
+    def rerouter(self):
+        """The roads.Rerouter of this city (road network and OD demand built on first use)."""
+        if self._rerouter is None:
+            if self.grid is not None:
+                neighbors = self.grid.neighbors()
+            else:
+                neighbors = grid.neighbor_table(self.rows, self.cols)
+            self._rerouter = roads.Rerouter(roads.RoadNetwork(neighbors), *roads.sample_od(self.n, self.rng))
+        return self._rerouter
+
+    def intersections(self):
+        """The city's signalized intersections (signals.INTERSECTION_DTYPE records), built on first use."""
+        if self._intersections is None:
+            self._intersections = signals.make_intersections(self.n, signals.INTERSECTIONS_PER_SECTOR, self.rng)
+        return self._intersections
+
+    def set_citizen_inputs(self, citizen_norm, incidents_norm=None, report_incidents=None):
+        """Per-sector citizen severity (0..1) and severe-incident flags used by the fusion models."""
+        self.citizen_norm[:] = citizen_norm
+        if incidents_norm is not None:
+            self.incidents_norm[:] = incidents_norm
+        if report_incidents is not None:
+            self.report_incidents = int(report_incidents)
+
+    # ------------------------------------------------------------------
+    # Stateless domains: generated for a whole chunk of timesteps at once
+    # ------------------------------------------------------------------
+    def _traffic(self, c, steps):
+        base_avg_cong, _, base_incidents = traffic.simulate_base_traffic(c["situation"], self.rng, size=steps)
+        load = traffic.vehicle_loads(base_avg_cong, self.n, self.rng, c["lane_closure"], dtype=self.dtype)
+        delay_saved = np.zeros(steps)
+        if c["green_light_boost"] > 0:
+            load, delay_saved = traffic.retime_signals(load, self.intersections(), c["green_light_boost"])
+        weights = (c["weight_sensor"], c["weight_citizen"], c["weight_incident"])
+        cong = traffic.fuse(load, self.citizen_norm, self.incidents_norm, *weights)
+        diverted = np.zeros(steps)
+        if c["emergency_reroute"]:
+            # through traffic avoids the congested sectors, then the sectors are scored again
+            load, diverted = traffic.reroute(load, cong, self.rerouter())
+            cong = traffic.fuse(load, self.citizen_norm, self.incidents_norm, *weights)
+        avg, peak, incidents = traffic.aggregate(cong, load, base_avg_cong, base_incidents, self.report_incidents)
+        return {"vehicle_load": load, "congestion_pct": cong, "avg_congestion": avg,
+                "peak_load": peak, "incidents": incidents, "base_avg_cong": base_avg_cong,
+                "rerouted_share": diverted, "signal_delay_saved": delay_saved}
+
+    def _environment(self, c, steps):
+        temp, humidity, aqi = environment.simulate_environment(c["env_situation"])
+        humidity, aqi = environment.apply_overrides(humidity, aqi, c["humidity_control"], c["aqi_control"],
+                                                    c["purifier"], c["dehumidifier"], c["flood_pumps"])
+        sector_aqi = environment.sector_aqi(c["env_situation"], self.rng, (self.n, steps)).astype(self.dtype)
+        return {"temp": temp, "humidity": humidity, "city_aqi": aqi, "aqi": sector_aqi}
+
+    # ------------------------------------------------------------------
+    # Stateful domains: one timestep, vectorized across sectors
+    # ------------------------------------------------------------------
+    def _waste(self, c, hour, fill_noise, reduction):
+        base_avg_fill, trucks_active = waste.scenario_params(c["scenario"], self.rng)
+        effective_trucks = trucks_active + c["extra_trucks"]
+        hours = self.hours_since_collection
+        if c["early_collection"]:
+            # an action, not a mode: brings the collections forward once, then clears itself
+            np.maximum(hours - 8, 0, out=hours)
+            c["early_collection"] = False
+        if self.bins is not None:
+            return self._waste_bins(c, hour, base_avg_fill, effective_trucks)
+        fill = waste.simulate_sector_sensor_fill(base_avg_fill, self.type_mult, hours, hour, fill_noise)
+        collected = waste.collect(fill, hours, effective_trucks * waste.TRUCK_CAPACITY_SECTORS, reduction)
+        waste.advance_hours(hours)
+        risk = waste.fuse(fill, hours, self.citizen_norm, c["w_sensor"], c["w_hours"], c["w_citizen"])
+        return {"fill_pct": fill, "risk_pct": risk, "hours_since_collection": hours,
+                "collected_idx": collected, "trucks_active": effective_trucks}
+
+    def _waste_bins(self, c, hour, base_avg_fill, effective_trucks):
+        # bins fill for one hour, then the trucks drive the planned tours over the bins
+        # worth collecting; the sector fill shown on the heat map is the mean over its bins
+        scale = base_avg_fill / waste.BASE_AVG_FILL
+        hours = self.hours_since_collection
+        bins.advance_bins(self.bins, hour, scale)
+        plan = self._dispatch(effective_trucks, bins.time_to_full(self.bins, hour, scale))
+        bins.empty_bins(self.bins, plan["served"])
+        collected = np.unique(self.bins["sector"][plan["served"]])
+        hours[collected] = 0
+        waste.advance_hours(hours)
+
+        ttf = bins.time_to_full(self.bins, hour + 1, scale)
+        summary = bins.sector_summary(self.bins, self.n, ttf)
+        fill = summary["mean_fill"]
+        risk = waste.fuse(fill, hours, self.citizen_norm, c["w_sensor"], c["w_hours"], c["w_citizen"])
+        return {"fill_pct": fill, "risk_pct": risk, "hours_since_collection": hours,
+                "collected_idx": collected, "trucks_active": effective_trucks,
+                "time_to_full_h": summary["min_time_to_full"], "overflow_bins": summary["overflow_bins"],
+                "bin_time_to_full_h": ttf, "routes": plan["routes"], "route_load": plan["load"],
+                "route_distance_km": plan["distance_km"], "route_duration_h": plan["duration_h"],
+                "unserved_bins": plan["unserved"].shape[0]}
+
+    def _dispatch(self, n_trucks, ttf):
+        """
+        Truck tours for this timestep over the bins worth collecting: at least half full
+        or overflowing within the shift. A bin has to be reached before it is full
+        (overflowing bins any time during the shift). Route indices refer to self.bins.
+        """
+        fill = self.bins["fill_pct"]
+        cand = np.flatnonzero((fill >= bins.COLLECT_MIN_FILL) | (ttf <= routing.SHIFT_H))
+        due = ttf[cand]
+        due = due + (due <= 0) * routing.SHIFT_H
+        plan = routing.plan_routes(self.bins["x"][cand], self.bins["y"][cand], fill[cand] / 100.0, n_trucks,
+                                   depot=self.depot, due=due)
+        plan["routes"] = [cand[r] for r in plan["routes"]]
+        plan["served"] = cand[plan["served"]]
+        plan["unserved"] = cand[plan["unserved"]]
+        return plan
+
+    def _energy(self, c, hour, ped_noise, outage_decay):
+        gen, cons, outage = energy.step_streetlights(
+            self.lights, hour, c["cloudiness"], ped_noise, outage_decay,
+            c["global_kinetic"], c["dim_threshold"], c["critical_threshold"], c["manual_force_dim"])
+        return {"storage_pct": self.lights["storage"], "generation_kW": gen, "consumption_kW": cons,
+                "light_dim_level": self.lights["light_dim_level"], "outage": outage}
+
+    def _controls(self, controls):
+        c = dict(DEFAULT_CONTROLS)
+        c.update(controls)
+        return c
+
+    def _waste_noise(self, steps, c):
+        # fill noise N(0, 5) per sector; a 40-60% reduction for each sector a truck can reach
+        max_capacity = min(self.n, (waste.MAX_TRUCKS + c["extra_trucks"]) * waste.TRUCK_CAPACITY_SECTORS)
+        fill_noise = self.rng.standard_normal((steps, self.n), dtype=np.float32) * np.float32(5)
+        return fill_noise.astype(self.dtype, copy=False), 40 + self.rng.integers(0, 20, size=(steps, max_capacity))
+
+    def _energy_noise(self, steps):
+        # ped activity drift N(0, 0.05) and outage marker decay U(0.1, 0.5)
+        ped_noise = self.rng.standard_normal((steps, self.n), dtype=np.float32) * np.float32(0.05)
+        outage_decay = self.rng.random((steps, self.n), dtype=np.float32) * np.float32(0.4) + np.float32(0.1)
+        return ped_noise.astype(self.dtype, copy=False), outage_decay.astype(self.dtype, copy=False)
+
+    def step_traffic(self, **controls):
+        """Advance traffic one timestep; (sectors,) arrays plus city-level scalars."""
+        tr = self._traffic(self._controls(controls), 1)
+        return {k: (v[:, 0] if np.ndim(v) == 2 else v[0]) for k, v in tr.items()}
+
+    def step_waste(self, hour, **controls):
+        """Advance waste one timestep at the given hour of day."""
+        c = self._controls(controls)
+        fill_noise, reduction = self._waste_noise(1, c)
+        w = self._waste(c, hour, fill_noise[0], reduction[0])
+        # copy the state array so the snapshot does not change on the next step
+        w["hours_since_collection"] = w["hours_since_collection"].copy()
+        return w
+
+    def step_energy(self, hour, **controls):
+        """Advance the streetlight clusters one timestep at the given hour of day."""
+        ped_noise, outage_decay = self._energy_noise(1)
+        e = self._energy(self._controls(controls), hour, ped_noise[0], outage_decay[0])
+        e["storage_pct"] = e["storage_pct"].copy()
+        e["light_dim_level"] = e["light_dim_level"].copy()
+        return e
+
+    def step_environment(self, **controls):
+        """City-wide temperature / humidity / AQI and one AQI reading per sector."""
+        env = self._environment(self._controls(controls), 1)
+        env["aqi"] = env["aqi"][:, 0]
+        return env
+
+    def step(self, hour, **controls):
+        """Advance every domain one timestep; {"traffic", "waste", "energy", "environment"} snapshots."""
+        return {
+            "traffic": self.step_traffic(**controls),
+            "waste": self.step_waste(hour, **controls),
+            "energy": self.step_energy(hour, **controls),
+            "environment": self.step_environment(**controls),
+        }
+
+    def fusion_history(self, domain, n_steps, start_hour=0, **controls):
+        """
+        Simulated history for sweeping a domain's fusion weights (see engine.sweep):
+        {"inputs": (3, sectors, n_steps) normalized fusion inputs, in the order of the
+        domain's weight controls, "outcome": (sectors, n_steps) events the fused score
+        should flag}. Traffic events are incidents in the sector during the timestep,
+        waste events a fill above waste.OVERFLOW_ALERT_PCT at the next timestep. Citizen
+        inputs are simulated per timestep. Advances the simulation state.
+        """
+        c = self._controls(controls)
+        if domain == "traffic":
+            base_avg_cong, _, base_incidents = traffic.simulate_base_traffic(c["situation"], self.rng, size=n_steps)
+            load = traffic.vehicle_loads(base_avg_cong, self.n, self.rng, c["lane_closure"], dtype=self.dtype)
+            incidents = traffic.sector_incidents(load, base_incidents, self.rng)
+            citizen_norm, incidents_norm = traffic.citizen_observations(load, incidents, self.rng)
+            inputs = traffic.fusion_inputs(load, citizen_norm, incidents_norm)
+            outcome = incidents > 0
+        elif domain == "waste":
+            # one extra timestep for the outcome of the last one
+            fill = np.empty((n_steps + 1, self.n), dtype=self.dtype)
+            hours = np.empty((n_steps + 1, self.n), dtype=self.dtype)
+            fill_noise, reduction = self._waste_noise(n_steps + 1, c)
+            for t in range(n_steps + 1):
+                w = self._waste(c, (start_hour + t) % 24, fill_noise[t], reduction[t])
+                fill[t] = w["fill_pct"]
+                hours[t] = w["hours_since_collection"]
+            fill, hours = fill.T, hours.T
+            citizen_norm = waste.citizen_observations(fill[:, :-1], self.rng)
+            inputs = waste.fusion_inputs(fill[:, :-1], hours[:, :-1], citizen_norm)
+            outcome = fill[:, 1:] > waste.OVERFLOW_ALERT_PCT
+        else:
+            raise ValueError(f"Unknown domain: {domain}")
+        return {"inputs": np.stack(inputs), "outcome": outcome}
+
+    def run(self, n_steps, start_hour=0, record=DEFAULT_SERIES, chunk=720, **controls):
+        """
+        Advance n_steps hourly timesteps. Returns {series: (sectors, n_steps) array} for the
+        recorded series plus per-timestep city aggregates ("avg_congestion", "incidents",
+        "trucks_active", "total_generation_kW", "total_consumption_kW", "outage_count").
+        """
+        unknown = set(record) - set(SERIES)
+        if unknown:
+            raise ValueError(f"Unknown series: {sorted(unknown)}")
+        c = self._controls(controls)
+        n = self.n
+        # filled row-per-timestep, handed back as zero-copy (sectors, timesteps) views
+        buf = {name: np.empty((n_steps, n), dtype=self.dtype) for name in record}
+        avg_congestion = np.empty(n_steps)
+        incidents = np.empty(n_steps, dtype=np.int64)
+        trucks_active = np.empty(n_steps, dtype=np.int64)
+        total_gen = np.empty(n_steps)
+        total_cons = np.empty(n_steps)
+        outage_count = np.empty(n_steps, dtype=np.int64)
+
+        for t0 in range(0, n_steps, chunk):
+            t1 = min(n_steps, t0 + chunk)
+            steps = t1 - t0
+            tr = self._traffic(c, steps)
+            avg_congestion[t0:t1] = tr["avg_congestion"]
+            incidents[t0:t1] = tr["incidents"]
+            env = self._environment(c, steps)
+            for name, src in (("vehicle_load", tr), ("congestion_pct", tr), ("aqi", env)):
+                if name in buf:
+                    buf[name][t0:t1] = src[name].T
+            del tr, env
+
+            fill_noise, reduction = self._waste_noise(steps, c)
+            ped_noise, outage_decay = self._energy_noise(steps)
+            for i in range(steps):
+                t = t0 + i
+                hour = (start_hour + t) % 24
+                w = self._waste(c, hour, fill_noise[i], reduction[i])
+                e = self._energy(c, hour, ped_noise[i], outage_decay[i])
+                trucks_active[t] = w["trucks_active"]
+                total_gen[t] = e["generation_kW"].sum()
+                total_cons[t] = e["consumption_kW"].sum()
+                outage_count[t] = np.count_nonzero(e["outage"])
+                for name in record:
+                    src = w if name in w else e if name in e else None
+                    if src is not None:
+                        buf[name][t] = src[name]
+
+        out = {name: b.T for name, b in buf.items()}
+        out.update(avg_congestion=avg_congestion, incidents=incidents, trucks_active=trucks_active,
+                   total_generation_kW=total_gen, total_consumption_kW=total_cons, outage_count=outage_count)
+        return out
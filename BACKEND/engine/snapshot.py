@@ -0,0 +1,28 @@
+"""
+Immutable snapshots of simulation output, shared by every session without copies.
+
+The scheduler publishes one snapshot per tick and every page rerun of every session
+reads that same object. freeze() makes it safe to share: mappings become read-only
+views and arrays are flagged read-only, so a page that tried to change a snapshot in
+place gets an error instead of corrupting what the other sessions see. Arrays are
+only copied when they are views (of the simulation's live state, or of a larger
+array): the next tick writes new arrays rather than updating published ones, so the
+copy happens on update, not on every read.
+"""
+from types import MappingProxyType
+
+import numpy as np
+
+
+def freeze(value):
+    """A read-only version of value: dicts, lists and tuples recursively, ndarrays flagged read-only."""
+    if isinstance(value, np.ndarray):
+        if value.base is not None:
+            value = value.copy()  # a view: detach it from the array it looks into
+        value.setflags(write=False)
+        return value
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
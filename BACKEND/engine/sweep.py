@@ -0,0 +1,138 @@
+"""
+Fusion-weight sweep: thousands of weight combinations scored against a history at once.
+
+Both fusion models are a weighted sum of normalized inputs mapped to a 0..200
+percent (traffic.fuse, waste.fuse), so over a history of k inputs and N
+sector-timesteps every weight combination is one row of a (weights, k) @ (k, N)
+product. Each row is compared with the events the score should flag (see
+CitySimulation.fusion_history):
+
+- hit rate: share of the events scored at or above the alert band (ALERT_PCT),
+- false alarm rate: share of the other sector-timesteps scored at or above it,
+- agreement: ROC AUC of the score against the events, i.e. the chance that an
+  event scores above a non-event (ties count half), whatever the alert band.
+
+Combinations are ranked by agreement; the Pareto front is the set of combinations
+no other one beats on both hit rate and false alarm rate. Blocks of combinations
+are scored in this process: the products are NumPy calls that already keep a core
+busy, and worker processes cost more to start and feed than they save on the
+histories the pages sweep. Worker processes are opt-in (`workers`); they are
+spawned (not forked from a threaded Streamlit server) and get the history once,
+when they start, rather than with every block.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+ALERT_PCT = 85  # orange band and up on the sector heat maps
+FUSION_SCALE = 120  # weighted sum -> percent, as in traffic.fuse / waste.fuse
+MAX_PCT = 200
+BLOCK_SIZE = 1 << 21  # scores (combinations x sector-timesteps) per block
+
+
+def sample_weights(n, k, rng, current=None):
+    """
+    n weight combinations drawn uniformly from the simplex (k weights summing to 1),
+    shape (n, k); with `current` given it is row 0 and the samples follow.
+    """
+    weights = rng.dirichlet(np.ones(k), size=n)
+    if current is not None:
+        weights = np.vstack([np.asarray(current, dtype=float)[None], weights])
+    return weights
+
+
+def score(inputs, weights):
+    """Fused percent of every combination on every sample: (weights, k) x (k, N) -> (weights, N)."""
+    return np.clip(FUSION_SCALE * (weights @ inputs), 0, MAX_PCT)
+
+
+def _rank_sum(scores, outcome):
+    """Sum of the events' ranks per row of scores (mid-ranks for ties)."""
+    w, n = scores.shape
+    order = np.argsort(scores, axis=1)
+    ordered = np.take_along_axis(scores, order, axis=1)
+    # tie groups over the flattened rows; every row starts a new group
+    new = np.ones((w, n), dtype=bool)
+    new[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    new = new.ravel()
+    first = np.flatnonzero(new)
+    size = np.diff(np.append(first, new.size))
+    mid = first % n + (size + 1) / 2.0  # 1-based mid-rank of each group
+    ranks = mid[np.cumsum(new) - 1].reshape(w, n)
+    return (ranks * outcome[order]).sum(axis=1)
+
+
+def evaluate(inputs, outcome, weights, threshold=ALERT_PCT):
+    """(hit_rate, false_alarm, agreement) per combination for one block of weights."""
+    scores = score(inputs, weights)
+    events = int(outcome.sum())
+    others = outcome.shape[0] - events
+    alert = (scores >= threshold).astype(np.float64)
+    hits = alert @ outcome
+    false_alarms = alert.sum(axis=1) - hits
+    nan = np.full(weights.shape[0], np.nan)
+    hit_rate = hits / events if events else nan
+    false_alarm = false_alarms / others if others else nan
+    if events and others:
+        agreement = (_rank_sum(scores, outcome) - events * (events + 1) / 2.0) / (events * others)
+    else:
+        agreement = nan
+    return hit_rate, false_alarm, agreement
+
+
+_history = None  # (inputs, outcome, threshold) of a worker process, set by _init_worker
+
+
+def _init_worker(inputs, outcome, threshold):
+    global _history
+    _history = (inputs, outcome, threshold)
+
+
+def _evaluate_block(weights):
+    inputs, outcome, threshold = _history
+    return evaluate(inputs, outcome, weights, threshold)
+
+
+def pareto_front(hit_rate, false_alarm):
+    """Indices of the combinations no other beats on both rates, by ascending false alarm rate."""
+    order = np.lexsort((-hit_rate, false_alarm))
+    best = np.maximum.accumulate(hit_rate[order])
+    keep = np.empty(order.shape[0], dtype=bool)
+    keep[:1] = True
+    keep[1:] = hit_rate[order][1:] > best[:-1]
+    return order[keep]
+
+
+def sweep(inputs, outcome, weights, threshold=ALERT_PCT, workers=1):
+    """
+    Score every weight combination (weights (W, k)) on a history: inputs (k, ...) and a
+    boolean outcome of the matching shape (...). Returns {"weights", "hit_rate",
+    "false_alarm", "agreement", "rank" (indices by agreement, best first), "front"
+    (Pareto front indices)}. workers=1 stays in this process; more score blocks of
+    combinations in that many spawned worker processes.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    inputs = inputs.reshape(inputs.shape[0], -1)
+    outcome = np.asarray(outcome, dtype=bool).ravel().astype(np.float64)
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    per_block = max(1, min(BLOCK_SIZE // max(1, outcome.shape[0]), -(-weights.shape[0] // workers)))
+    blocks = [weights[i:i + per_block] for i in range(0, weights.shape[0], per_block)]
+
+    results = None
+    if workers > 1 and len(blocks) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(blocks)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(inputs, outcome, threshold)) as pool:
+                results = list(pool.map(_evaluate_block, blocks))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            results = None  # no usable process pool here: score in-process
+    if results is None:
+        results = [evaluate(inputs, outcome, block, threshold) for block in blocks]
+
+    hit_rate, false_alarm, agreement = (np.concatenate(r) for r in zip(*results))
+    rank = np.argsort(-np.nan_to_num(agreement, nan=-np.inf), kind="stable")
+    return {"weights": weights, "hit_rate": hit_rate, "false_alarm": false_alarm, "agreement": agreement,
+            "rank": rank, "front": pareto_front(hit_rate, false_alarm)}
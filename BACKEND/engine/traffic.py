@@ -0,0 +1,188 @@
+"""
+Traffic simulation: per-sector vehicle loads and the sensor/citizen/incident fusion.
+
+All functions work on arrays shaped (sectors,) for a single timestep or
+(sectors, timesteps) for a batch; per-timestep values such as the situation
+baseline are shaped (timesteps,).
+"""
+import numpy as np
+
+from . import signals
+
+# situation -> (avg congestion low, high), base sector multiplier, (incidents low, high)
+SITUATION_PARAMS = {
+    "Normal": ((35, 55), 0.8, (0, 2)),
+    "Rush Hour": ((60, 85), 1.2, (0, 3)),
+    "Accident/Incident": ((55, 90), 1.1, (1, 4)),
+    "Road Construction": ((50, 80), 1.0, (0, 2)),
+}
+
+MAX_POSSIBLE_SEVERITY = 5 * 5  # assume up to 5 reports each severity 5 as a rough cap
+
+# simulated citizen inputs for fusion histories (see citizen_observations)
+COMPLAINT_RATE = 1.0  # heavy-traffic reports per sector-hour at the average load (grows with load squared)
+INCIDENT_REPORT_PROB = 0.6  # an incident gets a severe accident report within the hour
+FALSE_INCIDENT_RATE = 0.01  # severe accident reports per sector-hour without an incident
+
+
+def simulate_base_traffic(situation, rng, size=None):
+    """
+    Baseline avg congestion percentage, base sector multiplier and base incidents.
+    With size=None returns scalars (as the page did), otherwise arrays of that length.
+    """
+    cong_range, base_sector, inc_range = SITUATION_PARAMS.get(situation, SITUATION_PARAMS["Road Construction"])
+    avg_cong = rng.integers(*cong_range, size=size)
+    incidents = rng.integers(*inc_range, size=size)
+    if size is None:
+        return float(avg_cong), float(base_sector), int(incidents)
+    return avg_cong.astype(float), float(base_sector), incidents
+
+
+def pick_distinct(rng, n, k, size):
+    """
+    k distinct indices out of range(n) for each of `size` timesteps, shape (k, size).
+    Vectorized Floyd sampling, so the cost is O(k * size) regardless of n.
+    """
+    k = min(k, n)
+    picked = np.empty((k, size), dtype=np.int64)
+    for i, j in enumerate(range(n - k, n)):
+        cand = rng.integers(0, j + 1, size=size)
+        taken = (picked[:i] == cand).any(axis=0) if i else np.zeros(size, dtype=bool)
+        picked[i] = np.where(taken, j, cand)
+    return picked
+
+
+def _scale_picked(load, idx, factor):
+    """Multiply load[idx[j, t], t] by factor for every picked (sector, timestep)."""
+    t = np.broadcast_to(np.arange(load.shape[1]), idx.shape)
+    load[idx, t] *= factor
+
+
+def vehicle_loads(base_avg_cong, n_sectors, rng, lane_closure=0, dtype=np.float64):
+    """
+    Per-sector vehicle load, shape (n_sectors, timesteps), for a (timesteps,) baseline.
+    Applies lane closures (signal timing is `retime_signals`, rerouting is `reroute`).
+    """
+    base_avg_cong = np.atleast_1d(np.asarray(base_avg_cong, dtype=float))
+    steps = base_avg_cong.shape[0]
+    base_load = base_avg_cong * 6  # scale factor to get vehicle numbers per sector
+    low = np.maximum(50, (base_load - 80).astype(np.int64))
+    high = (base_load + 80).astype(np.int64)
+    span = high - low
+    if (span == span[0]).all():
+        # the usual case: every timestep draws from a window of the same width
+        load = (rng.integers(0, span[0], size=(n_sectors, steps), dtype=np.int16) + low).astype(dtype)
+    else:
+        load = rng.integers(low, high, size=(n_sectors, steps)).astype(dtype)
+
+    # lane closures penalize 0..3 random sectors per timestep
+    if lane_closure > 0:
+        closed_count = int(np.clip(np.round(lane_closure / 20), 0, 3))
+        if closed_count > 0:
+            _scale_picked(load, pick_distinct(rng, n_sectors, closed_count, steps), 1 + lane_closure / 100)
+    return load
+
+
+def retime_signals(vehicle_load, intersections, green_light_boost):
+    """
+    Traffic light optimization: every intersection's plan searched for the demand its
+    sector's load puts on it, moving each phase's green by at most green_light_boost %
+    of the cycle. Returns the (sectors, timesteps) loads with the queues the new plans
+    clear removed and the share of signal delay saved per timestep.
+    """
+    plan = signals.retime(intersections, vehicle_load, green_light_boost / 100)
+    demand = signals.phase_demand(intersections, vehicle_load).sum(axis=2)
+    factor = signals.sector_load_factor(intersections, demand, plan["base_delay"], plan["delay"],
+                                        vehicle_load.shape[0])
+    before = (demand * plan["base_delay"]).sum(axis=0)
+    after = (demand * plan["delay"]).sum(axis=0)
+    saved = np.divide(before - after, before, out=np.zeros_like(before), where=before > 0)
+    return vehicle_load * factor.astype(vehicle_load.dtype), saved
+
+
+def reroute(vehicle_load, congestion_pct, rerouter):
+    """
+    Emergency rerouting, timestep by timestep: through traffic moves onto the shortest
+    paths under that timestep's congestion (a roads.Rerouter keeps the paths current).
+    Returns the new (sectors, timesteps) loads and the share of through traffic
+    diverted from its free-flow route per timestep.
+    """
+    load = np.empty_like(vehicle_load)
+    diverted = np.empty(vehicle_load.shape[1])
+    total = rerouter.volumes.sum()
+    for t in range(vehicle_load.shape[1]):
+        load[:, t] = rerouter.reroute(vehicle_load[:, t], congestion_pct[:, t])
+        diverted[t] = rerouter.volumes[rerouter.rerouted()].sum() / total
+    return load, diverted
+
+
+def sector_incidents(vehicle_load, incidents, rng):
+    """
+    Where each timestep's incidents (timesteps,) happen: (sectors, timesteps) counts,
+    every incident landing in a sector with probability proportional to its load squared.
+    """
+    n_sectors, steps = vehicle_load.shape
+    incidents = np.asarray(incidents)
+    k = int(incidents.max()) if steps else 0
+    cum = np.cumsum(np.square(vehicle_load, dtype=float), axis=0)
+    cum /= cum[-1]
+    # timestep t's cumulative probabilities shifted into [t, t + 1], so one searchsorted serves all
+    t = np.arange(steps)
+    flat = (cum.T + t[:, None]).ravel()
+    u = rng.random((k, steps)) + t
+    sector = np.minimum(np.searchsorted(flat, u) - t * n_sectors, n_sectors - 1)
+    happened = np.arange(k)[:, None] < incidents
+    cell = (sector * steps + t)[happened]
+    return np.bincount(cell, minlength=n_sectors * steps).reshape(n_sectors, steps)
+
+
+def citizen_observations(vehicle_load, incidents, rng):
+    """
+    Simulated citizen inputs per sector and timestep: heavy-traffic reports (severity 1..5)
+    arrive at COMPLAINT_RATE times the squared load relative to the average, and an
+    incident is reported as a severe accident with INCIDENT_REPORT_PROB (plus false
+    alarms at FALSE_INCIDENT_RATE). Returns (citizen_norm, incidents_norm) like the pages'.
+    """
+    relative = vehicle_load / max(1.0, float(vehicle_load.mean()))
+    n = rng.poisson(COMPLAINT_RATE * relative ** 2)
+    severity = n + rng.binomial(4 * n, 0.5)
+    citizen_norm = np.minimum(severity / MAX_POSSIBLE_SEVERITY, 1.0)
+    reported = (rng.binomial(incidents, INCIDENT_REPORT_PROB) > 0) | (rng.random(incidents.shape) < FALSE_INCIDENT_RATE)
+    return citizen_norm.astype(vehicle_load.dtype), reported.astype(vehicle_load.dtype)
+
+
+def fusion_inputs(vehicle_load, citizen_norm, incidents_norm):
+    """
+    The normalized inputs the fusion model weighs: (sensor_norm, citizen_norm, incidents_norm),
+    each shaped like vehicle_load. Sensor load is relative to the busiest sector of the
+    timestep; (sectors,) citizen inputs broadcast across timesteps.
+    """
+    max_sensor = np.maximum(1.0, vehicle_load.max(axis=0))
+    sensor_norm = vehicle_load / max_sensor  # 0..1
+    citizen_norm = np.asarray(citizen_norm, dtype=vehicle_load.dtype)
+    incidents_norm = np.asarray(incidents_norm, dtype=vehicle_load.dtype)
+    if vehicle_load.ndim == 2 and citizen_norm.ndim == 1:
+        citizen_norm = citizen_norm[:, None]
+    if vehicle_load.ndim == 2 and incidents_norm.ndim == 1:
+        incidents_norm = incidents_norm[:, None]
+    return sensor_norm, citizen_norm, incidents_norm
+
+
+def fuse(vehicle_load, citizen_norm, incidents_norm, weight_sensor=0.6, weight_citizen=0.3, weight_incident=0.1):
+    """
+    Fusion model per sector. Returns the congestion proxy in percent (0..200).
+    citizen_norm / incidents_norm are (sectors,) and broadcast across timesteps.
+    """
+    sensor_norm, citizen_norm, incidents_norm = fusion_inputs(vehicle_load, citizen_norm, incidents_norm)
+    sector_scores = (weight_sensor * sensor_norm) + (weight_citizen * citizen_norm) + (weight_incident * incidents_norm)
+    return np.clip(sector_scores * 120, 0, 200)  # allow high values for localized spikes
+
+
+def aggregate(sector_congestion_pct, vehicle_load, base_avg_cong, base_incidents, report_incidents=0):
+    """Avg congestion, peak load and incidents per timestep (axis 0 is sectors)."""
+    agg_avg_congestion = sector_congestion_pct.mean(axis=0)
+    # small smoothing using base_avg_cong to keep semi-realistic continuity
+    avg_congestion = np.clip(agg_avg_congestion * 0.8 + np.asarray(base_avg_cong) * 0.2, 0, 200)
+    peak_load = np.clip(vehicle_load.max(axis=0), 0, 2000)
+    incidents = np.clip(np.asarray(base_incidents) + report_incidents, 0, 50)
+    return avg_congestion, peak_load, incidents
@@ -0,0 +1,137 @@
+"""
+Waste simulation: sensor fill per sector, truck collections and the risk fusion.
+
+Fill is derived from hours since the last collection, so the only state carried
+between timesteps is the (sectors,) hours_since_collection array.
+
+Fill is a percent of the bins' nominal capacity and is not capped at 100: beyond it
+the waste overflows next to the bins, up to MAX_FILL_PCT. The fusion normalizes the
+sensor reading against that maximum. A sector no truck reaches keeps rising with its
+hours since collection, to about 2.2x its daily level (the hours factor caps at 1 + 1.2),
+so an undersized fleet shows up as fills well above 100.
+"""
+import numpy as np
+
+# scenario -> (base avg fill offset, trucks offset)
+SCENARIO_PARAMS = {
+    "Normal": (0, 0),
+    "High Waste Generation": (20, 2),
+    "Overflow Alerts": (30, 0),
+    "Maintenance Issue": (0, -1),
+}
+BASE_AVG_FILL = 55  # baseline percent
+MAX_FILL_PCT = 200  # fill above 100% is waste overflowing beside the bins
+TRUCK_CAPACITY_SECTORS = 2  # number of sectors a single truck can service in one timestep
+BASE_TRUCKS = (3, 5)  # trucks active each timestep before the scenario offset (inclusive range)
+# most trucks any scenario puts on the road (before the extra trucks the operator deploys)
+MAX_TRUCKS = BASE_TRUCKS[1] + max(trucks for _, trucks in SCENARIO_PARAMS.values())
+MAX_HOURS = 72  # hours since collection are capped (and normalized) at 72
+OVERFLOW_ALERT_PCT = 85  # a sector above this fill counts as an overflow alert
+MAX_POSSIBLE_SEVERITY = 5 * 5  # rough cap: 5 reports severity 5 each
+
+# simulated citizen inputs for fusion histories (see citizen_observations)
+COMPLAINT_FILL_PCT = 80  # overflow / missed pickup reports start above this fill
+COMPLAINT_RATE = 1.0  # reports per sector-hour for every 20% of fill above COMPLAINT_FILL_PCT
+BACKGROUND_COMPLAINT_RATE = 0.05  # reports per sector-hour at any fill
+
+
+def _pattern_for_hour(hour):
+    # peak morning (7-9) and evening (17-20) for residential; commercial midday (10-16)
+    if 6 <= hour <= 9:
+        return 1.25
+    if 17 <= hour <= 20:
+        return 1.2
+    if 10 <= hour <= 16:
+        return 1.0
+    if 0 <= hour <= 4:
+        return 0.6
+    return 0.8
+
+
+HOURLY_PATTERN = np.array([_pattern_for_hour(h) for h in range(24)])
+
+
+def daily_pattern(hour):
+    """Return multiplier for given hour(s) to simulate daily waste generation curve."""
+    out = HOURLY_PATTERN[np.asarray(hour) % 24]
+    return float(out) if np.ndim(out) == 0 else out
+
+
+def scenario_params(scenario, rng):
+    """Base avg fill and trucks active for a scenario (trucks vary over BASE_TRUCKS before the offset)."""
+    fill_offset, trucks_offset = SCENARIO_PARAMS.get(scenario, (0, 0))
+    trucks_active = max(1, int(rng.integers(BASE_TRUCKS[0], BASE_TRUCKS[1] + 1)) + trucks_offset)
+    return BASE_AVG_FILL + fill_offset, trucks_active
+
+
+def simulate_sector_sensor_fill(base_avg_fill, type_mult, hours_since_collection, hour_of_day, noise):
+    """
+    Percent fill per sector based on base avg, sector type, hours since last collection, and noise.
+    Arrays broadcast, so this works for one sector, one timestep or a whole batch.
+    """
+    # hours since collection increases fill linearly up to cap
+    hours_factor = 1 + np.minimum(np.asarray(hours_since_collection) / 24.0, 1.2)
+    fill = base_avg_fill * type_mult * hours_factor * daily_pattern(hour_of_day) + noise
+    # clamp between 0 and 200% (allow overflow >100 for critical)
+    return np.clip(fill, 0, MAX_FILL_PCT)
+
+
+def select_fullest(fill, capacity):
+    """Indices of the `capacity` fullest sectors (unordered)."""
+    n = fill.shape[0]
+    capacity = int(min(capacity, n))
+    if capacity <= 0:
+        return np.empty(0, dtype=np.int64)
+    if capacity < n:
+        return np.argpartition(fill, n - capacity)[n - capacity:]
+    return np.arange(n)
+
+
+def collect(fill, hours_since_collection, capacity, reduction):
+    """
+    Greedy collection: the `capacity` fullest sectors lose `reduction` percent fill
+    and get their hours since collection reset. Mutates both arrays, returns collected idx.
+    """
+    collected_idx = select_fullest(fill, capacity)
+    if np.ndim(reduction):
+        reduction = np.asarray(reduction)[:collected_idx.shape[0]]
+    fill[collected_idx] = np.maximum(0, fill[collected_idx] - reduction)
+    hours_since_collection[collected_idx] = 0
+    return collected_idx
+
+
+def advance_hours(hours_since_collection):
+    """Every sector ages by one hour (capped at MAX_HOURS). In place."""
+    np.minimum(hours_since_collection + 1, MAX_HOURS, out=hours_since_collection)
+    return hours_since_collection
+
+
+def citizen_observations(sector_sensor_fill, rng):
+    """
+    Simulated citizen complaints (severity 1..5) per sector and timestep, arriving faster
+    the further the fill is above COMPLAINT_FILL_PCT; normalized like the page's citizen_norm.
+    """
+    over = np.maximum(sector_sensor_fill - COMPLAINT_FILL_PCT, 0) / 20.0
+    n = rng.poisson(COMPLAINT_RATE * over + BACKGROUND_COMPLAINT_RATE)
+    severity = n + rng.binomial(4 * n, 0.5)
+    return np.minimum(severity / MAX_POSSIBLE_SEVERITY, 1.0)
+
+
+def fusion_inputs(sector_sensor_fill, hours_since_collection, citizen_norm):
+    """The normalized inputs the risk fusion weighs: (sensor_norm, hours_norm, citizen_norm)."""
+    sensor_norm = sector_sensor_fill / float(MAX_FILL_PCT)  # 0..1 relative to a plausible max (200%)
+    hours_norm = np.clip(hours_since_collection / float(MAX_HOURS), 0, 1)
+    citizen_norm = np.asarray(citizen_norm)
+    if np.ndim(sector_sensor_fill) == 2 and citizen_norm.ndim == 1:
+        citizen_norm = citizen_norm[:, None]
+    return sensor_norm, hours_norm, citizen_norm
+
+
+def fuse(sector_sensor_fill, hours_since_collection, citizen_norm, w_sensor=0.6, w_hours=0.25, w_citizen=0.15):
+    """
+    SectorScore = w_sensor * sensor_norm + w_hours * hours_norm + w_citizen * citizen_norm,
+    mapped to a 0..200 risk percent.
+    """
+    sensor_norm, hours_norm, citizen_norm = fusion_inputs(sector_sensor_fill, hours_since_collection, citizen_norm)
+    sector_score = (w_sensor * sensor_norm) + (w_hours * hours_norm) + (w_citizen * citizen_norm)
+    return np.clip(sector_score * 120, 0, 200)
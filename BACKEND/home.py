@@ -4,7 +4,9 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-import uuid
+
+from storage import default_bus
+from ui import downsample
 
 st.set_page_config(layout="wide", page_title="Home Dashboard")
 st.title("Home Dashboard")
@@ -60,20 +62,23 @@ st.subheader("Environment Overview")
 env_col1, env_col2, env_col3 = st.columns(3)
 
 with env_col1:
+    temp_x, temp_y = downsample(hours, env_temp)
     fig_temp = go.Figure()
-    fig_temp.add_trace(go.Scatter(x=hours, y=env_temp, mode='lines+markers', name='Temperature', line=dict(color='orange')))
+    fig_temp.add_trace(go.Scatter(x=temp_x, y=temp_y, mode='lines+markers', name='Temperature', line=dict(color='orange')))
     fig_temp.update_layout(title="Temperature (°C) - Last 24h", xaxis_title="Time", yaxis_title="°C", height=300)
     st.plotly_chart(fig_temp, use_container_width=True)
 
 with env_col2:
+    hum_x, hum_y = downsample(hours, env_humidity)
     fig_hum = go.Figure()
-    fig_hum.add_trace(go.Scatter(x=hours, y=env_humidity, mode='lines+markers', name='Humidity', line=dict(color='blue')))
+    fig_hum.add_trace(go.Scatter(x=hum_x, y=hum_y, mode='lines+markers', name='Humidity', line=dict(color='blue')))
     fig_hum.update_layout(title="Humidity (%) - Last 24h", xaxis_title="Time", yaxis_title="%", height=300)
     st.plotly_chart(fig_hum, use_container_width=True)
 
 with env_col3:
+    aqi_x, aqi_y = downsample(hours, env_aqi)
     fig_aqi = go.Figure()
-    fig_aqi.add_trace(go.Scatter(x=hours, y=env_aqi, mode='lines+markers', name='AQI', line=dict(color='green')))
+    fig_aqi.add_trace(go.Scatter(x=aqi_x, y=aqi_y, mode='lines+markers', name='AQI', line=dict(color='green')))
     fig_aqi.update_layout(title="Air Quality Index - Last 24h", xaxis_title="Time", yaxis_title="AQI", height=300)
     st.plotly_chart(fig_aqi, use_container_width=True)
 
@@ -96,14 +101,16 @@ st.subheader("System Health Overview")
 sys_col1, sys_col2 = st.columns(2)
 
 with sys_col1:
+    cpu_x, cpu_y = downsample(hours, cpu_load)
     fig_cpu = go.Figure()
-    fig_cpu.add_trace(go.Scatter(x=hours, y=cpu_load, mode='lines', name='CPU Load', line=dict(color='purple')))
+    fig_cpu.add_trace(go.Scatter(x=cpu_x, y=cpu_y, mode='lines', name='CPU Load', line=dict(color='purple')))
     fig_cpu.update_layout(title="CPU Load (%) - Last 24h", yaxis_title="%", height=300)
     st.plotly_chart(fig_cpu, use_container_width=True)
 
 with sys_col2:
+    mem_x, mem_y = downsample(hours, memory_usage)
     fig_mem = go.Figure()
-    fig_mem.add_trace(go.Scatter(x=hours, y=memory_usage, mode='lines', name='Memory Usage', line=dict(color='darkblue')))
+    fig_mem.add_trace(go.Scatter(x=mem_x, y=mem_y, mode='lines', name='Memory Usage', line=dict(color='darkblue')))
     fig_mem.update_layout(title="Memory Usage (%) - Last 24h", yaxis_title="%", height=300)
     st.plotly_chart(fig_mem, use_container_width=True)
 
@@ -140,25 +147,18 @@ citF_data = pd.DataFrame({
 })
 
 # ============================================================
-# PUSH DASHBOARD CITIZEN FEEDBACK TO ADMIN PANEL SESSION
+# PUSH DASHBOARD CITIZEN FEEDBACK TO THE ADMIN QUEUE
 # ============================================================
-if "reports" not in st.session_state:
-    st.session_state.reports = []
-
-for _, row in citF_data.iterrows():
-    # Check to avoid duplicates
-    if not any(r.get("location_text") == row["Sector"] and r.get("description") == row["Comment"]
-               for r in st.session_state.reports):
-        st.session_state.reports.append({
-            "id": str(uuid.uuid4())[:8],
-            "ts": row["Timestamp"],
-            "name": "Citizen",
-            "category": "General Issue",
-            "location_text": row["Sector"],
-            "severity": ["Minor","Major","Critical"][min(max(row["Severity"]-1,0),2)],
-            "description": row["Comment"],
-            "status": "Submitted",
-            "assigned_to": "",
-            "response_time_days": None
-        })
-
+@st.cache_resource
+def get_report_bus():
+    # citizen reports of every page and session go through one bus (and on to the admin queue)
+    return default_bus()
+
+
+# reports whose content (sector, issue, comment, day) is already on the bus or in the
+# store are skipped, so this batch is added once however often the page reruns or the app restarts
+get_report_bus().publish([
+    {"sector": sector, "issue": issue, "severity": severity, "comment": comment, "ts": ts}
+    for sector, issue, severity, comment, ts in zip(citF_data["Sector"], citF_data["Issue"], citF_data["Severity"],
+                                                    citF_data["Comment"], citF_data["Timestamp"])
+])
@@ -1,42 +1,51 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import uuid
 
+from storage import SEARCH_COUNT_CAP, default_store
+
+PAGE_SIZES = [25, 50, 100]  # report cards per page
+
 st.set_page_config(layout="wide", page_title="Citizen Reports — Admin Mode")
 st.title("Citizen Feedback: Admin Panel (Free text locations)")
 
 # -------------------------
-# Initialize session state
+# Report store (shared by every session, persisted in SQLite)
 # -------------------------
-if "reports" not in st.session_state:
-    st.session_state.reports = [
-        {
-            "id": str(uuid.uuid4())[:8],
-            "ts": datetime.now(),
-            "name": "Juan D.",
-            "category": "Waste Management",
-            "location_text": "Near 7-11 along Main St.",
-            "severity": "Major",
-            "description": "Garbage bin overflowing for 3 days.",
-            "status": "Submitted",
-            "assigned_to": "",
-            "response_time_days": None
-        },
-        {
-            "id": str(uuid.uuid4())[:8],
-            "ts": datetime.now(),
-            "name": "Maria S.",
-            "category": "Streetlight",
-            "location_text": "C1 - corner lamppost flickering",
-            "severity": "Minor",
-            "description": "Light flickers at night.",
-            "status": "Submitted",
-            "assigned_to": "",
-            "response_time_days": None
-        }
-    ]
+@st.cache_resource
+def get_report_store():
+    store = default_store()
+    if len(store) == 0:
+        store.add_many([
+            {
+                "id": str(uuid.uuid4())[:8],
+                "ts": datetime.now(),
+                "name": "Juan D.",
+                "category": "Waste Management",
+                "location_text": "Near 7-11 along Main St.",
+                "severity": "Major",
+                "description": "Garbage bin overflowing for 3 days.",
+                "status": "Submitted",
+                "assigned_to": "",
+                "response_time_days": None
+            },
+            {
+                "id": str(uuid.uuid4())[:8],
+                "ts": datetime.now(),
+                "name": "Maria S.",
+                "category": "Streetlight",
+                "location_text": "C1 - corner lamppost flickering",
+                "severity": "Minor",
+                "description": "Light flickers at night.",
+                "status": "Submitted",
+                "assigned_to": "",
+                "response_time_days": None
+            }
+        ])
+    return store
+
+store = get_report_store()
 
 # -------------------------
 # Left = filters (optional), right = reports list
@@ -48,8 +57,7 @@ left, right = st.columns([1, 2])
 # -------------------------
 with left:
     st.subheader("Filters")
-    reports_df = pd.DataFrame(st.session_state.reports)
-    categories = ["All"] + sorted(reports_df["category"].unique().tolist())
+    categories = ["All"] + store.categories()
     severities = ["All","Critical","Major","Minor"]
     statuses = ["All","Submitted","Verified","Assigned","In Progress","Resolved"]
 
@@ -58,96 +66,89 @@ with left:
     filter_status = st.multiselect("Status", statuses, default="All")
     search_text = st.text_input("Search (name/location/description)")
     sort_by = st.selectbox("Sort by", ["Newest","Severity (Critical→Minor)","Status"])
+    page_size = st.selectbox("Reports per page", PAGE_SIZES, index=1)
 
 # -------------------------
-# Prepare filtered list
+# Prepare filtered list (filters, search, sort and paging run in the store)
 # -------------------------
-reports_df = pd.DataFrame(st.session_state.reports)
-if reports_df.empty:
-    filtered = []
-else:
-    mask = pd.Series(True, index=reports_df.index)
-
-    if "All" not in filter_category:
-        mask &= reports_df["category"].isin(filter_category)
-    if "All" not in filter_severity:
-        mask &= reports_df["severity"].isin(filter_severity)
-    if "All" not in filter_status:
-        mask &= reports_df["status"].isin(filter_status)
-    if search_text.strip():
-        q = search_text.strip().lower()
-        mask &= (reports_df["location_text"].str.lower().str.contains(q) |
-                 reports_df["description"].str.lower().str.contains(q) |
-                 reports_df["name"].str.lower().str.contains(q))
-
-    filtered_df = reports_df[mask].copy()
-
-    # Sorting
-    if sort_by == "Newest":
-        filtered_df = filtered_df.sort_values(by="ts", ascending=False)
-    elif sort_by == "Severity (Critical→Minor)":
-        filtered_df["s_rank"] = filtered_df["severity"].map({"Critical":3,"Major":2,"Minor":1})
-        filtered_df = filtered_df.sort_values(by="s_rank", ascending=False)
-    elif sort_by == "Status":
-        status_order = {"Submitted":0,"Verified":1,"Assigned":2,"In Progress":3,"Resolved":4}
-        filtered_df["st_rank"] = filtered_df["status"].map(status_order)
-        filtered_df = filtered_df.sort_values(by=["st_rank","ts"], ascending=[True,False])
-
-    filtered = filtered_df.to_dict("records")
+filters = {
+    "categories": None if "All" in filter_category else filter_category,
+    "severities": None if "All" in filter_severity else filter_severity,
+    "statuses": None if "All" in filter_status else filter_status,
+    "search": search_text.strip(),
+}
+total = store.count(**filters)
+capped = filters["search"] and total > SEARCH_COUNT_CAP
+total_label = f"{total - 1:,}+" if capped else f"{total:,}"
+n_pages_label = f"{-(-SEARCH_COUNT_CAP // page_size)}+" if capped else f"{max(1, -(-total // page_size))}"
+
+# cursor of every page up to the current one (keyset paging: page n costs the same as page 1);
+# a different filter, sort or page size starts again from the first page
+view = repr((filters, sort_by, page_size))
+if st.session_state.get("cards_view") != view:
+    st.session_state.cards_view = view
+    st.session_state.cards_cursors = [None]
+    st.session_state.cards_next = None
+cursors = st.session_state.cards_cursors
 
 # -------------------------
 # Right column: Reports list + admin tools
 # -------------------------
 with right:
     st.subheader("Reports List")
-    st.write(f"Showing **{len(filtered)}** report(s) matching filters.")
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 3])
+    with nav1:
+        if st.button("⏮ First", disabled=len(cursors) == 1):
+            del cursors[1:]
+    with nav2:
+        if st.button("◀ Prev", disabled=len(cursors) == 1) and len(cursors) > 1:
+            cursors.pop()
+    with nav3:
+        if st.button("Next ▶", disabled=st.session_state.cards_next is None) and st.session_state.cards_next is not None:
+            cursors.append(st.session_state.cards_next)
+    filtered, st.session_state.cards_next = store.page(sort=sort_by, limit=page_size, cursor=cursors[-1], **filters)
+    with nav4:
+        st.write(f"Page **{len(cursors)}** of **{n_pages_label}**")
+    st.write(f"Showing **{len(filtered)}** of **{total_label}** report(s) matching filters.")
     st.write("---")
 
-    # Export CSV of filtered
-    if filtered:
-        export_df = pd.DataFrame(filtered).drop(columns=["description"])  # keep export compact
+    # Export CSV of filtered (built on demand: it reads every matching report)
+    if total and st.button("Prepare CSV export of the filtered list"):
+        export_df = pd.DataFrame(store.query(sort=sort_by, limit=None, **filters)).drop(columns=["description"])  # keep export compact
         csv = export_df.to_csv(index=False).encode("utf-8")
         st.download_button("Export filtered list (CSV)", csv, "reports_filtered.csv", "text/csv")
 
-    # Bulk actions
+    # Bulk actions (every report matching the filters, not only this page)
     st.write("### Bulk actions (admin)")
+    bulk_changed = False
     colba1, colba2, colba3 = st.columns(3)
     with colba1:
         if st.button("Mark all visible as Verified"):
-            changed = 0
-            for r in st.session_state.reports:
-                if r["id"] in [rec["id"] for rec in filtered]:
-                    if r["status"] == "Submitted":
-                        r["status"] = "Verified"
-                        r["response_time_days"] = np.random.randint(0,2)
-                        changed += 1
-            st.success(f"{changed} report(s) verified.")
+            counts = store.transition("Verified", response_days=(0, 1), **filters)
+            bulk_changed = True
+            st.success(f"{counts['moved']} report(s) verified ({counts['rejected']} not in Submitted).")
     with colba2:
         if st.button("Assign visible to Team A"):
-            changed = 0
-            for r in st.session_state.reports:
-                if r["id"] in [rec["id"] for rec in filtered]:
-                    r["assigned_to"] = "Team A"
-                    if r["status"] == "Verified":
-                        r["status"] = "Assigned"
-                    changed += 1
-            st.success(f"{changed} report(s) assigned to Team A.")
+            counts = store.transition("Assigned", assigned_to="Team A", **filters)
+            bulk_changed = True
+            st.success(f"{counts['assigned']} report(s) assigned to Team A, {counts['moved']} moved from Verified to Assigned.")
     with colba3:
         if st.button("Resolve visible"):
-            changed = 0
-            for r in st.session_state.reports:
-                if r["id"] in [rec["id"] for rec in filtered] and r["status"] != "Resolved":
-                    r["status"] = "Resolved"
-                    r["response_time_days"] = np.random.randint(0,5)
-                    changed += 1
-            st.success(f"{changed} report(s) resolved.")
+            counts = store.transition("Resolved", response_days=(0, 4), **filters)
+            bulk_changed = True
+            st.success(f"{counts['moved']} report(s) resolved.")
+
+    # show the cards as they are after the bulk action
+    if bulk_changed:
+        filtered, st.session_state.cards_next = store.page(sort=sort_by, limit=page_size, cursor=cursors[-1], **filters)
 
     st.write("---")
 
-    # Display each report as expandable card
+    # Display the page's report cards (one markdown block for the whole page)
+    cards = []
     for rec in filtered:
         severity_color = {"Critical":"#d32f2f","Major":"#f57c00","Minor":"#1976d2"}.get(rec["severity"], "#666")
-        st.markdown(f"""
+        cards.append(f"""
             <div style="border:1px solid #ddd; padding:12px; border-radius:8px; margin-bottom:8px;">
                 <div style="display:flex; justify-content:space-between; align-items:center;">
                     <div>
@@ -166,4 +167,5 @@ with right:
                     &nbsp; | &nbsp; <b>Response days:</b> {rec.get('response_time_days') if rec.get('response_time_days') is not None else '-'}
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
+    st.markdown("".join(cards), unsafe_allow_html=True)
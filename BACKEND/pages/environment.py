@@ -1,8 +1,11 @@
 import streamlit as st
 import plotly.graph_objects as go
-import numpy as np
-import pandas as pd
-from PIL import Image
+from datetime import datetime, timedelta
+
+from engine import DEFAULT_GRID, SECTORS, ROWS, COLS, default_scheduler
+from storage import (DAY, DEFAULT_ARCHIVE_DIR, HOUR, MINUTE, ROLLUP_LEVELS, default_bus, history_series,
+                     local_days, local_times)
+from ui import add_map_background, add_report_markers, band_index, sector_centers, sector_grid
 
 # ==============================
 # PAGE CONFIG
@@ -25,8 +28,25 @@ if "act_dehumidifier" not in st.session_state:
     st.session_state.act_dehumidifier = False
 if "act_flood_pumps" not in st.session_state:
     st.session_state.act_flood_pumps = 0
-if "history" not in st.session_state:
-    st.session_state.history = []
+# persistent history (kept across restarts): city readings and sector AQI per step,
+# with minute / hour / day rollups; closed days go to the cold archive
+env_history = history_series("environment", {"temp": (), "humidity": (), "aqi": (), "sector_aqi": (len(SECTORS),)},
+                             rollups=ROLLUP_LEVELS, archive_dir=DEFAULT_ARCHIVE_DIR)
+
+
+@st.cache_resource
+def get_scheduler():
+    # one simulation clock for the whole server: it ticks in the background, reruns only read its snapshot
+    return default_scheduler()
+
+
+scheduler = get_scheduler()
+
+
+@st.cache_resource
+def get_report_bus():
+    # citizen reports of every page and session go through one bus (and on to the admin queue)
+    return default_bus()
 
 # ==============================
 # SIDEBAR CONTROL PANEL
@@ -53,35 +73,47 @@ with st.sidebar:
     large_fonts = st.checkbox("Large Fonts")
 
 # ==============================
-# SIMULATE ENVIRONMENT
+# SIMULATE ENVIRONMENT (with overrides & actuator effects)
 # ==============================
-def simulate_environment(situation):
-    base_temp, base_humidity, base_aqi = 28, 65, 40
-    if situation == "Heatwave": return base_temp+10, base_humidity-10, base_aqi+20
-    elif situation == "Flood": return base_temp-3, base_humidity+20, base_aqi+5
-    elif situation == "Pollution Spike": return base_temp+2, base_humidity-5, base_aqi+60
-    return base_temp, base_humidity, base_aqi
-
-temp_value, humidity_value, aqi_value = simulate_environment(situation)
+# the scheduler steps the environment in the background with these settings from its next
+# tick on; the page shows the latest tick
+# the controls are city-wide: only what this session changed since its last rerun is applied
+env_controls = dict(
+    env_situation=situation,
+    humidity_control=humidity_control,
+    aqi_control=aqi_control,
+    purifier=st.session_state.act_purifier,
+    dehumidifier=st.session_state.act_dehumidifier,
+    flood_pumps=st.session_state.act_flood_pumps,
+)
+running_controls = scheduler.set_controls("environment", st.session_state.get("env_controls", env_controls),
+                                          **env_controls)
+st.session_state.env_controls = env_controls
+env_tick = scheduler.latest
+env_step = env_tick["environment"]
+st.caption(f"Simulation tick {env_tick['tick']} at {datetime.fromtimestamp(env_tick['ts']):%H:%M:%S}; "
+           "control changes apply from the next tick.")
+overridden = [f"{name} = {running_controls[name]}" for name, value in env_controls.items()
+              if running_controls[name] != value]
+if overridden:
+    st.info("The simulation is shared by every session; it runs with controls set elsewhere: " + ", ".join(overridden))
+if scheduler.last_error is not None:
+    st.warning(f"Simulation tick failed: {scheduler.last_error}")
+temp_value = env_step["temp"]
+humidity_value = float(env_step["humidity"])
+aqi_value = int(env_step["city_aqi"])
+sector_aqi = env_step["aqi"].astype(int)  # sensor AQI per sector
 
 # ==============================
-# APPLY OVERRIDES & ACTUATOR EFFECTS
+# SAVE TO HISTORY (every tick, on the scheduler thread)
 # ==============================
-humidity_value = (humidity_value + humidity_control)/2
-aqi_value = max(0, aqi_value - aqi_control)
-if st.session_state.act_purifier: aqi_value = max(0, aqi_value - 15)
-if st.session_state.act_dehumidifier: humidity_value = max(0, humidity_value - 10)
-if st.session_state.act_flood_pumps > 0: humidity_value = max(0, humidity_value - st.session_state.act_flood_pumps*4)
+def record_environment(ts, tick):
+    step = tick["environment"]
+    env_history.append(ts, temp=step["temp"], humidity=float(step["humidity"]), aqi=int(step["city_aqi"]),
+                       sector_aqi=step["aqi"].astype(int))
 
-# ==============================
-# SAVE TO HISTORY
-# ==============================
-st.session_state.history.append({
-    "temp": temp_value,
-    "humidity": humidity_value,
-    "aqi": aqi_value
-})
-hist_df = pd.DataFrame(st.session_state.history[-24:])  # last 24 readings
+
+scheduler.subscribe("environment_history", record_environment)
 
 # ==============================
 # HELPER FUNCTION: STAT CARD
@@ -96,6 +128,19 @@ def stat_card(title, value, unit="", threshold=None, color="#2196f3"):
         </div>
     """, unsafe_allow_html=True)
 
+# ==============================
+# HELPER FUNCTION: AQI SECTOR GRID
+# ==============================
+# Green <=50, Yellow <=100, Orange <=150, Red <=200, Purple <=300, Maroon above
+AQI_THRESHOLDS = [50, 100, 150, 200, 300]
+AQI_COLORS = ["Green", "Yellow", "Orange", "Red", "Purple", "Maroon"]
+
+def aqi_grid(fig, sector_aqi):
+    return sector_grid(fig, ROWS, COLS,
+                       band_index(sector_aqi, AQI_THRESHOLDS, upper_inclusive=True), AQI_COLORS,
+                       text=[f"{s}<br>{aqi}" for s, aqi in zip(SECTORS, sector_aqi)],
+                       opacity=0.5, border_width=3, font=dict(color="black", size=12))
+
 # ==============================
 # ROW 1: REAL-TIME STATS
 # ==============================
@@ -163,72 +208,33 @@ if role == "Emergency Response":
     )
     severity_threshold = st.sidebar.slider("Minimum Severity", 1, 5, 2)
 
-    # --- Simulated citizen reports (replace with live data later)
-    citizen_reports = [
+    # --- Citizen reports: the environment slice of the report bus (simulated seed reports)
+    report_bus = get_report_bus()
+    env_reports = report_bus.subscribe("environment", seed=[
         {"sector": "A1", "issue": "Smoke", "severity": 3},
         {"sector": "B2", "issue": "Flood", "severity": 2},
         {"sector": "C3", "issue": "Air Quality", "severity": 1},
         {"sector": "A2", "issue": "Flood", "severity": 4},
         {"sector": "B3", "issue": "Smoke", "severity": 5}
-    ]
-    # Filter reports
-    filtered_reports = [
-        r for r in citizen_reports
-        if r["issue"] in issues_to_show and r["severity"] >= severity_threshold
-    ]
+    ])
+    # Filter reports (the index is shared by every session: read it under the bus lock)
+    with report_bus.lock:
+        filtered_reports = env_reports.select(issues_to_show, severity_threshold)
 
     # --- Heatmap setup
     try:
-        map_img = Image.open(r"C:\Users\User\Desktop\DASHBOARD\ortigas_dashboard\map.png")
-        sectors = ["A1","A2","A3","B1","B2","B3","C1","C2","C3"]
-        rows = [0,0,0,1,1,1,2,2,2]
-        cols = [0,1,2,0,1,2,0,1,2]
-
-        # Sensor AQI per sector
-        if situation=="Normal": sector_aqi = np.random.randint(40,60,len(sectors))
-        elif situation=="Heatwave": sector_aqi = np.random.randint(50,80,len(sectors))
-        elif situation=="Flood": sector_aqi = np.random.randint(30,60,len(sectors))
-        else: sector_aqi = np.random.randint(150,300,len(sectors))
-
         fig_map = go.Figure()
-        fig_map.add_layout_image(dict(
-            source=map_img, xref="x", yref="y", x=0, y=3, sizex=3, sizey=3,
-            sizing="stretch", opacity=1, layer="below"))
+        if not add_map_background(fig_map, y=DEFAULT_GRID.n_rows, sizex=DEFAULT_GRID.n_cols, sizey=DEFAULT_GRID.n_rows):
+            raise FileNotFoundError("map.png")
 
         # Draw sensor AQI sectors
-        for i, aqi in enumerate(sector_aqi):
-            if aqi<=50: color="Green"
-            elif aqi<=100: color="Yellow"
-            elif aqi<=150: color="Orange"
-            elif aqi<=200: color="Red"
-            elif aqi<=300: color="Purple"
-            else: color="Maroon"
-            fig_map.add_shape(type="rect",
-                              x0=cols[i], y0=2-rows[i], x1=cols[i]+1, y1=3-rows[i],
-                              line=dict(color="black", width=3),
-                              fillcolor=color, opacity=0.5)
-            fig_map.add_annotation(x=cols[i]+0.5, y=2-rows[i]+0.5,
-                                   text=f"{sectors[i]}<br>{aqi}", showarrow=False,
-                                   font=dict(color="black", size=12))
-
-        # Map citizen reports
-        sector_coords = {s:(c,r) for s,c,r in zip(sectors, cols, rows)}
-        for report in filtered_reports:
-            x, y = sector_coords[report["sector"]]
-            y = 2 - y  # invert row for plotting
-            issue_color = {"Smoke":"red","Flood":"blue","Air Quality":"purple"}[report["issue"]]
-            size = report["severity"] * 10
-            fig_map.add_trace(go.Scatter(
-                x=[x+0.5], y=[y+0.5],
-                mode="markers+text",
-                marker=dict(size=size, color=issue_color, opacity=0.7),
-                text=[report["issue"]],
-                textposition="top center",
-                showlegend=False
-            ))
-
-        fig_map.update_xaxes(visible=False, range=[0,3])
-        fig_map.update_yaxes(visible=False, range=[0,3])
+        aqi_grid(fig_map, sector_aqi)
+
+        # Map citizen reports (one marker trace)
+        add_report_markers(fig_map, filtered_reports, sector_centers(SECTORS, ROWS, COLS),
+                           {"Smoke":"red","Flood":"blue","Air Quality":"purple"},
+                           size_base=0, opacity=0.7, line_width=0)
+
         fig_map.update_layout(width=600, height=600, margin=dict(l=0,r=0,t=0,b=0))
         st.plotly_chart(fig_map, use_container_width=True)
 
@@ -247,71 +253,84 @@ if role in ["Environment Ops", "City Planner"]:
     with row3_map:
         st.subheader("Air Quality Heat Map")
         try:
-            map_img = Image.open(r"C:\Users\User\Desktop\DASHBOARD\ortigas_dashboard\map.png")
-            sectors = ["A1","A2","A3","B1","B2","B3","C1","C2","C3"]
-            rows = [0,0,0,1,1,1,2,2,2]
-            cols = [0,1,2,0,1,2,0,1,2]
-            if situation=="Normal": sector_aqi = np.random.randint(40,60,len(sectors))
-            elif situation=="Heatwave": sector_aqi = np.random.randint(50,80,len(sectors))
-            elif situation=="Flood": sector_aqi = np.random.randint(30,60,len(sectors))
-            else: sector_aqi = np.random.randint(150,300,len(sectors))
-
             fig_map = go.Figure()
-            fig_map.add_layout_image(dict(source=map_img, xref="x", yref="y", x=0, y=3, sizex=3, sizey=3,
-                                          sizing="stretch", opacity=1, layer="below"))
-            for i, aqi in enumerate(sector_aqi):
-                if aqi<=50: color="Green"
-                elif aqi<=100: color="Yellow"
-                elif aqi<=150: color="Orange"
-                elif aqi<=200: color="Red"
-                elif aqi<=300: color="Purple"
-                else: color="Maroon"
-                fig_map.add_shape(type="rect", x0=cols[i], y0=2-rows[i], x1=cols[i]+1, y1=3-rows[i],
-                                  line=dict(color="black", width=3), fillcolor=color, opacity=0.5)
-                fig_map.add_annotation(x=cols[i]+0.5, y=2-rows[i]+0.5,
-                                       text=f"{sectors[i]}<br>{aqi}", showarrow=False,
-                                       font=dict(color="black", size=12))
-            fig_map.update_xaxes(visible=False, range=[0,3])
-            fig_map.update_yaxes(visible=False, range=[0,3])
+            if not add_map_background(fig_map, y=DEFAULT_GRID.n_rows, sizex=DEFAULT_GRID.n_cols, sizey=DEFAULT_GRID.n_rows):
+                raise FileNotFoundError("map.png")
+            aqi_grid(fig_map, sector_aqi)
             fig_map.update_layout(width=600, height=600, margin=dict(l=0,r=0,t=0,b=0))
             st.plotly_chart(fig_map, use_container_width=True)
         except:
             st.error("Map image not found.")
 
-    # --- Hourly Temperature Trend
+    # --- Hourly Temperature Trend (hourly means over the last 24 hours)
     with row3_hour:
+        trend = env_history.query(datetime.now() - timedelta(hours=23), resolution=HOUR, columns=["temp", "aqi"])
+        trend_times = local_times(trend["ts"])
+
         st.subheader("Hourly Temperature Trend")
-        hours = np.arange(24)
-        temp_variation = temp_value + np.random.normal(0,1,30)
         fig_hour_temp = go.Figure()
-        fig_hour_temp.add_trace(go.Scatter(x=hours, y=temp_variation, mode='lines+markers'))
+        fig_hour_temp.add_trace(go.Scatter(x=trend_times, y=trend["temp"], mode='lines+markers'))
         fig_hour_temp.update_layout(height=260, margin=dict(l=10,r=10,t=30,b=10))
         st.plotly_chart(fig_hour_temp, use_container_width=True)
 
         st.subheader("Hourly AQI Trend")
-        aqi_variation = aqi_value + np.random.normal(0,5,24)
         fig_hour_aqi = go.Figure()
-        fig_hour_aqi.add_trace(go.Scatter(x=hours, y=aqi_variation, mode='lines+markers'))
+        fig_hour_aqi.add_trace(go.Scatter(x=trend_times, y=trend["aqi"], mode='lines+markers'))
         fig_hour_aqi.update_layout(height=260, margin=dict(l=10,r=10,t=30,b=10))
         st.plotly_chart(fig_hour_aqi, use_container_width=True)
 
 # ==============================
-# ROW 4: WEEKLY TRENDS
+# ROW 4: WEEKLY / MONTHLY TRENDS (daily means from the day rollups)
 # ==============================
 if role in ["City Planner"]:
     st.divider()
+    trend_days = st.select_slider("Days shown", options=[7, 30], value=7, key="env_trend_days")
+    since = datetime.combine(datetime.now().date() - timedelta(days=trend_days - 1), datetime.min.time())
+    daily = env_history.query(since, resolution=DAY, columns=["temp", "aqi"])
+    days = local_days(daily["ts"])
     row4_col1, row4_col2 = st.columns(2)
     with row4_col1:
-        st.subheader("Weekly Temperature")
-        temp_week = temp_value + np.random.normal(0,1.5,7)
+        st.subheader(f"Temperature - Last {trend_days} Days")
         fig_week_temp = go.Figure()
-        fig_week_temp.add_trace(go.Bar(x=["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], y=temp_week))
+        fig_week_temp.add_trace(go.Bar(x=days, y=daily["temp"]))
         fig_week_temp.update_layout(height=260, margin=dict(l=10,r=10,t=40,b=10))
         st.plotly_chart(fig_week_temp, use_container_width=True)
     with row4_col2:
-        st.subheader("Weekly AQI")
-        aqi_week = aqi_value + np.random.normal(0,5,7)
+        st.subheader(f"AQI - Last {trend_days} Days")
         fig_week_aqi = go.Figure()
-        fig_week_aqi.add_trace(go.Bar(x=["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], y=aqi_week))
+        fig_week_aqi.add_trace(go.Bar(x=days, y=daily["aqi"]))
         fig_week_aqi.update_layout(height=260, margin=dict(l=10,r=10,t=40,b=10))
         st.plotly_chart(fig_week_aqi, use_container_width=True)
+
+# ==============================
+# ROW 5: SECTOR AQI HISTORY (any range, any resolution, from the rollups)
+# ==============================
+if role in ["Environment Ops", "City Planner"]:
+    st.divider()
+    st.subheader("Sector AQI History")
+    ranges = {"Last 24 hours": timedelta(days=1), "Last 7 days": timedelta(days=7),
+              "Last 30 days": timedelta(days=30), "Last year": timedelta(days=365)}
+    resolutions = {"1 min": MINUTE, "5 min": 5 * MINUTE, "15 min": 15 * MINUTE, "1 hour": HOUR, "1 day": DAY}
+    q1, q2, q3 = st.columns(3)
+    with q1: query_sector = st.selectbox("Sector", SECTORS, key="env_query_sector")
+    with q2: query_range = st.select_slider("Range", options=list(ranges), value="Last 24 hours", key="env_query_range")
+    with q3: query_resolution = st.select_slider("Resolution", options=list(resolutions), value="5 min",
+                                                 key="env_query_resolution")
+    sector_hist = env_history.query(datetime.now() - ranges[query_range], resolution=resolutions[query_resolution],
+                                    columns=["sector_aqi"], sectors=[SECTORS.index(query_sector)])
+    if sector_hist["ts"].size > 0:
+        query_times = local_times(sector_hist["ts"])
+        fig_sector = go.Figure()
+        # min / max envelope under the mean
+        fig_sector.add_trace(go.Scatter(x=query_times, y=sector_hist["sector_aqi_max"][:, 0], mode="lines",
+                                        line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig_sector.add_trace(go.Scatter(x=query_times, y=sector_hist["sector_aqi_min"][:, 0], mode="lines",
+                                        line=dict(width=0), fill="tonexty", fillcolor="rgba(33,150,243,0.2)",
+                                        name="Min - max"))
+        fig_sector.add_trace(go.Scatter(x=query_times, y=sector_hist["sector_aqi"][:, 0], mode="lines",
+                                        line=dict(color="#2196f3"), name="Mean"))
+        fig_sector.update_layout(xaxis_title="Time", yaxis_title="AQI", height=320, margin=dict(l=10,r=10,t=30,b=10))
+        st.plotly_chart(fig_sector, use_container_width=True)
+        st.caption(f"{sector_hist['ts'].size} buckets from {int(sector_hist['count'].sum())} readings.")
+    else:
+        st.info("No readings in this range yet.")
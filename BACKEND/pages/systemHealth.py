@@ -4,6 +4,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from ui import downsample
+
 # ==============================
 # PAGE CONFIG
 # ==============================
@@ -152,9 +154,9 @@ humidity_history = [65 + np.random.normal(0,5) for _ in range(24)]
 aqi_history = [40 + np.random.normal(0,10) for _ in range(24)]
 
 fig_hist = go.Figure()
-fig_hist.add_trace(go.Scatter(x=hours, y=temp_history, mode="lines+markers", name="Temp °C"))
-fig_hist.add_trace(go.Scatter(x=hours, y=humidity_history, mode="lines+markers", name="Humidity %"))
-fig_hist.add_trace(go.Scatter(x=hours, y=aqi_history, mode="lines+markers", name="AQI"))
+for values, name in ((temp_history, "Temp °C"), (humidity_history, "Humidity %"), (aqi_history, "AQI")):
+    x, y = downsample(hours, values)
+    fig_hist.add_trace(go.Scatter(x=x, y=y, mode="lines+markers", name=name))
 fig_hist.update_layout(xaxis_title="Time", yaxis_title="Value", template="plotly_white", height=400)
 st.plotly_chart(fig_hist, use_container_width=True)
 
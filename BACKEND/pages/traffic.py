@@ -2,9 +2,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from PIL import Image
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from engine import DEFAULT_GRID, SECTORS, ROWS, COLS, TICK_SECONDS, CitySimulation, default_scheduler
+from engine.reports import WINDOW_H
+from engine.sweep import sample_weights, sweep
+from engine.traffic import MAX_POSSIBLE_SEVERITY
+from storage import (DAY, DEFAULT_ARCHIVE_DIR, ROLLUP_LEVELS, default_bus, history_series, local_days,
+                     local_times)
+from ui import (DEFAULT_MAP_PATH, MODE_LABELS, add_map_background, add_report_markers, band_index, downsample,
+                reports_table, sector_centers, sector_grid, sweep_figure, sweep_table)
 
 # ==============================
 # PAGE LAYOUT
@@ -16,17 +23,35 @@ st.divider()
 # ==============================
 # SESSION STATE (history, reports)
 # ==============================
-if "traffic_history" not in st.session_state:
-    # store last 24 aggregate congestion values and per-sector loads
-    st.session_state.traffic_history = []  # list of dicts {ts, avg_cong, sector_loads(list9), incidents}
-if "citizen_reports" not in st.session_state:
-    # example persisted citizen reports
-    st.session_state.citizen_reports = [
-        {"id": 1, "sector": "A1", "issue": "Accident", "severity": 4, "comment": "Multi-car crash", "ts": datetime.now()},
-        {"id": 2, "sector": "B2", "issue": "Heavy Traffic", "severity": 2, "comment": "Slow moving", "ts": datetime.now()},
-        {"id": 3, "sector": "C3", "issue": "Road Hazard", "severity": 3, "comment": "Debris on road", "ts": datetime.now()}
-    ]
-    st.session_state.next_report_id = 4
+# persistent history (kept across restarts): aggregate congestion, incidents and per-sector loads,
+# with minute / hour / day rollups; closed days go to the cold archive
+traffic_history = history_series("traffic", {"avg_congestion": (), "incidents": (), "sector_loads": (len(SECTORS),)},
+                                 rollups=ROLLUP_LEVELS, archive_dir=DEFAULT_ARCHIVE_DIR)
+
+
+@st.cache_resource
+def get_scheduler():
+    # one simulation clock for the whole server: it ticks in the background, reruns only read its snapshot
+    return default_scheduler()
+
+
+scheduler = get_scheduler()
+
+
+@st.cache_resource
+def get_report_bus():
+    # citizen reports of every page and session go through one bus (and on to the admin queue)
+    return default_bus()
+
+
+report_bus = get_report_bus()
+# the traffic slice of the reports: per-sector aggregates, updated as reports come in
+report_index = report_bus.subscribe("traffic", seed=[
+    # example citizen reports
+    {"sector": "A1", "issue": "Accident", "severity": 4, "comment": "Multi-car crash"},
+    {"sector": "B2", "issue": "Heavy Traffic", "severity": 2, "comment": "Slow moving"},
+    {"sector": "C3", "issue": "Road Hazard", "severity": 3, "comment": "Debris on road"}
+])
 
 # ==============================
 # SIDEBAR: Controls + Citizen Input
@@ -63,150 +88,103 @@ with st.sidebar:
     severity_threshold = st.slider("Minimum Severity to Display", 1, 5, 1)
 
     st.write("Add a report (simulated citizen input):")
-    new_sector = st.selectbox("Sector", ["A1","A2","A3","B1","B2","B3","C1","C2","C3"], index=4)
+    new_sector = st.selectbox("Sector", SECTORS, index=len(SECTORS) // 2)
     new_issue = st.selectbox("Issue Type", ["Accident","Heavy Traffic","Road Hazard"])
     new_severity = st.slider("Severity", 1, 5, 3)
     new_comment = st.text_input("Comment (optional)","")
     if st.button("Submit Report"):
-        st.session_state.citizen_reports.append({
-            "id": st.session_state.next_report_id,
+        report = {
             "sector": new_sector,
             "issue": new_issue,
             "severity": new_severity,
             "comment": new_comment,
             "ts": datetime.now()
-        })
-        st.session_state.next_report_id += 1
-        st.success("Report added (simulated).")
+        }
+        if report_bus.publish([report], "traffic"):
+            st.success("Report added (simulated).")
+        else:
+            st.info("The same report was already submitted today.")
 
     st.write("---")
     st.subheader("Simulation Options")
-    simulate_new_step = st.checkbox("Simulate new timestep (append history)", value=True)
-    map_img_path = st.text_input("Map image path (optional)", value=r"C:\Users\User\Desktop\DASHBOARD\ortigas_dashboard\map.png")
+    live_updates = st.checkbox(f"Live updates (simulation ticks every {TICK_SECONDS:.0f} s)", value=True)
+    history_mode = st.radio("History chart", list(MODE_LABELS), format_func=MODE_LABELS.get, horizontal=True)
+    map_img_path = st.text_input("Map image path (optional)", value=DEFAULT_MAP_PATH)
 
 # ==============================
-# SIMULATION: base KPI values by situation
+# Sector grid
 # ==============================
-def simulate_base_traffic(situation):
-    # returns baseline avg congestion percentage, base sector multiplier, base incidents
-    if situation == "Normal":
-        avg_cong = np.random.randint(35, 55)
-        base_sector = 0.8
-        incidents = np.random.randint(0, 2)
-    elif situation == "Rush Hour":
-        avg_cong = np.random.randint(60, 85)
-        base_sector = 1.2
-        incidents = np.random.randint(0, 3)
-    elif situation == "Accident/Incident":
-        avg_cong = np.random.randint(55, 90)
-        base_sector = 1.1
-        incidents = np.random.randint(1, 4)
-    else:  # Road Construction
-        avg_cong = np.random.randint(50, 80)
-        base_sector = 1.0
-        incidents = np.random.randint(0, 2)
-    return float(avg_cong), float(base_sector), int(incidents)
-
-base_avg_cong, base_sector_multiplier, base_incidents = simulate_base_traffic(situation)
+sectors = SECTORS
+rows = ROWS
+cols = COLS
 
 # ==============================
-# Generate per-sector sensor loads (simulated) and incorporate lane_closure/green_light_boost
+# Integrate Citizen Reports into sector scores
 # ==============================
-sectors = ["A1","A2","A3","B1","B2","B3","C1","C2","C3"]
-rows = [0,0,0,1,1,1,2,2,2]
-cols = [0,1,2,0,1,2,0,1,2]
+# (the index is shared by every session: read it under the bus lock)
+with report_bus.lock:
+    # Filter reports shown based on sidebar control
+    filtered_reports = report_index.select(issues_to_show, severity_threshold)
 
-# generate base vehicle load per sector influenced by avg congestion and base_sector_multiplier
-base_load = base_avg_cong * 6  # scale factor to get vehicle numbers per sector
-np_random_seed = int(time.time()) % (2**32 - 1)
-rng = np.random.default_rng(np_random_seed)
-vehicle_load = rng.integers(low=max(50, int(base_load-80)), high=int(base_load+80), size=len(sectors)).astype(float)
+    # fusion inputs come from the recent reports, decayed with age (see engine.reports)
+    now = datetime.now()
 
-# Apply lane_closure: randomly pick sectors to penalize
-if lane_closure > 0:
-    # convert lane_closure% to multiplier for some sectors
-    closed_count = int(np.clip(np.round(lane_closure/20), 0, 3))  # 0..3 closed sectors influenced
-    if closed_count > 0:
-        closed_sectors_idx = rng.choice(len(sectors), size=closed_count, replace=False)
-        for idx in closed_sectors_idx:
-            vehicle_load[idx] *= (1 + lane_closure/100)  # increase load due to closure
-
-# Apply green_light_boost improvement (reduce loads)
-if green_light_boost > 0:
-    vehicle_load *= np.clip(1 - green_light_boost/100, 0.5, 1.0)
+    # severe accident reports (any sector) count as incidents
+    incident_count_from_reports = report_index.recent_severe(now)
 
-# Emergency reroute effect reduces some sector loads randomly
-if emergency_reroute:
-    reroute_idx = rng.choice(len(sectors), size=2, replace=False)
-    for idx in reroute_idx:
-        vehicle_load[idx] *= 0.85  # 15% reduction from reroute
+    # citizen_norm: decayed severity sum per sector divided by (max possible severity per sector)
+    citizen_norm = report_index.citizen_norm(MAX_POSSIBLE_SEVERITY, now)
+
+    # incidents_norm: 1 if at least one recent severe accident report exists in sector else 0
+    incidents_norm = report_index.incidents_norm(now)
 
 # ==============================
-# Integrate Citizen Reports into sector scores
+# SIMULATION: the scheduler steps traffic (sensor loads, overrides, fusion) in the background
+# with these controls from its next tick on; the page shows the latest tick
 # ==============================
-# Filter reports shown based on sidebar control
-filtered_reports = [r for r in st.session_state.citizen_reports if r["issue"] in issues_to_show and r["severity"] >= severity_threshold]
-
-# count reports per sector and accumulate severity per sector
-report_count = {s:0 for s in sectors}
-report_severity_sum = {s:0 for s in sectors}
-incident_count_from_reports = 0
-for r in st.session_state.citizen_reports:
-    sec = r["sector"]
-    if sec in report_count:
-        report_count[sec] += 1
-        report_severity_sum[sec] += r["severity"]
-    # treat Accident as an incident contributor
-    if r["issue"] == "Accident" and r["severity"] >= 3:
-        incident_count_from_reports += 1
-
-# Build sector_score: normalized sensor load (0..1), normalized citizen severity (0..1), incident presence
-# Normalization helpers
-max_sensor = max(1.0, vehicle_load.max())
-sensor_norm = vehicle_load / max_sensor  # 0..1
-
-# citizen_norm: severity sum per sector divided by (max possible severity per sector)
-max_possible_severity = 5 * 5  # assume up to 5 reports each severity 5 as a rough cap
-citizen_norm = np.array([report_severity_sum[s]/max_possible_severity for s in sectors])
-
-# incidents_norm: 1 if at least one severe accident report exists in sector else 0
-incidents_norm = np.array([1.0 if any((r["sector"]==s and r["issue"]=="Accident" and r["severity"]>=3) for r in st.session_state.citizen_reports) else 0.0 for s in sectors])
-
-# Fusion model per sector
-sector_scores = (weight_sensor * sensor_norm) + (weight_citizen * citizen_norm) + (weight_incident * incidents_norm)
-# Map sector_scores to a 0..100 congestion proxy per sector
-sector_congestion_pct = np.clip(sector_scores * 120, 0, 200)  # allow high values for localized spikes
-
-# Aggregate KPIs derived from sector scores
-agg_avg_congestion = float(np.mean(sector_congestion_pct))
-agg_peak_load = float(np.max(vehicle_load))
-agg_incidents = int(base_incidents + incident_count_from_reports)
-
-# Small smoothing using base_avg_cong to keep semi-realistic continuity
-avg_congestion = (agg_avg_congestion * 0.8) + (base_avg_cong * 0.2)
-
-# Ensure types
-avg_congestion = float(np.clip(avg_congestion, 0, 200))
-peak_load = float(np.clip(agg_peak_load, 0, 2000))
-incidents_count = int(np.clip(agg_incidents, 0, 50))
-
-# Append to history if simulate_new_step checked
-if simulate_new_step:
-    st.session_state.traffic_history.append({
-        "ts": datetime.now(),
-        "avg_congestion": avg_congestion,
-        "sector_loads": sector_congestion_pct.tolist(),
-        "incidents": incidents_count
-    })
-    # keep last 24
-    st.session_state.traffic_history = st.session_state.traffic_history[-24:]
-
-# Build a simple DataFrame for last 24 hours (or steps)
-history_df = pd.DataFrame([{
-    "ts": rec["ts"],
-    "avg_congestion": rec["avg_congestion"],
-    "incidents": rec["incidents"]
-} for rec in st.session_state.traffic_history])
+scheduler.set_citizen_inputs("traffic", citizen_norm, incidents_norm, incident_count_from_reports)
+# the controls are city-wide: only what this session changed since its last rerun is applied
+traffic_controls = dict(
+    situation=situation,
+    green_light_boost=green_light_boost,
+    lane_closure=lane_closure,
+    emergency_reroute=emergency_reroute,
+    weight_sensor=weight_sensor,
+    weight_citizen=weight_citizen,
+    weight_incident=weight_incident,
+)
+running_controls = scheduler.set_controls("traffic", st.session_state.get("traffic_controls", traffic_controls),
+                                          **traffic_controls)
+st.session_state.traffic_controls = traffic_controls
+
+
+def record_traffic(ts, tick):
+    step = tick["traffic"]
+    traffic_history.append(ts, avg_congestion=step["avg_congestion"], incidents=step["incidents"],
+                           sector_loads=step["congestion_pct"])
+
+
+scheduler.subscribe("traffic_history", record_traffic)
+if live_updates or "traffic_tick" not in st.session_state:
+    st.session_state.traffic_tick = scheduler.latest  # paused: keep showing the tick seen last
+traffic_tick = st.session_state.traffic_tick
+traffic_step = traffic_tick["traffic"]
+st.caption(f"Simulation tick {traffic_tick['tick']} at {datetime.fromtimestamp(traffic_tick['ts']):%H:%M:%S}; "
+           "control changes apply from the next tick.")
+overridden = [f"{name} = {running_controls[name]}" for name, value in traffic_controls.items()
+              if running_controls[name] != value]
+if overridden:
+    st.info("The simulation is shared by every session; it runs with controls set elsewhere: " + ", ".join(overridden))
+if scheduler.last_error is not None:
+    st.warning(f"Simulation tick failed: {scheduler.last_error}")
+base_avg_cong = float(traffic_step["base_avg_cong"])
+vehicle_load = traffic_step["vehicle_load"]
+sector_congestion_pct = traffic_step["congestion_pct"]
+avg_congestion = float(traffic_step["avg_congestion"])
+peak_load = float(traffic_step["peak_load"])
+incidents_count = int(traffic_step["incidents"])
+rerouted_share = float(traffic_step["rerouted_share"])  # through traffic diverted by emergency rerouting
+signal_delay_saved = float(traffic_step["signal_delay_saved"])  # intersection delay cut by signal retiming
 
 # ==============================
 # TOP KPI BOXES
@@ -244,9 +222,16 @@ else:
 if incidents_count > 0:
     alerts.append(f"{incidents_count} incident(s) estimated (including citizen reports).")
 
+if green_light_boost > 0:
+    alerts.append(f"Traffic light optimization: green splits retimed by up to {green_light_boost}% of the cycle, "
+                  f"{signal_delay_saved:.0%} less delay at intersections.")
+
 if lane_closure > 0:
     alerts.append(f"Lane closures impacting traffic by ~{lane_closure}%.")
 
+if emergency_reroute:
+    alerts.append(f"Emergency rerouting: {rerouted_share:.0%} of through traffic diverted around congested sectors.")
+
 for alert in alerts:
     st.info(alert)
 
@@ -258,66 +243,22 @@ st.divider()
 heat_map_col, color_guide = st.columns(2)
 with heat_map_col:
     st.subheader("Traffic Heat Map (Sensor + Citizen Fusion)")
-    try:
-        map_img = Image.open(map_img_path) if map_img_path else None
-    except:
-        map_img = None
-
     fig_map = go.Figure()
 
-    # add background map if exists
-    if map_img is not None:
-        fig_map.add_layout_image(
-            dict(source=map_img, xref="x", yref="y", x=0, y=3, sizex=3, sizey=3,
-                 sizing="stretch", opacity=1, layer="below"))
-
-    # draw sector rectangles and annotations based on sector_congestion_pct and vehicle_load
-    for i, s in enumerate(sectors):
-        load = sector_congestion_pct[i]
-        # color mapping
-        if load < 60:
-            color = "green"
-        elif load < 85:
-            color = "yellow"
-        elif load < 120:
-            color = "orange"
-        else:
-            color = "red"
-        fig_map.add_shape(
-            type="rect",
-            x0=cols[i], y0=2-rows[i], x1=cols[i]+1, y1=3-rows[i],
-            line=dict(color="black", width=2),
-            fillcolor=color,
-            opacity=0.55
-        )
-        # annotation shows sector name and computed load (veh or %)
-        fig_map.add_annotation(
-            x=cols[i]+0.5, y=2-rows[i]+0.5,
-            text=f"{s}<br>{int(load)}%",
-            showarrow=False,
-            font=dict(color="black", size=11)
-        )
+    # add background map if exists (decoded and scaled once per process)
+    add_map_background(fig_map, map_img_path, y=DEFAULT_GRID.n_rows, sizex=DEFAULT_GRID.n_cols, sizey=DEFAULT_GRID.n_rows)
 
-    # overlay citizen reports (filtered)
-    sector_coords = {s:(c,r) for s,c,r in zip(sectors, cols, rows)}
-    for r in filtered_reports:
-        x, y = sector_coords[r["sector"]]
-        y_plot = 2 - y  # invert row index to match plot y orientation
-        issue_color = {"Accident":"red","Heavy Traffic":"orange","Road Hazard":"blue"}.get(r["issue"], "purple")
-        marker_size = r["severity"] * 10 + 8
-        # add marker trace per report
-        fig_map.add_trace(go.Scatter(
-            x=[x+0.5], y=[y_plot+0.5],
-            mode="markers+text",
-            marker=dict(size=marker_size, color=issue_color, opacity=0.8, line=dict(color="black", width=1)),
-            text=[f"{r['issue']} ({r['severity']})"],
-            textposition="top center",
-            hovertemplate=f"Sector: {r['sector']}<br>Issue: {r['issue']}<br>Severity: {r['severity']}<br>Comment: {r.get('comment','')}",
-            showlegend=False
-        ))
+    # sector cells colored by sector_congestion_pct: green <60, yellow 60-84, orange 85-119, red >=120
+    sector_grid(fig_map, rows, cols,
+                band_index(sector_congestion_pct, [60, 85, 120]), ["green", "yellow", "orange", "red"],
+                text=[f"{s}<br>{int(load)}%" for s, load in zip(sectors, sector_congestion_pct)],
+                opacity=0.55)
+
+    # overlay citizen reports (filtered), all in one marker trace
+    add_report_markers(fig_map, filtered_reports, sector_centers(sectors, rows, cols),
+                       {"Accident":"red","Heavy Traffic":"orange","Road Hazard":"blue"}, "purple",
+                       size_base=8, opacity=0.8)
 
-    fig_map.update_xaxes(visible=False, range=[0,3])
-    fig_map.update_yaxes(visible=False, range=[0,3])
     fig_map.update_layout(height=450, margin=dict(l=0,r=0,t=0,b=0))
     st.plotly_chart(fig_map, use_container_width=True)
 
@@ -338,20 +279,21 @@ with color_guide:
 st.divider()
 
 # ==============================
-# TRENDS: Hourly & Weekly (use history_df if available)
+# TRENDS: Hourly & Weekly (use the stored history if available)
 # ==============================
 trend_cols = st.columns(2)
 
-# Hourly / recent history (last up to 24 steps)
+# stored history (every step kept, up to the ring's capacity)
 with trend_cols[0]:
-    st.subheader("Avg Congestion - Recent Steps (last 24)")
-    if len(st.session_state.traffic_history) > 0:
-        df_hist = pd.DataFrame([{"ts": rec["ts"], "avg_congestion": rec["avg_congestion"]} for rec in st.session_state.traffic_history])
-        df_hist['label'] = df_hist['ts'].dt.strftime("%H:%M:%S")
+    st.subheader("Avg Congestion - History")
+    recent = traffic_history.window(columns=["avg_congestion"])
+    if recent["ts"].size > 0:
+        # at most MAX_POINTS points go to the browser, however long the history
+        times, congestion = downsample(local_times(recent["ts"]), recent["avg_congestion"], mode=history_mode)
         fig_24h = go.Figure()
         fig_24h.add_trace(go.Scatter(
-            x=df_hist['label'], y=df_hist['avg_congestion'],
-            mode="lines+markers", name="Avg Congestion"
+            x=times, y=congestion,
+            mode="lines+markers" if recent["ts"].size <= 48 else "lines", name="Avg Congestion"
         ))
         fig_24h.update_layout(xaxis_title="Time", yaxis_title="Congestion (%)", height=400)
         st.plotly_chart(fig_24h, use_container_width=True)
@@ -364,43 +306,82 @@ with trend_cols[0]:
         fig_24h.update_layout(xaxis_title="Hour", yaxis_title="Congestion (%)", height=400)
         st.plotly_chart(fig_24h, use_container_width=True)
 
-# Weekly (simulated but influenced by base_avg_cong)
+# Daily means over the last 7 / 30 days (day rollups)
 with trend_cols[1]:
-    st.subheader("Avg Congestion - Last 7 Days (simulated)")
-    days = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
-    congestion_week = np.clip(np.random.normal(base_avg_cong, 6, 7), 0, 200)
-    fig_week = go.Figure()
-    fig_week.add_trace(go.Bar(x=days, y=congestion_week, marker_color="crimson"))
-    fig_week.update_layout(xaxis_title="Day", yaxis_title="Congestion (%)", height=400)
-    st.plotly_chart(fig_week, use_container_width=True)
+    trend_days = st.select_slider("Days shown", options=[7, 30], value=7, key="traffic_trend_days")
+    st.subheader(f"Avg Congestion - Last {trend_days} Days")
+    since = datetime.combine(datetime.now().date() - timedelta(days=trend_days - 1), datetime.min.time())
+    daily = traffic_history.query(since, resolution=DAY, columns=["avg_congestion"])
+    if daily["ts"].size > 0:
+        fig_week = go.Figure()
+        fig_week.add_trace(go.Bar(x=local_days(daily["ts"]), y=daily["avg_congestion"], marker_color="crimson"))
+        fig_week.update_layout(xaxis_title="Day", yaxis_title="Congestion (%)", height=400)
+        st.plotly_chart(fig_week, use_container_width=True)
+    else:
+        st.info(f"No history yet — the simulation records a step every {TICK_SECONDS:.0f} s.")
+
+st.divider()
+
+# ==============================
+# FUSION WEIGHT SWEEP: random weight combinations scored on a simulated history
+# ==============================
+@st.cache_data(show_spinner="Sweeping fusion weights...")
+def traffic_weight_sweep(situation, lane_closure, n_weights, n_steps, current):
+    history = CitySimulation(seed=0).fusion_history("traffic", n_steps, situation=situation, lane_closure=lane_closure)
+    weights = sample_weights(n_weights, len(current), np.random.default_rng(0), current)
+    return sweep(history["inputs"], history["outcome"], weights)
+
+st.subheader("Fusion Weight Sweep")
+st.caption("Scores random sensor / citizen / incident weights (summing to 1) on a simulated history against "
+           "where incidents actually happened. Hit rate: incident sectors scored orange or red (>= 85%); "
+           "false alarms: sectors without an incident scored that high; agreement: chance an incident sector "
+           "scores above a quiet one.")
+sweep_cols = st.columns(3)
+with sweep_cols[0]:
+    n_weight_samples = st.select_slider("Weight combinations", [500, 1000, 2000, 4000], value=2000)
+with sweep_cols[1]:
+    sweep_hours = st.select_slider("Simulated history (hours)", [168, 336, 720], value=336)
+with sweep_cols[2]:
+    run_sweep = st.checkbox("Run weight sweep")
+
+if run_sweep:
+    sweep_result = traffic_weight_sweep(situation, lane_closure, n_weight_samples, sweep_hours,
+                                        (weight_sensor, weight_citizen, weight_incident))
+    if np.isnan(sweep_result["agreement"]).all():
+        st.info("No incidents in the simulated history; try another situation.")
+    else:
+        weight_names = ["sensor", "citizen", "incident"]
+        best = sweep_result["rank"][0]
+        st.info(f"Best agreement {sweep_result['agreement'][best]:.3f} (current weights "
+                f"{sweep_result['agreement'][0]:.3f}); {len(sweep_result['front'])} combinations on the Pareto front.")
+        sweep_plot_col, sweep_table_col = st.columns([3, 2])
+        with sweep_plot_col:
+            st.plotly_chart(sweep_figure(sweep_result, weight_names), use_container_width=True)
+        with sweep_table_col:
+            st.dataframe(pd.DataFrame(sweep_table(sweep_result, weight_names)), use_container_width=True)
 
 st.divider()
 
 # ==============================
 # Citizen Reports Table & Controls
 # ==============================
-st.subheader("Citizen Reports (All)")
-reports_df = pd.DataFrame([{
-    "id": r["id"],
-    "ts": r["ts"].strftime("%Y-%m-%d %H:%M:%S"),
-    "sector": r["sector"],
-    "issue": r["issue"],
-    "severity": r["severity"],
-    "comment": r.get("comment","")
-} for r in st.session_state.citizen_reports])
+st.subheader(f"Citizen Reports (last {WINDOW_H:.0f} h)")
+with report_bus.lock:
+    all_reports = list(report_index)
+reports_df = reports_table(all_reports)
 
 # Allow deletion of a report (simulate moderation)
 col1, col2 = st.columns([2,1])
 with col1:
-    st.dataframe(reports_df.sort_values(by="ts", ascending=False), use_container_width=True)
+    if reports_df.empty:
+        st.info(f"No citizen reports in the last {WINDOW_H:.0f} h.")
+    st.dataframe(reports_df, use_container_width=True)
 with col2:
     st.write("Moderation")
-    remove_id = st.number_input("Remove report id (enter id)", min_value=0, step=1, value=0)
+    remove_id = st.text_input("Remove report id (enter id)", "")
     if st.button("Remove Report"):
-        before = len(st.session_state.citizen_reports)
-        st.session_state.citizen_reports = [r for r in st.session_state.citizen_reports if r["id"] != remove_id]
-        after = len(st.session_state.citizen_reports)
-        if after < before:
+        removed = report_bus.remove(remove_id.strip(), "traffic")
+        if removed is not None:
             st.success(f"Removed report id {remove_id}")
         else:
             st.info("No report with that id.")
@@ -2,10 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from PIL import Image
 from datetime import datetime, timedelta
 import random
 
+from engine import DEFAULT_GRID, SECTORS, ROWS, COLS, TICK_SECONDS, CitySimulation, default_scheduler
+from engine.reports import WINDOW_H
+from engine.sweep import sample_weights, sweep
+from engine.waste import MAX_POSSIBLE_SEVERITY, OVERFLOW_ALERT_PCT, daily_pattern
+from storage import DAY, DEFAULT_ARCHIVE_DIR, ROLLUP_LEVELS, default_bus, history_series, local_days
+from ui import (DEFAULT_MAP_PATH, add_map_background, add_report_markers, band_index, reports_table, sector_centers,
+                sector_grid, sweep_figure, sweep_table)
+
+BINS_PER_SECTOR = 40  # smart bins reporting fill per sector
+
 # ----------------------------
 # Page config
 # ----------------------------
@@ -13,34 +22,37 @@ st.set_page_config(page_title="Waste Management Dashboard", layout="wide")
 st.title("WASTE MANAGEMENT DASHBOARD")
 st.divider()
 
-# ----------------------------
-# Sector definitions
-# ----------------------------
-SECTORS = ["A1","A2","A3","B1","B2","B3","C1","C2","C3"]
-ROWS = [0,0,0,1,1,1,2,2,2]
-COLS = [0,1,2,0,1,2,0,1,2]
-
-# Sector types: impacts base daily generation (commercial generates more)
-SECTOR_TYPE = {
-    "A1":"Residential","A2":"Commercial","A3":"Residential",
-    "B1":"Residential","B2":"Commercial","B3":"Residential",
-    "C1":"Residential","C2":"Commercial","C3":"Residential"
-}
-TYPE_BASE_MULT = {"Residential":1.0, "Commercial":1.6}
-
 # ----------------------------
 # Session state initialization
 # ----------------------------
-if "waste_history" not in st.session_state:
-    # list of dicts with timestamp and sector fills (percent), trucks_active, etc.
-    st.session_state.waste_history = []
+# persistent history (kept across restarts): sector fills / risk (percent), trucks active, aggregates,
+# with minute / hour / day rollups; closed days go to the cold archive
+waste_history = history_series("waste", {"sector_sensor_fill": (len(SECTORS),), "sector_risk_pct": (len(SECTORS),),
+                                         "trucks_active": (), "avg_fill": (), "overflow_alerts": ()},
+                               rollups=ROLLUP_LEVELS, archive_dir=DEFAULT_ARCHIVE_DIR)
+
+
+@st.cache_resource
+def get_scheduler():
+    # one simulation clock for the whole server: it ticks in the background, reruns only read its snapshot
+    return default_scheduler()
 
-if "citizen_reports" not in st.session_state:
-    st.session_state.citizen_reports = [
-        {"id":1, "sector":"B2", "issue":"Overflow", "severity":4, "comment":"Bins overflowing near mall", "ts":datetime.now()},
-        {"id":2, "sector":"A3", "issue":"Missed Pickup", "severity":3, "comment":"No collection today", "ts":datetime.now()}
-    ]
-    st.session_state.next_report_id = 3
+
+scheduler = get_scheduler()
+
+
+@st.cache_resource
+def get_report_bus():
+    # citizen reports of every page and session go through one bus (and on to the admin queue)
+    return default_bus()
+
+
+report_bus = get_report_bus()
+# the waste slice of the reports: per-sector aggregates, updated as reports come in
+report_index = report_bus.subscribe("waste", seed=[
+    {"sector":"B2", "issue":"Overflow", "severity":4, "comment":"Bins overflowing near mall"},
+    {"sector":"A3", "issue":"Missed Pickup", "severity":3, "comment":"No collection today"}
+])
 
 # ----------------------------
 # Sidebar controls
@@ -56,7 +68,8 @@ with st.sidebar:
     st.subheader("Operational Overrides")
     extra_trucks = st.slider("Deploy Extra Trucks", 0, 5, 0)
     recycling_boost_pct = st.slider("Recycling Efficiency Boost (%)", 0, 50, 0)
-    early_collection = st.checkbox("Schedule Early Collection (reduce hours since last collect)")
+    # an action: the next tick brings every sector's collection forward once
+    early_collection = st.button("Schedule Early Collection (reduce hours since last collect)")
 
     st.write("---")
     st.subheader("Fusion Weights (Sensor / HoursSinceCollection / CitizenReports)")
@@ -76,72 +89,22 @@ with st.sidebar:
     new_severity = st.slider("Severity", 1, 5, 3)
     new_comment = st.text_input("Comment (optional)", "")
     if st.button("Submit Report"):
-        st.session_state.citizen_reports.append({
-            "id": st.session_state.next_report_id,
+        report = {
             "sector": new_sector,
             "issue": new_issue,
             "severity": new_severity,
             "comment": new_comment,
             "ts": datetime.now()
-        })
-        st.session_state.next_report_id += 1
-        st.success("Citizen report added (simulated).")
+        }
+        if report_bus.publish([report], "waste"):
+            st.success("Citizen report added (simulated).")
+        else:
+            st.info("The same report was already submitted today.")
 
     st.write("---")
     st.subheader("Simulation Options")
-    simulate_step = st.checkbox("Simulate one timestep (append to history)", value=True)
-    map_img_path = st.text_input("Map image path (optional)", value=r"C:\Users\User\Desktop\DASHBOARD\ortigas_dashboard\map.png")
-
-# ----------------------------
-# Semi-realistic generation helpers
-# ----------------------------
-def daily_pattern(hour):
-    """Return multiplier for given hour to simulate daily waste generation curve."""
-    # peak morning (7-9) and evening (17-20) for residential; commercial midday (10-16)
-    if 6 <= hour <= 9:
-        return 1.25
-    if 17 <= hour <= 20:
-        return 1.2
-    if 10 <= hour <= 16:
-        return 1.0
-    if 0 <= hour <= 4:
-        return 0.6
-    return 0.8
-
-def simulate_sector_sensor_fill(sector, base_avg_fill, hours_since_collection, hour_of_day, rng):
-    """Return percent fill for sector based on base avg, sector type, hours since last collection, and noise."""
-    ttype = SECTOR_TYPE.get(sector, "Residential")
-    type_mult = TYPE_BASE_MULT.get(ttype, 1.0)
-    # hours since collection increases fill linearly up to cap
-    hours_factor = 1 + min(hours_since_collection / 24.0, 1.2)
-    pattern = daily_pattern(hour_of_day)
-    noise = rng.normal(0, 5)  # small noise (percent)
-    fill = base_avg_fill * type_mult * hours_factor * pattern + noise
-    # clamp between 0 and 200% (allow overflow >100 for critical)
-    return float(np.clip(fill, 0, 200))
-
-# ----------------------------
-# Determine scenario base parameters
-# ----------------------------
-base_avg_fill = 55  # baseline percent
-trucks_active = random.randint(3,5)
-last_collection_hours = {s: random.randint(6,24) for s in SECTORS}  # hours since last collection per sector
-
-if scenario == "High Waste Generation":
-    base_avg_fill += 20
-    trucks_active += 2
-elif scenario == "Overflow Alerts":
-    base_avg_fill += 30
-elif scenario == "Maintenance Issue":
-    trucks_active = max(1, trucks_active - 1)
-
-# Extra trucks affect effective collection (reduce hours since collection)
-effective_trucks = trucks_active + extra_trucks
-
-# If early collection selected, reduce hours since collection by some value
-if early_collection:
-    for s in SECTORS:
-        last_collection_hours[s] = max(0, last_collection_hours[s] - 8)
+    live_updates = st.checkbox(f"Live updates (simulation ticks every {TICK_SECONDS:.0f} s)", value=True)
+    map_img_path = st.text_input("Map image path (optional)", value=DEFAULT_MAP_PATH)
 
 # Recycling efficiency (affects effective fill of recyclable portion)
 recycling_efficiency = round(min(0.99, 0.3 + random.random() * 0.4 + recycling_boost_pct/100), 2)
@@ -149,96 +112,73 @@ recycling_efficiency = round(min(0.99, 0.3 + random.random() * 0.4 + recycling_b
 # ----------------------------
 # Map citizen reports aggregated per sector
 # ----------------------------
-# Filter shown reports for UI overlay, but fusion uses all reports
-filtered_reports = [r for r in st.session_state.citizen_reports if r["issue"] in issues_to_show and r["severity"] >= severity_threshold]
-
-# For fusion, compute per-sector citizen complaint score (sum severity normalized)
-max_possible = 5 * 5  # rough cap: 5 reports severity 5 each
-citizen_severity_sum = {s:0 for s in SECTORS}
-for r in st.session_state.citizen_reports:
-    if r["sector"] in citizen_severity_sum:
-        citizen_severity_sum[r["sector"]] += r["severity"]
+# (the index is shared by every session: read it under the bus lock)
+with report_bus.lock:
+    # Filter shown reports for UI overlay, but fusion uses all reports
+    filtered_reports = report_index.select(issues_to_show, severity_threshold)
 
-citizen_norm = np.array([citizen_severity_sum[s]/max_possible for s in SECTORS])  # 0..~1
+    # For fusion, compute per-sector citizen complaint score (recent severity, decayed with age, normalized)
+    citizen_norm = report_index.citizen_norm(MAX_POSSIBLE_SEVERITY, datetime.now())  # 0..~1
 
 # ----------------------------
-# Build sensor fills for current timestep
-# ----------------------------
-hour_now = datetime.now().hour
-rng = np.random.default_rng(int(datetime.now().timestamp()) % (2**32 - 1))
-
-sector_sensor_fill = []
-for s in SECTORS:
-    fill = simulate_sector_sensor_fill(s, base_avg_fill, last_collection_hours[s], hour_now, rng)
-    sector_sensor_fill.append(fill)
-
-sector_sensor_fill = np.array(sector_sensor_fill)  # percent, can exceed 100
-
-# ----------------------------
-# Trucks effect: model collections reducing fills for some sectors
-# naive model: each truck collects from N sectors per timestep, reducing their fill
-# ----------------------------
-# trucks service capacity per timestep (approx sectors handled)
-# capacity: number of sectors a single truck can service in this timestep
-truck_capacity_sectors = 2
-capacity = effective_trucks * truck_capacity_sectors
-# choose sectors with highest fills to be collected
-collect_order_idx = np.argsort(-sector_sensor_fill)  # desc
-collected_idx = collect_order_idx[:int(min(capacity, len(SECTORS)))]
-# apply collection reduction
-for idx in collected_idx:
-    # collection reduces fill by a percent proportional to truck effectiveness
-    reduction = 40 + rng.integers(0,20)  # reduce 40-60%
-    sector_sensor_fill[idx] = max(0, sector_sensor_fill[idx] - reduction)
-    last_collection_hours[SECTORS[idx]] = 0  # reset hours since collection
-
-# non-collected sectors increase hours since last collection by 1 hour (for fusion logic)
-for s in SECTORS:
-    last_collection_hours[s] = min(72, last_collection_hours[s] + 1)  # cap at 72 hrs
-
-# ----------------------------
-# Fusion model: sector risk score
+# The scheduler steps waste in the background: sensor fills, truck collections
+# (planned tours over the bins worth collecting) and the fusion risk score
 # SectorScore = w_sensor * sensor_norm + w_hours * hours_norm + w_citizen * citizen_norm
-# We need normalized components
-# ----------------------------
-# sensor normalization (0..1) relative to a plausible max (200%)
-sensor_norm = sector_sensor_fill / 200.0  # now 0..1
-
-# hours normalization (0..1). Assume 0..72 mapped to 0..1
-hours_norm = np.array([last_collection_hours[s]/72.0 for s in SECTORS])
-hours_norm = np.clip(hours_norm, 0, 1)
-
-# citizen_norm already computed above
-
-# sector score
-sector_score = (w_sensor * sensor_norm) + (w_hours * hours_norm) + (w_citizen * citizen_norm)
-# map to 0..100 risk percent and allow weighting sensitivity
-sector_risk_pct = np.clip(sector_score * 120, 0, 200)  # could exceed 100 for urgent
+# with these controls from its next tick on; the page shows the latest tick
+# ----------------------------
+city = scheduler.city
+with scheduler.lock:
+    if city.bins is None:
+        city.attach_bins(BINS_PER_SECTOR)
+        scheduler.tick()  # so the snapshot carries the bin-level model (routes, time to full)
+scheduler.set_citizen_inputs("waste", citizen_norm)
+# the controls are city-wide: only what this session changed since its last rerun is applied
+waste_controls = dict(scenario=scenario, extra_trucks=extra_trucks, w_sensor=w_sensor, w_hours=w_hours,
+                      w_citizen=w_citizen)
+running_controls = scheduler.set_controls("waste", st.session_state.get("waste_controls", waste_controls),
+                                          **waste_controls)
+st.session_state.waste_controls = waste_controls
+if early_collection:
+    scheduler.set_controls("waste", early_collection=True)
+
+
+def record_waste(ts, tick):
+    step = tick["waste"]
+    fill = step["fill_pct"]
+    waste_history.append(ts, sector_sensor_fill=fill, sector_risk_pct=step["risk_pct"],
+                         trucks_active=step["trucks_active"], avg_fill=float(np.mean(fill)),
+                         overflow_alerts=int(np.sum(fill > OVERFLOW_ALERT_PCT)))
+
+
+scheduler.subscribe("waste_history", record_waste)
+if live_updates or "waste_tick" not in st.session_state:
+    st.session_state.waste_tick = scheduler.latest  # paused: keep showing the tick seen last
+waste_tick = st.session_state.waste_tick
+waste_step = waste_tick["waste"]
+st.caption(f"Simulation tick {waste_tick['tick']} at {datetime.fromtimestamp(waste_tick['ts']):%H:%M:%S}; "
+           "control changes apply from the next tick.")
+overridden = [f"{name} = {running_controls[name]}" for name, value in waste_controls.items()
+              if running_controls[name] != value]
+if overridden:
+    st.info("The simulation is shared by every session; it runs with controls set elsewhere: " + ", ".join(overridden))
+if scheduler.last_error is not None:
+    st.warning(f"Simulation tick failed: {scheduler.last_error}")
+sector_sensor_fill = waste_step["fill_pct"]  # mean bin fill percent, can exceed 100
+sector_risk_pct = waste_step["risk_pct"]  # could exceed 100 for urgent
+effective_trucks = waste_step["trucks_active"]
+last_collection_hours = dict(zip(SECTORS, waste_step["hours_since_collection"].tolist()))
+sector_time_to_full = waste_step["time_to_full_h"]  # hours until the sector's first bin is full
+truck_routes = waste_step["routes"]  # bin indices per truck, in visiting order
 
 # ----------------------------
 # Aggregate KPIs derived from sector risk / sensor fills
 # ----------------------------
 agg_avg_fill = float(np.mean(sector_sensor_fill))
-agg_overflow_alerts = int(np.sum(sector_sensor_fill > 85))  # sectors above threshold
+agg_overflow_alerts = int(np.sum(sector_sensor_fill > OVERFLOW_ALERT_PCT))  # sectors above threshold
 agg_trucks_active = effective_trucks
 agg_recycling_eff = recycling_efficiency
 agg_last_collection_avg = float(np.mean([last_collection_hours[s] for s in SECTORS]))
 
-# Append to history if simulate_step checked
-if simulate_step:
-    st.session_state.waste_history.append({
-        "ts": datetime.now(),
-        "sector_sensor_fill": sector_sensor_fill.tolist(),
-        "sector_risk_pct": sector_risk_pct.tolist(),
-        "trucks_active": effective_trucks,
-        "avg_fill": agg_avg_fill,
-        "overflow_alerts": agg_overflow_alerts
-    })
-    st.session_state.waste_history = st.session_state.waste_history[-24:]
-
-# Build small history df for KPIs chart
-history_df = pd.DataFrame([{"ts": rec["ts"], "avg_fill": rec["avg_fill"], "overflow_alerts": rec["overflow_alerts"]} for rec in st.session_state.waste_history])
-
 # ----------------------------
 # KPI Boxes
 # ----------------------------
@@ -282,57 +222,39 @@ st.divider()
 heat_col, guide_col = st.columns([3,1])
 with heat_col:
     st.subheader("City Sector Bin Fill & Risk Heat Map")
-    # try to load image
-    try:
-        map_img = Image.open(map_img_path) if map_img_path else None
-    except:
-        map_img = None
+    fig_map = go.Figure()
+    # background map, decoded and scaled once per process
+    if not add_map_background(fig_map, map_img_path, y=DEFAULT_GRID.n_rows, sizex=DEFAULT_GRID.n_cols, sizey=DEFAULT_GRID.n_rows) and map_img_path:
         st.warning("Map not found at provided path — drawing grid only.")
 
-    fig_map = go.Figure()
-    if map_img is not None:
-        fig_map.add_layout_image(dict(source=map_img, xref="x", yref="y", x=0, y=3, sizex=3, sizey=3, sizing="stretch", opacity=1, layer="below"))
-
-    # draw sectors with color based on sector_risk_pct
-    for i, s in enumerate(SECTORS):
-        risk = sector_risk_pct[i]
-        fillpct = sector_sensor_fill[i]
-        # color mapping: green <60, yellow 60-84, orange 85-119, red >=120
-        if risk < 60:
-            color = "green"
-        elif risk < 85:
-            color = "yellow"
-        elif risk < 120:
-            color = "orange"
-        else:
-            color = "red"
-
-        fig_map.add_shape(type="rect", x0=COLS[i], y0=2-ROWS[i], x1=COLS[i]+1, y1=3-ROWS[i],
-                          line=dict(color="black", width=2), fillcolor=color, opacity=0.5)
-        fig_map.add_annotation(x=COLS[i]+0.5, y=2-ROWS[i]+0.5,
-                               text=f"{s}<br>{int(fillpct)}% / R{int(risk)}",
-                               showarrow=False, font=dict(color="black", size=11))
-
-    # overlay filtered citizen reports as markers (size ~ severity, color by issue)
-    sector_coords = {s:(c,r) for s,c,r in zip(SECTORS, COLS, ROWS)}
-    issue_color_map = {"Overflow":"red","Missed Pickup":"orange","Illegal Dumping":"purple"}
-    for r in filtered_reports:
-        x, y = sector_coords[r["sector"]]
-        y_plot = 2 - y
-        color = issue_color_map.get(r["issue"], "black")
-        size = r["severity"] * 10 + 6
+    # sectors colored by sector_risk_pct: green <60, yellow 60-84, orange 85-119, red >=120
+    sector_grid(fig_map, ROWS, COLS,
+                band_index(sector_risk_pct, [60, 85, 120]), ["green", "yellow", "orange", "red"],
+                text=[f"{s}<br>{int(fillpct)}% / R{int(risk)}<br>{'FULL' if ttf <= 0 else f'full in {ttf:.0f}h'}"
+                      for s, fillpct, risk, ttf in zip(SECTORS, sector_sensor_fill, sector_risk_pct, sector_time_to_full)],
+                opacity=0.5)
+
+    # overlay filtered citizen reports as one marker trace (size ~ severity, color by issue)
+    add_report_markers(fig_map, filtered_reports, sector_centers(SECTORS, ROWS, COLS),
+                       {"Overflow":"red","Missed Pickup":"orange","Illegal Dumping":"purple"}, "black",
+                       size_base=6, opacity=0.85)
+
+    # planned truck tours: depot -> bins -> depot
+    depot_x, depot_y = city.depot
+    for k, route in enumerate(truck_routes):
+        if len(route) == 0:
+            continue
         fig_map.add_trace(go.Scatter(
-            x=[x+0.5], y=[y_plot+0.5],
-            mode="markers+text",
-            marker=dict(size=size, color=color, opacity=0.85, line=dict(color="black", width=1)),
-            text=[f"{r['issue']} ({r['severity']})"],
-            textposition="top center",
-            hovertemplate=f"Sector: {r['sector']}<br>Issue: {r['issue']}<br>Severity: {r['severity']}<br>Comment: {r.get('comment','')}",
+            x=np.concatenate(([depot_x], city.bins["x"][route], [depot_x])),
+            y=DEFAULT_GRID.n_rows - np.concatenate(([depot_y], city.bins["y"][route], [depot_y])),
+            mode="lines+markers",
+            line=dict(width=2),
+            marker=dict(size=4),
+            name=f"Truck {k+1}",
+            hovertemplate=f"Truck {k+1}: {len(route)} bins<extra></extra>",
             showlegend=False
         ))
 
-    fig_map.update_xaxes(visible=False, range=[0,3])
-    fig_map.update_yaxes(visible=False, range=[0,3])
     fig_map.update_layout(height=520, margin=dict(l=0,r=0,t=0,b=0))
     st.plotly_chart(fig_map, use_container_width=True)
 
@@ -347,15 +269,34 @@ with guide_col:
         <div style="background-color:orange; width:80px; height:26px; text-align:center; color:white; line-height:26px;">Elevated</div>
         <div style="background-color:red; width:60px; height:26px; text-align:center; color:white; line-height:26px;">Critical</div>
       </div>
-      <p style="font-size:13px;">Text: SensorFill% / Risk%</p>
+      <p style="font-size:13px;">Text: SensorFill% / Risk% / time until the first bin is full</p>
       <p style="font-size:13px;">Citizen markers: size ~ severity</p>
+      <p style="font-size:13px;">Lines: planned truck tours from the depot</p>
     </div>
     """, unsafe_allow_html=True)
 
 st.divider()
 
 # ----------------------------
-# Trends: 24-hour (stacked by waste type) & 7-day (simulated)
+# Truck dispatch plan for this timestep
+# ----------------------------
+st.subheader("Truck Dispatch Plan")
+dispatch_table = pd.DataFrame([{
+    "truck": k + 1,
+    "bins": len(route),
+    "sectors": ", ".join(SECTORS[i] for i in np.unique(city.bins["sector"][route])),
+    "load (full bins)": round(float(waste_step["route_load"][k]), 1),
+    "distance (km)": round(float(waste_step["route_distance_km"][k]), 2),
+    "tour (min)": int(round(waste_step["route_duration_h"][k] * 60))
+} for k, route in enumerate(truck_routes)])
+st.dataframe(dispatch_table, use_container_width=True)
+if waste_step["unserved_bins"]:
+    st.caption(f"{waste_step['unserved_bins']} bins worth collecting did not fit in this shift's tours.")
+
+st.divider()
+
+# ----------------------------
+# Trends: 24-hour (stacked by waste type, simulated) & daily fill (stored history)
 # ----------------------------
 trend_col1, trend_col2 = st.columns(2)
 with trend_col1:
@@ -387,46 +328,84 @@ with trend_col1:
     st.plotly_chart(fig_24, use_container_width=True)
 
 with trend_col2:
-    st.subheader("Waste Collected - Last 7 Days (kg) — simulated")
-    days = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
-    rng3 = np.random.default_rng(int(datetime.now().timestamp()) % (2**32 - 1) + 11)
-    weekly = {}
-    for wt in waste_types:
-        base = 1200 if wt=="Organic" else 700 if wt=="General" else 400 if wt=="Recyclable" else 100
-        series = [max(0, rng3.normal(base, base*0.12)) for _ in range(7)]
-        weekly[wt] = series
-    fig_week = go.Figure()
-    for wt in waste_types:
-        fig_week.add_trace(go.Bar(x=days, y=weekly[wt], name=wt))
-    fig_week.update_layout(barmode="stack", xaxis_title="Day", yaxis_title="Waste (kg)", height=420)
-    st.plotly_chart(fig_week, use_container_width=True)
+    # daily means over the last 7 / 30 days (day rollups)
+    trend_days = st.select_slider("Days shown", options=[7, 30], value=7, key="waste_trend_days")
+    st.subheader(f"Avg Fill & Overflow Alerts - Last {trend_days} Days")
+    since = datetime.combine(datetime.now().date() - timedelta(days=trend_days - 1), datetime.min.time())
+    daily = waste_history.query(since, resolution=DAY, columns=["avg_fill", "overflow_alerts"])
+    if daily["ts"].size > 0:
+        days = local_days(daily["ts"])
+        fig_week = go.Figure()
+        fig_week.add_trace(go.Bar(x=days, y=daily["avg_fill"], name="Avg fill (%)"))
+        fig_week.add_trace(go.Scatter(x=days, y=daily["overflow_alerts"], name="Sectors over threshold (avg)",
+                                      mode="lines+markers", yaxis="y2"))
+        fig_week.update_layout(xaxis_title="Day", yaxis_title="Fill (%)", height=420,
+                               yaxis2=dict(title="Sectors", overlaying="y", side="right", rangemode="tozero"))
+        st.plotly_chart(fig_week, use_container_width=True)
+    else:
+        st.info(f"No history yet — the simulation records a step every {TICK_SECONDS:.0f} s.")
+
+st.divider()
+
+# ----------------------------
+# Fusion weight sweep: random weight combinations scored on a simulated history
+# ----------------------------
+@st.cache_data(show_spinner="Sweeping fusion weights...")
+def waste_weight_sweep(scenario, extra_trucks, n_weights, n_steps, current):
+    history = CitySimulation(seed=0).fusion_history("waste", n_steps, scenario=scenario, extra_trucks=extra_trucks)
+    weights = sample_weights(n_weights, len(current), np.random.default_rng(0), current)
+    return sweep(history["inputs"], history["outcome"], weights)
+
+st.subheader("Fusion Weight Sweep")
+st.caption(f"Scores random sensor / hours / citizen weights (summing to 1) on a simulated history against the "
+           f"sectors that raised an overflow alert (fill > {OVERFLOW_ALERT_PCT}%) the next hour. Hit rate: those "
+           f"sectors scored orange or red (>= 85%) the hour before; false alarms: other sectors scored that high; "
+           f"agreement: chance an overflowing sector scores above one that does not.")
+sweep_cols = st.columns(3)
+with sweep_cols[0]:
+    n_weight_samples = st.select_slider("Weight combinations", [500, 1000, 2000, 4000], value=2000)
+with sweep_cols[1]:
+    sweep_hours = st.select_slider("Simulated history (hours)", [168, 336, 720], value=336)
+with sweep_cols[2]:
+    run_sweep = st.checkbox("Run weight sweep")
+
+if run_sweep:
+    sweep_result = waste_weight_sweep(scenario, extra_trucks, n_weight_samples, sweep_hours,
+                                      (w_sensor, w_hours, w_citizen))
+    if np.isnan(sweep_result["agreement"]).all():
+        st.info("No overflow alerts in the simulated history; try a busier scenario.")
+    else:
+        weight_names = ["sensor", "hours", "citizen"]
+        best = sweep_result["rank"][0]
+        st.info(f"Best agreement {sweep_result['agreement'][best]:.3f} (current weights "
+                f"{sweep_result['agreement'][0]:.3f}); {len(sweep_result['front'])} combinations on the Pareto front.")
+        sweep_plot_col, sweep_table_col = st.columns([3, 2])
+        with sweep_plot_col:
+            st.plotly_chart(sweep_figure(sweep_result, weight_names), use_container_width=True)
+        with sweep_table_col:
+            st.dataframe(pd.DataFrame(sweep_table(sweep_result, weight_names)), use_container_width=True)
 
 st.divider()
 
 # ----------------------------
 # Citizen Reports table and moderation
 # ----------------------------
-st.subheader("Citizen Reports (All)")
-reports_table = pd.DataFrame([{
-    "id": r["id"],
-    "ts": r["ts"].strftime("%Y-%m-%d %H:%M:%S"),
-    "sector": r["sector"],
-    "issue": r["issue"],
-    "severity": r["severity"],
-    "comment": r.get("comment","")
-} for r in st.session_state.citizen_reports])
+st.subheader(f"Citizen Reports (last {WINDOW_H:.0f} h)")
+with report_bus.lock:
+    all_reports = list(report_index)
+reports_df = reports_table(all_reports)
 
 colA, colB = st.columns([3,1])
 with colA:
-    st.dataframe(reports_table.sort_values(by="ts", ascending=False), use_container_width=True)
+    if reports_df.empty:
+        st.info(f"No citizen reports in the last {WINDOW_H:.0f} h.")
+    st.dataframe(reports_df, use_container_width=True)
 with colB:
     st.write("Moderation")
-    remove_id = st.number_input("Remove report id", min_value=0, step=1, value=0)
+    remove_id = st.text_input("Remove report id", "")
     if st.button("Remove Report"):
-        before = len(st.session_state.citizen_reports)
-        st.session_state.citizen_reports = [r for r in st.session_state.citizen_reports if r["id"] != remove_id]
-        after = len(st.session_state.citizen_reports)
-        if after < before:
+        removed = report_bus.remove(remove_id.strip(), "waste")
+        if removed is not None:
             st.success(f"Removed report id {remove_id}")
         else:
             st.info("No report with that id.")
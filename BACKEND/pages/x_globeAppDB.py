@@ -4,7 +4,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import plotly.graph_objects as go
 from streamlit_autorefresh import st_autorefresh
-import uuid
+
+from engine import SECTORS
+from storage import default_bus
 # ============================================================
 # AUTO REFRESH (every 10 seconds)
 # ============================================================
@@ -18,6 +20,13 @@ st_autorefresh(interval=30_000, key="refresh")
 st.set_page_config(page_title="GlobeOne — City Insights", layout="wide")
 st.title("GlobeOne App: City Insights Dashboard")
 
+
+@st.cache_resource
+def get_report_bus():
+    # citizen reports of every page and session go through one bus (and on to the admin queue)
+    return default_bus()
+
+
 # ============================================================
 # REWARDS SECTION
 # ============================================================
@@ -240,30 +249,22 @@ with tab1:
 with tab2:
     st.subheader("Submit a New Feedback")
     
-    if "reports" not in st.session_state:
-        st.session_state.reports = []
+    report_bus = get_report_bus()
 
     with st.form("feedback_form", clear_on_submit=True):
-        sector = st.selectbox("Sector", ["A1","A2","A3","B1","B2","B3","C1","C2","C3"])
+        sector = st.selectbox("Sector", SECTORS)
         issue_type = st.selectbox("Issue Type", ["Overflow","Missed Pickup","Illegal Dumping","Other"])
         severity = st.slider("Severity (1=Minor, 5=Critical)", 1, 5, 2)
         comment = st.text_area("Describe the issue")
         submitted = st.form_submit_button("Submit Feedback")
 
         if submitted:
-            # Convert numeric severity to string for admin
-            severity_str = ["Minor","Minor","Major","Major","Critical"][severity-1]
-            
-            st.session_state.reports.append({
-                "id": str(uuid.uuid4())[:8],
+            # the bus maps the 1..5 severity to the admin panel's Minor / Major / Critical
+            report_bus.publish([{
                 "ts": datetime.now(),
-                "name": "Citizen",
-                "category": issue_type,
-                "location_text": sector,
-                "severity": severity_str,
-                "description": comment,
-                "status": "Submitted",
-                "assigned_to": "",
-                "response_time_days": None
-            })
+                "sector": sector,
+                "issue": issue_type,
+                "severity": severity,
+                "comment": comment
+            }])
             st.success("✅ Feedback submitted successfully!")
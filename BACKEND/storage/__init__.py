@@ -0,0 +1,24 @@
+"""
+Persistent storage for the Ortigas dashboard (no Streamlit): the pages open a
+store once per process and query it instead of keeping everything in session_state,
+and publish citizen reports through the process-wide ReportBus (default_bus) that
+writes them to the store.
+Page histories are persistent ring-buffer time series (RingSeries, TieredSeries
+with minute / hour / day rollups answering time-range queries) that hand closed
+days to a day-partitioned cold archive (DayArchive), Gorilla-compressed by codec.
+"""
+from .report_bus import DOMAIN_ISSUES, ReportBus, default_bus
+from .report_store import DEFAULT_DB_PATH, SEARCH_COUNT_CAP, TRANSITIONS, ReportStore, content_hash, default_store
+from .archive import DEFAULT_ARCHIVE_DIR, DayArchive, daily_means, local_days, local_times
+from .codec import decode_floats, decode_timestamps, encode_floats, encode_timestamps
+from .timeseries import (DAY, DEFAULT_CAPACITY, DEFAULT_HISTORY_DIR, HOUR, MINUTE, ROLLUP_LEVELS, RingSeries,
+                         TieredSeries, history_series)
+
+__all__ = [
+    "DOMAIN_ISSUES", "ReportBus", "default_bus",
+    "DEFAULT_DB_PATH", "SEARCH_COUNT_CAP", "TRANSITIONS", "ReportStore", "content_hash", "default_store",
+    "DEFAULT_ARCHIVE_DIR", "DayArchive", "daily_means", "local_days", "local_times",
+    "decode_floats", "decode_timestamps", "encode_floats", "encode_timestamps",
+    "DAY", "DEFAULT_CAPACITY", "DEFAULT_HISTORY_DIR", "HOUR", "MINUTE", "ROLLUP_LEVELS", "RingSeries", "TieredSeries",
+    "history_series",
+]
@@ -0,0 +1,214 @@
+"""
+Cold archive of the page histories: day-partitioned, column-per-file storage (no Streamlit).
+
+The ring buffers (timeseries.RingSeries) keep the latest week of steps. A ring with
+an archive hands its rows over whenever a new local day starts, so everything older
+stays queryable. The layout is hive-style, one directory per domain and day:
+
+    DEFAULT_ARCHIVE_DIR/<domain>/day=YYYY-MM-DD/ts.gor
+                                               /<column>.gor
+
+A partition is written once, by the rollover that closes its day, into a temporary
+directory that is renamed into place. Per-sector columns are stored transposed,
+(sectors, rows), so one sector's series is contiguous on disk. Every file is
+Gorilla-compressed (codec; timestamps kept to the microsecond): one format, so a
+reader never has to guess which kind of partition it is looking at. Columns that
+do not compress (noisy per-sector readings) are stored as raw blocks by the codec
+and cost no more than plain arrays.
+
+Only what a query asks for is read:
+
+- columns: only the requested columns' files are opened (column pruning);
+- time range: days outside it are skipped by directory name, and inside a day
+  the rows are sliced by binary search on the sorted timestamps;
+- sectors: only those rows of the transposed per-sector columns are read
+  (only the codec blocks holding them are decoded).
+
+(Parquet would give the same pruning, but it needs pyarrow. The codec keeps the
+archive NumPy-only, like the rest of storage/.)
+"""
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .codec import decode_floats, decode_timestamps, encode_floats, encode_timestamps
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "archive")
+TS = "ts"
+TS_RESOLUTION = 1e-6  # compressed timestamps are kept to the microsecond
+PARTITION = "day={}"  # partition directory name, e.g. day=2025-01-31
+_PARTITION_RE = re.compile(r"^day=(\d{4}-\d{2}-\d{2})$")
+
+
+def local_times(ts):
+    """Epoch seconds as datetime64 wall-clock times in the local time zone (for chart axes)."""
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    return ((np.asarray(ts, dtype=np.float64) + offset) * 1000).astype("datetime64[ms]")
+
+
+def local_days(ts):
+    """Epoch seconds -> local calendar day (datetime64[D])."""
+    return local_times(ts).astype("datetime64[D]")
+
+
+def _epoch(t):
+    """datetime or epoch seconds -> epoch seconds (None stays None)."""
+    if t is None:
+        return None
+    return t.timestamp() if isinstance(t, datetime) else float(t)
+
+
+def daily_means(ts, values):
+    """
+    Mean of values (rows in time order, any trailing shape) per local day:
+    (days datetime64[D], means (days, ...)).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    days = local_days(ts)
+    if days.size == 0:
+        return days, values[:0]
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    counts = np.diff(np.append(starts, days.size)).reshape((-1,) + (1,) * (values.ndim - 1))
+    return days[starts], np.add.reduceat(values, starts, axis=0) / counts
+
+
+class DayArchive:
+    """
+    Day-partitioned archive of one history. columns maps a metric name to its
+    per-sample shape (as for RingSeries): () or (n_sectors,).
+    """
+
+    def __init__(self, directory, columns, dtype=np.float32):
+        if TS in columns:
+            raise ValueError(f"{TS!r} is reserved for the timestamps")
+        self.directory = directory
+        self.columns = {name: tuple(shape) for name, shape in columns.items()}
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._last_ts = None
+        os.makedirs(directory, exist_ok=True)
+
+    def days(self):
+        """The archived days, oldest first (datetime64[D])."""
+        names = (_PARTITION_RE.match(name) for name in os.listdir(self.directory))
+        return np.array(sorted(m.group(1) for m in names if m), dtype="datetime64[D]")
+
+    def _path(self, day, name=None):
+        path = os.path.join(self.directory, PARTITION.format(day))
+        return path if name is None else os.path.join(path, name + ".gor")
+
+    def _load(self, day, name):
+        with open(self._path(day, name), "rb") as f:
+            return f.read()
+
+    def _load_ts(self, day):
+        return decode_timestamps(self._load(day, TS))
+
+    @property
+    def last_ts(self):
+        """Timestamp of the newest archived row (None while the archive is empty)."""
+        if self._last_ts is None:
+            days = self.days()
+            if days.size:
+                ts = self._load_ts(days[-1])
+                self._last_ts = float(ts[-1]) if ts.size else None
+        return self._last_ts
+
+    def write(self, ts, **values):
+        """
+        Archive rows (ts: epoch seconds in time order; columns left out are stored as
+        NaN), one partition per local day. Rows of a day that is already archived are
+        merged into its partition.
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        if ts.size == 0:
+            return
+        days = local_days(ts)
+        bounds = np.append(np.flatnonzero(np.r_[True, days[1:] != days[:-1]]), ts.size)
+        with self._lock:
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                self._write_day(days[lo], ts[lo:hi], {name: col[lo:hi] for name, col in values.items()})
+            self._last_ts = None
+
+    def _write_day(self, day, ts, values):
+        rows = {TS: ts}
+        for name, shape in self.columns.items():
+            col = values.get(name)
+            col = np.full((ts.size,) + shape, np.nan, dtype=self.dtype) if col is None else np.asarray(col, self.dtype)
+            rows[name] = col.reshape((ts.size,) + shape)
+        path = self._path(day)
+        if os.path.isdir(path):
+            # merge with what the day already holds (a restart can archive a day twice)
+            old = self._read_day(day, None, None, list(self.columns), None)
+            rows = {name: np.concatenate([old[name], col]) for name, col in rows.items()}
+            order = np.argsort(rows[TS], kind="stable")
+            rows = {name: col[order] for name, col in rows.items()}
+
+        tmp = f"{path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, col in rows.items():
+            # per-sector columns transposed: one sector's series is contiguous
+            col = np.ascontiguousarray(col.T) if col.ndim > 1 else col
+            with open(os.path.join(tmp, f"{name}.gor"), "wb") as f:
+                f.write(encode_timestamps(col) if name == TS else encode_floats(col))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+
+    def _read_day(self, day, start, end, columns, sectors):
+        ts = self._load_ts(day)
+        lo = 0 if start is None else int(np.searchsorted(ts, start))
+        hi = ts.size if end is None else int(np.searchsorted(ts, end))
+        out = {TS: ts[lo:hi]}
+        for name in columns:
+            out[name] = self._read_column(day, name, ts.size, lo, hi, sectors)
+        return out
+
+    def _read_column(self, day, name, rows, lo, hi, sectors):
+        """Rows lo..hi of one column; per-sector columns decode only the blocks of `sectors`."""
+        data = self._load(day, name)
+        if not self.columns[name]:
+            return decode_floats(data, lo, hi).astype(self.dtype, copy=False)
+        if sectors is None:
+            col = decode_floats(data)[:, lo:hi]
+        else:
+            col = np.stack([decode_floats(data, s * rows + lo, s * rows + hi) for s in sectors.tolist()]) \
+                if sectors.size else np.empty((0, hi - lo), self.dtype)
+        return np.ascontiguousarray(col.T, dtype=self.dtype)
+
+    def read(self, start=None, end=None, columns=None, sectors=None):
+        """
+        Rows with start <= ts < end (datetimes or epoch seconds, open-ended when None)
+        as {"ts", column: array}, oldest first. columns: the columns to read (default
+        all); sectors: indices of the sectors to read from the per-sector columns
+        (default all), which come back shaped (rows, len(sectors)).
+        """
+        start, end = _epoch(start), _epoch(end)
+        columns = list(self.columns if columns is None else columns)
+        if sectors is not None:
+            sectors = np.sort(np.asarray(sectors, dtype=np.intp))
+        days = self.days()
+        if start is not None:
+            days = days[days >= local_days(start)]
+        if end is not None:
+            days = days[days <= local_days(end)]
+        parts = [self._read_day(day, start, end, columns, sectors) for day in days]
+
+        out = {TS: np.concatenate([p[TS] for p in parts]) if parts else np.empty(0)}
+        for name in columns:
+            if parts:
+                out[name] = np.concatenate([p[name] for p in parts])
+            else:
+                shape = self.columns[name]
+                if shape and sectors is not None:
+                    shape = (sectors.size,)
+                out[name] = np.empty((0,) + shape, dtype=self.dtype)
+        return out
@@ -0,0 +1,270 @@
+"""
+Gorilla-style compression for the archived histories (NumPy only, no Streamlit).
+
+Sensor histories are slowly varying floats at a near-fixed cadence, the case the
+Gorilla paper (Facebook's in-memory TSDB) compresses well:
+
+- timestamps: delta-of-delta of integer microseconds, zigzag-mapped to unsigned;
+  a fixed cadence makes them all zero.
+- floats: each value XORed with the previous one; consecutive readings share sign,
+  exponent and leading mantissa bits (and equal readings XOR to zero), so only a
+  short window of "meaningful" bits is left.
+
+Gorilla picks that window per value with bit-level control codes, which has to be
+decoded one value at a time. Here it is picked per block of BLOCK_SIZE values: the
+block stores its window (width and trailing-zero shift) once and every value's
+meaningful bits packed at that width. Blocks are byte-aligned and independent
+(each keeps its first value raw), so encoding and decoding are a few whole-array
+NumPy passes per distinct width, and a slice decodes only the blocks it covers.
+
+Noisy readings leave little to remove: XOR windows of 24-31 bits out of a float32's
+32 are typical, which bounds those columns near the entropy of their mantissas
+(1.0-1.3x) whatever the codec. A float block whose window would save at most one
+bit per value is stored raw instead (width = the full item size, values not
+XORed), so it costs no more than the plain array and decodes as a copy.
+
+The payload holds the full blocks grouped by width, then the partial last block.
+Eight w-bit values take exactly w bytes, so within a width group value j of every
+group of eight sits at a fixed stride: decoding reads it for all of them through
+one strided uint64 view, then shifts and masks (widths up to 56 bits; wider ones
+and the last block go through np.unpackbits). Bits are packed least significant
+first, so the views read in native (little-endian) order without byte swaps.
+
+Stream layout (little-endian):
+    header    magic, kind, itemsize, count, block size, shape
+    per block base value, width, shift        (arrays of n_blocks)
+    payload   blocks' width * len bits, each padded to a whole byte, + 8 zero bytes
+
+(A float block of width 8 * itemsize is a raw block.)
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"GOR2"
+BLOCK_SIZE = 1024  # values per block: one width / shift each
+KIND_FLOAT = 0
+KIND_TIME = 1
+_HEADER = struct.Struct("<4sBBQII")  # magic, kind, itemsize, count, block size, ndim
+_UINT = {4: np.uint32, 8: np.uint64}
+_FLOAT = {4: np.float32, 8: np.float64}
+
+
+def _bit_length(x):
+    """Bits needed for each unsigned value (0 for 0), exact for 64-bit values."""
+    x = x.astype(np.uint64)
+    n = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        n += big * shift
+        x = np.where(big, x >> np.uint64(shift), x)
+    return n + (x > 0)
+
+
+def _blocks(count, block):
+    starts = np.arange(0, count, block)
+    return starts, np.minimum(starts + block, count) - starts
+
+
+def _offsets(widths, lengths, block):
+    """Payload offset of every block: full blocks by width (then block order), the partial one last."""
+    sizes = (widths.astype(np.int64) * lengths + 7) // 8
+    order = np.lexsort((np.arange(widths.size), widths, lengths != block))
+    offsets = np.empty(widths.size, dtype=np.int64)
+    offsets[order] = np.cumsum(sizes[order]) - sizes[order]
+    return offsets, int(sizes.sum())
+
+
+def _pack(x, bits, block, raw=None):
+    """
+    Bit-pack unsigned values x by block -> (widths, shifts, payload bytes). raw: blocks
+    packed at the full width `bits` without a shift.
+    """
+    starts, lengths = _blocks(x.size, block)
+    window = np.bitwise_or.reduceat(x, starts) if x.size else x[:0]
+    shifts = np.where(window == 0, 0, _bit_length(window & (~window + 1)) - 1)
+    widths = _bit_length(window >> shifts.astype(x.dtype))
+    if raw is not None:
+        widths[raw], shifts[raw] = bits, 0
+    offsets, size = _offsets(widths, lengths, block)
+    payload = np.zeros(size + 8, dtype=np.uint8)  # zero tail: decoding reads 8 bytes at a time
+    for w in np.unique(widths[widths > 0]).tolist():
+        for full in (True, False):
+            idx = np.flatnonzero((widths == w) & ((lengths == block) == full))
+            if idx.size == 0:
+                continue
+            n = int(lengths[idx[0]])
+            rows = (np.repeat(starts[idx], n) + np.tile(np.arange(n), idx.size))
+            values = (x[rows] >> np.repeat(shifts[idx], n).astype(x.dtype)).astype("<u8")
+            # low w bits of each value, least significant first
+            bits_ = np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")[:, :w]
+            packed = np.packbits(bits_.reshape(idx.size, n * w), axis=1, bitorder="little")
+            payload[(offsets[idx][:, None] + np.arange(packed.shape[1])).ravel()] = packed.ravel()
+    return widths.astype(np.uint8), shifts.astype(np.uint8), payload
+
+
+def _unpack(widths, shifts, payload, count, block, bits, first=0, last=None):
+    """Unsigned values of blocks first..last-1 from a payload written by _pack."""
+    dtype = _UINT[bits // 8]
+    starts, lengths = _blocks(count, block)
+    offsets, _ = _offsets(widths, lengths, block)
+    last = starts.size if last is None else last
+    lo = int(starts[first]) if first < starts.size else count
+    hi = int(starts[last - 1] + lengths[last - 1]) if last > first else lo
+    x = np.zeros(hi - lo, dtype=dtype)
+    x_full = x[:x.size // block * block].reshape(-1, block)  # the selected full blocks, as rows
+    sel = np.arange(first, last)
+    for w in np.unique(widths[sel][widths[sel] > 0]).tolist():
+        for full in (True, False):
+            idx = sel[(widths[sel] == w) & ((lengths[sel] == block) == full)]
+            if idx.size == 0:
+                continue
+            if full and w == bits:
+                # full-width blocks are stored as the values themselves
+                g0 = int(offsets[idx[0]])
+                rows = (offsets[idx] - g0) // (block * bits // 8)
+                values = np.frombuffer(payload, dtype=f"<u{bits // 8}", count=(int(rows[-1]) + 1) * block, offset=g0)
+                x_full[idx - first] = values.reshape(-1, block)[rows]
+                continue
+            if full and w <= 56 and block % 8 == 0:
+                # value j of every group of eight: one strided uint64 view over the width group
+                size = block * w // 8
+                g0 = int(offsets[idx[0]])
+                rows = (offsets[idx] - g0) // size
+                contiguous = rows[-1] == idx.size - 1
+                adjacent = idx[-1] - idx[0] == idx.size - 1
+                target = x_full[idx[0] - first:idx[-1] - first + 1] if adjacent else np.empty((idx.size, block), dtype)
+                lanes = target.reshape(idx.size, block // 8, 8)
+                load = np.uint32 if w <= 25 else np.uint64  # 4-byte loads hold w bits at any bit offset
+                mask = load((1 << w) - 1)
+                tmp = np.empty((idx.size, block // 8), dtype=load)
+                for j in range(8):
+                    view = np.ndarray((int(rows[-1]) + 1, block // 8), dtype=np.dtype(load).newbyteorder("<"),
+                                      buffer=payload, offset=g0 + j * w // 8, strides=(size, w))
+                    np.right_shift(view if contiguous else view[rows], load(j * w % 8), out=tmp)
+                    np.bitwise_and(tmp, mask, out=lanes[:, :, j], casting="unsafe")
+                if shifts[idx].any():
+                    target <<= shifts[idx, None].astype(dtype)
+                if not adjacent:
+                    x_full[idx - first] = target
+                continue
+            n = int(lengths[idx[0]])
+            size = (n * w + 7) // 8
+            raw = payload[(offsets[idx][:, None] + np.arange(size)).ravel()].reshape(idx.size, size)
+            bits_ = np.unpackbits(raw, axis=1, bitorder="little")[:, :n * w].reshape(-1, w)
+            nbytes = next(b for b in (1, 2, 4, 8) if 8 * b >= w)
+            padded = np.zeros((bits_.shape[0], 8 * nbytes), dtype=np.uint8)
+            padded[:, :w] = bits_
+            values = np.packbits(padded, axis=1, bitorder="little").view(f"<u{nbytes}").ravel().astype(dtype)
+            rows = np.repeat(starts[idx], n) + np.tile(np.arange(n), idx.size) - lo
+            x[rows] = values << np.repeat(shifts[idx], n).astype(dtype)
+    return x
+
+
+def _header(kind, itemsize, count, block, shape):
+    return _HEADER.pack(MAGIC, kind, itemsize, count, block, len(shape)) + struct.pack(f"<{len(shape)}Q", *shape)
+
+
+def _read_header(data):
+    magic, kind, itemsize, count, block, ndim = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a Gorilla-encoded stream")
+    shape = struct.unpack_from(f"<{ndim}Q", data, _HEADER.size)
+    return kind, itemsize, count, block, shape, _HEADER.size + 8 * ndim
+
+
+def encode_floats(values, block=BLOCK_SIZE):
+    """Compress a float32 / float64 array of any shape (flattened in C order, lossless)."""
+    values = np.ascontiguousarray(values)
+    if values.dtype not in (np.float32, np.float64):
+        values = values.astype(np.float64)
+    itemsize = values.dtype.itemsize
+    u = values.view(_UINT[itemsize]).ravel()
+    starts, lengths = _blocks(u.size, block)
+    x = np.empty_like(u)
+    x[:1] = 0
+    np.bitwise_xor(u[1:], u[:-1], out=x[1:])
+    x[starts] = 0  # each block restarts from its base value
+    raw = _bit_length(np.bitwise_or.reduceat(x, starts)) >= 8 * itemsize - 1 if u.size else np.zeros(0, bool)
+    if raw.any():
+        x = np.where(np.repeat(raw, lengths), u, x)
+    widths, shifts, payload = _pack(x, 8 * itemsize, block, raw)
+    return b"".join([_header(KIND_FLOAT, itemsize, u.size, block, values.shape), u[starts].tobytes(),
+                     widths.tobytes(), shifts.tobytes(), payload.tobytes()])
+
+
+def _sections(data, itemsize, count, block, pos):
+    n_blocks = -(-count // block)
+    base = np.frombuffer(data, dtype=_UINT[itemsize], count=n_blocks, offset=pos)
+    pos += itemsize * n_blocks
+    widths = np.frombuffer(data, dtype=np.uint8, count=n_blocks, offset=pos)
+    shifts = np.frombuffer(data, dtype=np.uint8, count=n_blocks, offset=pos + n_blocks)
+    payload = np.frombuffer(data, dtype=np.uint8, offset=pos + 2 * n_blocks)
+    return base, widths, shifts, payload
+
+
+def decode_floats(data, start=0, stop=None):
+    """
+    Values [start:stop] of the flattened array encode_floats compressed (whole array in
+    its shape when no range is given). Only the blocks covering the range are decoded.
+    """
+    kind, itemsize, count, block, shape, pos = _read_header(data)
+    if kind != KIND_FLOAT:
+        raise ValueError("Not a float stream")
+    base, widths, shifts, payload = _sections(data, itemsize, count, block, pos)
+    whole = start == 0 and stop is None
+    stop = count if stop is None else min(int(stop), count)
+    start = min(int(start), stop)
+    first, last = start // block, -(-stop // block)
+    x = _unpack(widths, shifts, payload, count, block, 8 * itemsize, first, last)
+    starts = np.arange(0, x.size, block)
+    x[starts] = base[first:last]
+    # undo the XOR within each block (raw blocks hold the values): full blocks as rows, then the partial tail
+    xored = widths[first:last] != 8 * itemsize
+    full = x.size // block * block
+    u = x
+    if xored.any():
+        u = np.empty_like(x)
+        if full:
+            np.bitwise_xor.accumulate(x[:full].reshape(-1, block), axis=1, out=u[:full].reshape(-1, block))
+            raw = np.flatnonzero(~xored[:full // block])
+            u[:full].reshape(-1, block)[raw] = x[:full].reshape(-1, block)[raw]
+        if full < x.size:
+            u[full:] = np.bitwise_xor.accumulate(x[full:]) if xored[-1] else x[full:]
+    values = u.view(_FLOAT[itemsize])[start - first * block:stop - first * block]
+    return values.reshape(shape) if whole else values
+
+
+def encode_timestamps(ts, block=BLOCK_SIZE):
+    """Compress epoch seconds (in time order), kept to the microsecond."""
+    us = np.round(np.asarray(ts, dtype=np.float64).ravel() * 1e6).astype(np.int64)
+    dod = np.diff(us, n=2, prepend=[0, 0]) if us.size else us
+    dod[:2] = 0
+    zigzag = ((dod << 1) ^ (dod >> 63)).view(np.uint64)
+    head = np.zeros(2, dtype=np.int64)
+    head[:us.size] = us[:2]
+    widths, shifts, payload = _pack(zigzag, 64, block)
+    return b"".join([_header(KIND_TIME, 8, us.size, block, (us.size,)), head.tobytes(),
+                     widths.tobytes(), shifts.tobytes(), payload.tobytes()])
+
+
+def decode_timestamps(data):
+    """Epoch seconds (float64) from encode_timestamps."""
+    kind, _, count, block, _, pos = _read_header(data)
+    if kind != KIND_TIME:
+        raise ValueError("Not a timestamp stream")
+    head = np.frombuffer(data, dtype=np.int64, count=2, offset=pos)
+    n_blocks = -(-count // block)
+    pos += 16
+    widths = np.frombuffer(data, dtype=np.uint8, count=n_blocks, offset=pos)
+    shifts = np.frombuffer(data, dtype=np.uint8, count=n_blocks, offset=pos + n_blocks)
+    payload = np.frombuffer(data, dtype=np.uint8, offset=pos + 2 * n_blocks)
+    zigzag = _unpack(widths, shifts, payload, count, block, 64)
+    dod = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    if count > 1:
+        dod[1] = head[1] - head[0]
+    dod[:1] = head[:1]
+    # dod[1] is the first delta; the rest are changes of the delta
+    delta = np.cumsum(dod[1:])
+    us = np.concatenate([head[:1], head[0] + np.cumsum(delta)]) if count else dod
+    return us[:count] / 1e6
@@ -0,0 +1,145 @@
+"""
+Citizen-report ingestion bus: one schema and one write path for every page.
+
+Pages publish reports in batches ({"sector", "issue", "severity" 1..5, "comment"},
+optionally "id", "ts", "name", "domain"). Each report is normalized, routed to its
+domain (traffic, waste, environment or general, by issue type), added to that
+domain's ReportIndex and written to the admin queue (ReportStore) with the rest of
+its batch. A page subscribes to its domain and reads the index, which is kept up
+to date as reports arrive instead of being rebuilt from a shared list.
+
+One bus serves the whole process (default_bus), so every session sees the same
+views; read them under the bus's lock, since another session may be publishing.
+Views hold the reports of their decay window (see engine.reports); a report that
+leaves it leaves the bus as well, so the bus stays bounded however long it runs.
+"""
+import threading
+import uuid
+from datetime import datetime
+
+from engine.grid import SECTORS
+from engine.reports import ReportIndex
+
+from .report_store import content_hash, default_store
+
+DOMAIN_ISSUES = {
+    "traffic": ("Accident", "Heavy Traffic", "Road Hazard"),
+    "waste": ("Overflow", "Overflowing", "Missed Pickup", "Illegal Dumping"),
+    "environment": ("Smoke", "Flood", "Air Quality"),
+}
+ISSUE_DOMAIN = {issue: domain for domain, issues in DOMAIN_ISSUES.items() for issue in issues}
+GENERAL_DOMAIN = "general"
+
+# report severity 1..5 -> admin-panel severity
+SEVERITY_LABELS = ["Minor", "Minor", "Major", "Major", "Critical"]
+
+
+def normalize(report, domain=None):
+    """A published report -> the bus schema (new id / current time when missing)."""
+    issue = report.get("issue") or "Other"
+    return {
+        "id": str(report.get("id") or uuid.uuid4().hex[:8]),
+        "ts": report.get("ts") or datetime.now(),
+        "domain": domain or report.get("domain") or ISSUE_DOMAIN.get(issue, GENERAL_DOMAIN),
+        "sector": report.get("sector"),
+        "issue": issue,
+        "severity": min(max(int(report.get("severity") or 1), 1), 5),
+        "comment": report.get("comment") or "",
+        "name": report.get("name") or "Citizen",
+    }
+
+
+def to_admin(report):
+    """Bus report -> the admin-panel record ReportStore keeps."""
+    return {
+        "id": report["id"],
+        "ts": report["ts"],
+        "name": report["name"],
+        "category": report["issue"],
+        "location_text": report["sector"] or "",
+        "severity": SEVERITY_LABELS[report["severity"] - 1],
+        "description": report["comment"],
+        "status": "Submitted",
+        "assigned_to": "",
+        "response_time_days": None,
+    }
+
+
+class ReportBus:
+    """
+    Per-domain report views, written through to a shared ReportStore. `lock` guards
+    the views: publish / subscribe / remove take it, readers of a view hold it too.
+    """
+
+    def __init__(self, sectors, store=None):
+        self.sectors = list(sectors)
+        self.store = store
+        self.lock = threading.RLock()
+        self._views = {}  # domain -> ReportIndex
+        self._seeded = set()
+        self._seen = set()  # content hashes of the reports in the views
+        self._domain = {}  # id -> domain
+
+    def _view(self, domain):
+        if domain not in self._views:
+            self._views[domain] = ReportIndex(self.sectors)
+            self._views[domain].on_evict = self._forget
+        return self._views[domain]
+
+    def _forget(self, report):
+        # out of its view's window: no longer a duplicate candidate (the store still dedups)
+        self._seen.discard(content_hash(to_admin(report)))
+        self._domain.pop(report["id"], None)
+
+    def subscribe(self, domain, seed=()):
+        """The live ReportIndex of a domain; `seed` is published the first time a domain is subscribed."""
+        with self.lock:
+            if domain not in self._seeded:
+                self._seeded.add(domain)
+                self.publish(seed, domain)
+            return self._view(domain)
+
+    def publish(self, reports, domain=None):
+        """
+        Ingest a batch: duplicates (same content hash as a report already on the bus)
+        are dropped, the rest go to their domain views and to the store in one write.
+        Returns the accepted reports.
+        """
+        accepted = []
+        with self.lock:
+            for report in reports:
+                rec = normalize(report, domain)
+                h = content_hash(to_admin(rec))
+                if h in self._seen or rec["id"] in self._domain:
+                    continue
+                self._seen.add(h)
+                self._domain[rec["id"]] = rec["domain"]
+                self._view(rec["domain"]).add(rec)
+                accepted.append(rec)
+        if accepted and self.store is not None:
+            self.store.add_many([to_admin(rec) for rec in accepted])
+        return accepted
+
+    def remove(self, report_id, domain=None):
+        """Take a report out of its domain view (moderation); returns it, or None if unknown."""
+        report_id = str(report_id)
+        with self.lock:
+            if report_id not in self._domain or domain not in (None, self._domain[report_id]):
+                return None
+            domain = self._domain.pop(report_id)
+            report = self._views[domain].remove(report_id)
+            self._seen.discard(content_hash(to_admin(report)))
+        return report
+
+
+_default_bus = None
+_default_lock = threading.Lock()
+
+
+def default_bus():
+    """The process-wide bus over the default grid's sectors, writing to default_store(), created on first use."""
+    global _default_bus
+    with _default_lock:
+        if _default_bus is None:
+            _default_bus = ReportBus(SECTORS, default_store())
+        return _default_bus
@@ -0,0 +1,445 @@
+"""
+Citizen-report store for the admin panel: SQLite in WAL mode with an FTS5 index.
+
+Reports keep the shape the pages use ({"id", "ts", "name", "category",
+"location_text", "severity", "description", "status", "assigned_to",
+"response_time_days"}). Filters, text search, sorting and paging run in SQL,
+so a page of results costs the same with ten reports or a million.
+
+Every report also carries a content hash (location, category, description and
+day); a report whose content is already stored is skipped on insert, so pushing
+the same feedback again on every rerun or after a restart adds nothing.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports.db")
+
+SEVERITY_RANK = {"Critical": 3, "Major": 2, "Minor": 1}
+STATUS_RANK = {"Submitted": 0, "Verified": 1, "Assigned": 2, "In Progress": 3, "Resolved": 4}
+# moderation state machine: status -> the statuses a report may move to it from.
+# Reports advance one step at a time; resolving closes a report from any open status.
+TRANSITIONS = {
+    "Verified": ("Submitted",),
+    "Assigned": ("Verified",),
+    "In Progress": ("Assigned",),
+    "Resolved": ("Submitted", "Verified", "Assigned", "In Progress"),
+}
+
+# sort option on the admin panel -> (column, its values in sort order); within a value
+# reports are newest first. Pages are read one sort value at a time, each an index walk
+# in "key" order ("key" is time ordered, see SCHEMA), so no query has to sort its matches.
+SORT_GROUPS = {
+    "Newest": (None, [None]),
+    "Severity (Critical→Minor)": ("severity_rank", [3, 2, 1, 0]),
+    "Status": ("status_rank", [0, 1, 2, 3, 4]),
+}
+SEARCH_COUNT_CAP = 2_000  # text-search counts stop here ("2,000+")
+
+FIELDS = ("id", "ts", "name", "category", "location_text", "severity", "description",
+          "status", "assigned_to", "response_time_days")
+
+# key = report time in milliseconds * KEY_SLOTS + a tie-breaker, so the primary key (and
+# every index, which ends in it) is already sorted by time and "newest first" needs no sort.
+# Full-text matches come out of the FTS index in key order too, so search pages stop after
+# the first matches instead of sorting all of them. A millisecond holds KEY_SLOTS reports;
+# inserting more fails (sqlite3.IntegrityError, the batch is rolled back) rather than
+# dropping any.
+KEY_SLOTS = 1000
+
+DEDUP_BUCKET_H = 24  # one reporter's reports with the same content on one local date are duplicates
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    key INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    ts REAL NOT NULL,  -- epoch seconds
+    name TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    location_text TEXT NOT NULL DEFAULT '',
+    severity TEXT NOT NULL DEFAULT 'Minor',
+    severity_rank INTEGER NOT NULL DEFAULT 1,
+    description TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'Submitted',
+    status_rank INTEGER NOT NULL DEFAULT 0,
+    assigned_to TEXT NOT NULL DEFAULT '',
+    response_time_days INTEGER,
+    content_hash TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_reports_content ON reports (content_hash);
+CREATE INDEX IF NOT EXISTS ix_reports_ts ON reports (ts);
+CREATE INDEX IF NOT EXISTS ix_reports_category ON reports (category, key);
+CREATE INDEX IF NOT EXISTS ix_reports_severity ON reports (severity_rank, key);
+CREATE INDEX IF NOT EXISTS ix_reports_status ON reports (status_rank ASC, key DESC);
+
+-- report counts per (category, severity, status), so filter counts never scan the reports
+CREATE TABLE IF NOT EXISTS report_counts (
+    category TEXT NOT NULL,
+    severity_rank INTEGER NOT NULL,
+    status_rank INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (category, severity_rank, status_rank)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS report_counts_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO report_counts VALUES (new.category, new.severity_rank, new.status_rank, 1)
+    ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS report_counts_ad AFTER DELETE ON reports BEGIN
+    UPDATE report_counts SET n = n - 1
+    WHERE category = old.category AND severity_rank = old.severity_rank AND status_rank = old.status_rank;
+END;
+-- status changes go through ReportStore.transition, which moves whole groups of counts at
+-- once; a per-row trigger on UPDATE would cost more than the bulk update itself
+DROP TRIGGER IF EXISTS report_counts_au;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5 (
+    name, location_text, description,
+    content='reports', content_rowid='key', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+-- key -1: the report's millisecond has no free slot left (see INSERT_SQL); duplicates are
+-- let through, to be skipped by the insert
+CREATE TRIGGER IF NOT EXISTS reports_key_bi BEFORE INSERT ON reports
+WHEN new.key < 0 AND NOT EXISTS (SELECT 1 FROM reports WHERE id = new.id OR content_hash = new.content_hash) BEGIN
+    SELECT RAISE(ABORT, 'report key overflow: every key slot of the millisecond is taken');
+END;
+CREATE TRIGGER IF NOT EXISTS reports_fts_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts (rowid, name, location_text, description)
+    VALUES (new.key, new.name, new.location_text, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_fts_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, name, location_text, description)
+    VALUES ('delete', old.key, old.name, old.location_text, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_fts_au AFTER UPDATE OF name, location_text, description ON reports BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, name, location_text, description)
+    VALUES ('delete', old.key, old.name, old.location_text, old.description);
+    INSERT INTO reports_fts (rowid, name, location_text, description)
+    VALUES (new.key, new.name, new.location_text, new.description);
+END;
+"""
+
+# the next free slot of the report's millisecond (?1 = its first key), -1 when all are taken;
+# only id and content duplicates are skipped, a key conflict is an error
+INSERT_SQL = (
+    "INSERT INTO reports (key, id, ts, name, category, location_text, severity, severity_rank, "
+    "description, status, status_rank, assigned_to, response_time_days, content_hash) "
+    "VALUES ((SELECT CASE WHEN MAX(key) IS NULL THEN ?1 WHEN MAX(key) < ?1 + {last} THEN MAX(key) + 1 ELSE -1 END "
+    "FROM reports WHERE key BETWEEN ?1 AND ?1 + {last}), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (id) DO NOTHING ON CONFLICT (content_hash) DO NOTHING"
+).format(last=KEY_SLOTS - 1)
+
+
+def _epoch(ts):
+    if ts is None:
+        ts = datetime.now()
+    return ts.timestamp() if isinstance(ts, datetime) else float(ts)
+
+
+def _norm(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def _local_seconds(ts):
+    """Epoch seconds -> seconds since 1970-01-01 00:00 on the local wall clock."""
+    return (datetime.fromtimestamp(ts) - datetime(1970, 1, 1)).total_seconds()
+
+
+def content_hash(report, bucket_h=DEDUP_BUCKET_H):
+    """
+    Hash of who filed a report and what it says: reporter name, location (the sector for
+    dashboard feedback), category and description, case and whitespace folded, plus the
+    `bucket_h`-hour bucket of its time. The reporter is part of the key so that two
+    citizens filing the same text about the same spot both count; only a resubmission
+    (or replay) of one reporter's report is a duplicate. Buckets follow the local wall
+    clock, so with the default one-day bucket that means the same local date (not the
+    same UTC date).
+    """
+    bucket = int(_local_seconds(_epoch(report.get("ts"))) // (bucket_h * 3600))
+    key = "\x1f".join((_norm(report.get("name")), _norm(report.get("location_text")), _norm(report.get("category")),
+                       _norm(report.get("description")), str(bucket)))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _row(report):
+    """Report dict -> INSERT parameters."""
+    severity = report.get("severity") or "Minor"
+    status = report.get("status") or "Submitted"
+    ts = _epoch(report.get("ts"))
+    return (int(ts * 1000) * KEY_SLOTS, str(report["id"]), ts, report.get("name") or "", report.get("category") or "",
+            report.get("location_text") or "", severity, SEVERITY_RANK.get(severity, 0),
+            report.get("description") or "", status, STATUS_RANK.get(status, 0),
+            report.get("assigned_to") or "", report.get("response_time_days"), content_hash(report))
+
+
+def fts_query(text):
+    """
+    Free text -> FTS5 query: every word must match the start of a word in
+    name / location_text / description (case-insensitive, accents ignored).
+    Prefixes of 2 and 3 characters are read straight from the prefix index; longer
+    words merge the doclists of the terms they start (tens of ms on a million reports).
+    """
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+
+class ReportStore:
+    """SQLite-backed citizen reports; one store (connection) shared by the whole process."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+        self._conn.execute("PRAGMA analysis_limit=1000")  # ANALYZE samples instead of reading every row
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(reports)")]
+        if columns and "content_hash" not in columns:
+            # databases from before content dedup: older reports keep a NULL hash
+            self._conn.execute("ALTER TABLE reports ADD COLUMN content_hash TEXT")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("ANALYZE")
+
+    def close(self):
+        self._conn.close()
+
+    def add_many(self, reports):
+        """
+        Insert reports in one transaction. Reports whose id or content (see content_hash)
+        is already stored are skipped; returns the number added. More than KEY_SLOTS
+        reports in one millisecond raise sqlite3.IntegrityError and add nothing.
+        """
+        rows = [_row(r) for r in reports]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                added = self._conn.executemany(INSERT_SQL, rows).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            if added >= 10_000:
+                self._conn.execute("ANALYZE")
+            return added
+
+    def add(self, report):
+        return self.add_many([report])
+
+    def transition(self, status=None, assigned_to=None, response_days=None, ids=None,
+                   categories=None, severities=None, statuses=None, search=""):
+        """
+        Bulk moderation in one transaction: every report matching the filters (and `ids`,
+        if given) that may move to `status` under TRANSITIONS moves there; the others are
+        left as they are. `assigned_to` is set on every matching report, `response_days`
+        (lo, hi) draws response_time_days uniformly for the reports that moved.
+        Returns {"matched", "moved", "rejected", "assigned"} counts ("assigned" counts
+        the reports whose assignment changed).
+        """
+        if status is not None and status not in TRANSITIONS:
+            raise ValueError(f"no transition leads to status {status!r}")
+        clauses, params = self._where(categories, severities, statuses)
+        match = fts_query(search or "")
+        if match:
+            clauses.append("r.key IN (SELECT rowid FROM reports_fts WHERE reports_fts MATCH ?)")
+            params.append(match)
+        if ids is not None:
+            clauses.append("r.id IN temp.bulk_ids")
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        counts = {"matched": 0, "moved": 0, "rejected": 0, "assigned": 0}
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if ids is not None:
+                    self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+                    self._conn.execute("DELETE FROM temp.bulk_ids")
+                    self._conn.executemany("INSERT OR IGNORE INTO temp.bulk_ids VALUES (?)", ((str(i),) for i in ids))
+                if ids is None and not match:
+                    counts["matched"] = self._conn.execute(
+                        f"SELECT COALESCE(SUM(n), 0) FROM report_counts r{where}", params).fetchone()[0]
+                else:
+                    counts["matched"] = self._conn.execute(f"SELECT COUNT(*) FROM reports r{where}", params).fetchone()[0]
+                if status is not None:
+                    sources = [STATUS_RANK[s] for s in TRANSITIONS[status]]
+                    cond = " AND ".join(clauses + [f"r.status_rank IN ({', '.join('?' * len(sources))})"])
+                    # the reports about to move, per report_counts group (plain filters select whole groups)
+                    if ids is None and not match and assigned_to is None:
+                        groups = self._conn.execute(
+                            f"SELECT category, severity_rank, status_rank, n, 0 FROM report_counts r WHERE {cond} AND n > 0",
+                            params + sources).fetchall()
+                    else:
+                        groups = self._conn.execute(
+                            "SELECT r.category, r.severity_rank, r.status_rank, COUNT(*), SUM(r.assigned_to != ?) "
+                            f"FROM reports r WHERE {cond} GROUP BY 1, 2, 3", [assigned_to or ""] + params + sources).fetchall()
+                    sets, args = ["status = ?", "status_rank = ?"], [status, STATUS_RANK[status]]
+                    if assigned_to is not None:
+                        sets.append("assigned_to = ?")
+                        args.append(assigned_to)
+                        counts["assigned"] = sum(g[4] for g in groups)
+                    if response_days is not None:
+                        lo, hi = response_days
+                        sets.append("response_time_days = ? + abs(random() % ?)")
+                        args += [int(lo), int(hi) - int(lo) + 1]
+                    counts["moved"] = self._conn.execute(
+                        f"UPDATE reports AS r SET {', '.join(sets)} WHERE {cond}", args + params + sources).rowcount
+                    counts["rejected"] = counts["matched"] - counts["moved"]
+                    self._conn.executemany(
+                        "UPDATE report_counts SET n = n - ? WHERE category = ? AND severity_rank = ? AND status_rank = ?",
+                        [(n, category, severity, rank) for category, severity, rank, n, _ in groups])
+                    self._conn.executemany(
+                        "INSERT INTO report_counts VALUES (?, ?, ?, ?) ON CONFLICT DO UPDATE SET n = n + excluded.n",
+                        [(category, severity, STATUS_RANK[status], n) for category, severity, _, n, _ in groups])
+                if assigned_to is not None:
+                    # reports that moved above already carry the assignment
+                    cond = " AND ".join(clauses + ["r.assigned_to != ?"])
+                    counts["assigned"] += self._conn.execute(
+                        f"UPDATE reports AS r SET assigned_to = ? WHERE {cond}", [assigned_to] + params + [assigned_to]).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    @staticmethod
+    def _where(categories=None, severities=None, statuses=None):
+        """Filter clauses on r.category / r.severity_rank / r.status_rank (None or empty means no filter)."""
+        clauses, params = [], []
+        for column, values in (("category", categories),
+                               ("severity_rank", [SEVERITY_RANK.get(v, 0) for v in severities or ()]),
+                               ("status_rank", [STATUS_RANK.get(v, 0) for v in statuses or ()])):
+            if values:
+                clauses.append(f"r.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        return clauses, params
+
+    @staticmethod
+    def _records(rows):
+        out = []
+        for row in rows:
+            rec = dict(row)
+            del rec["key"], rec["sort_value"]
+            rec["ts"] = datetime.fromtimestamp(rec["ts"])
+            out.append(rec)
+        return out
+
+    def _rows(self, categories, severities, statuses, search, sort, limit, offset, cursor):
+        match = fts_query(search or "")
+        column, values = SORT_GROUPS.get(sort, SORT_GROUPS["Newest"])
+        clauses, params = self._where(categories, severities, statuses)
+        select = f"SELECT r.key, {'NULL' if column is None else 'r.' + column} AS sort_value, {', '.join('r.' + f for f in FIELDS)} FROM "
+        start, before = 0, None
+        if cursor is not None:
+            # resume inside the cursor's sort value, just after its report
+            start, before = values.index(cursor[0]), cursor[1]
+        skip = int(offset)
+        rows = []
+        with self._lock:
+            for value in values[start:]:
+                where, args = list(clauses), list(params)
+                if column is not None:
+                    where.append(f"r.{column} = ?")
+                    args.append(value)
+                if match:
+                    # full-text matches come newest first; skipped rows are dropped below
+                    if before is not None:
+                        where.append("f.rowid < ?")
+                        args.append(before)
+                    sql = (select + "reports_fts f CROSS JOIN reports r ON r.key = f.rowid WHERE reports_fts MATCH ?"
+                           + "".join(" AND " + c for c in where) + " ORDER BY f.rowid DESC")
+                    args.insert(0, match)
+                    if limit is not None:
+                        sql += f" LIMIT {skip + int(limit) - len(rows)}"
+                else:
+                    if skip and before is None:
+                        # whole sort values before the page are skipped by their count alone
+                        cond = (" WHERE " + " AND ".join(where)) if where else ""
+                        n = self._conn.execute(f"SELECT COALESCE(SUM(n), 0) FROM report_counts r{cond}", args).fetchone()[0]
+                        if n <= skip:
+                            skip -= n
+                            continue
+                    if before is not None:
+                        where.append("r.key < ?")
+                        args.append(before)
+                    cond = (" WHERE " + " AND ".join(where)) if where else ""
+                    sql = select + f"reports r{cond} ORDER BY r.key DESC"
+                    sql += f" LIMIT {-1 if limit is None else int(limit) - len(rows)} OFFSET {skip}"
+                    skip = 0
+                before = None
+                rows += self._conn.execute(sql, args).fetchall()
+                if limit is not None and len(rows) >= skip + int(limit):
+                    break
+        rows = rows[skip:] if match else rows
+        return rows if limit is None else rows[:int(limit)]
+
+    def query(self, categories=None, severities=None, statuses=None, search="", sort="Newest", limit=50, offset=0,
+              cursor=None):
+        """
+        One page of matching reports as dicts (ts as datetime), in the order of the sort option,
+        starting `offset` reports after `cursor` (see page) or after the start.
+        """
+        rows = self._rows(categories, severities, statuses, search, sort, limit, offset, cursor)
+        return self._records(rows)
+
+    def page(self, categories=None, severities=None, statuses=None, search="", sort="Newest", limit=50, cursor=None):
+        """
+        Keyset pagination: the `limit` reports after `cursor` (None: the first page) and the
+        cursor of the next page, or None on the last page. A cursor is the last report's
+        (sort value, key), so reading page 1,000 costs the same as reading page 1.
+        """
+        rows = self._rows(categories, severities, statuses, search, sort, int(limit) + 1, 0, cursor)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:int(limit)]
+            next_cursor = (rows[-1]["sort_value"], rows[-1]["key"])
+        return self._records(rows), next_cursor
+
+    def count(self, categories=None, severities=None, statuses=None, search="", cap=SEARCH_COUNT_CAP):
+        """
+        Number of reports matching the filters. Text-search counts stop at cap + 1
+        (anything above cap means "more than cap"); filter-only counts are exact.
+        """
+        match = fts_query(search or "")
+        clauses, params = self._where(categories, severities, statuses)
+        with self._lock:
+            if not match:
+                where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+                return self._conn.execute(f"SELECT COALESCE(SUM(n), 0) FROM report_counts r{where}", params).fetchone()[0]
+            sql = ("SELECT 1 FROM reports_fts f CROSS JOIN reports r ON r.key = f.rowid WHERE reports_fts MATCH ?"
+                   + "".join(" AND " + c for c in clauses))
+            if cap is not None:
+                sql += f" LIMIT {int(cap) + 1}"
+            return self._conn.execute(f"SELECT COUNT(*) FROM ({sql})", [match] + params).fetchone()[0]
+
+    def ids(self, categories=None, severities=None, statuses=None, search=""):
+        """Ids of every report matching the filters, newest first."""
+        return [r["id"] for r in self.query(categories, severities, statuses, search, limit=None)]
+
+    def categories(self):
+        """Distinct categories, sorted."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT category FROM report_counts GROUP BY category HAVING SUM(n) > 0 ORDER BY category")]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(n), 0) FROM report_counts").fetchone()[0]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """The process-wide store at DEFAULT_DB_PATH, opened on first use."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ReportStore()
+        return _default_store
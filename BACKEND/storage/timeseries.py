@@ -0,0 +1,428 @@
+"""
+Persistent ring-buffer time series for the page histories (no Streamlit).
+
+A `RingSeries` keeps the latest `capacity` samples of a fixed set of metrics, one
+column per metric: a memory-mapped .npy file under DEFAULT_HISTORY_DIR/<name>/,
+shaped (rows,) for a city-level value or (rows, sectors) for a per-sector one,
+next to a "ts" column of epoch seconds. Appending writes one row in place and then
+bumps the sample count (itself a one-element memmap), so it is O(1) and never
+reallocates, and the files outlive the process: after a restart the series picks
+up where it stopped.
+
+Every row is written twice, at slot i and i + capacity of a 2 * capacity column
+(a mirrored ring), so the latest n samples are always one contiguous slice and
+`window` returns zero-copy views in time order however often the ring has wrapped.
+
+A `TieredSeries` adds rollup levels to the raw ring: min / max / mean / count of
+every minute, hour and day (ROLLUP_LEVELS) in rings of their own. `query` answers a
+time range at any resolution from the coarsest level that is fine enough, so a
+year of data costs about as much to chart as a day.
+
+With an archive (archive.DayArchive), a ring hands its rows to cold storage whenever
+a new local day starts, and `history` reads any time range from both.
+"""
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .archive import TS, TS_RESOLUTION, DayArchive, local_days
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history")
+MINUTE, HOUR, DAY = 60, 3600, 86400
+SAMPLE_SECONDS = 10.0  # expected time between appends (the pages record every simulation tick)
+DEFAULT_CAPACITY = int(7 * DAY // SAMPLE_SECONDS)  # a week of samples
+ROLLUP_LEVELS = (MINUTE, HOUR, DAY)  # rollup bucket widths (seconds)
+ROLLUP_CAPACITY = {MINUTE: 7 * 24 * 60, HOUR: 366 * 24, DAY: 10 * 366}  # a week / a year / ten years of buckets
+COUNT = "count"  # rollups: samples behind each bucket
+
+
+def _npy_header(path):
+    """(shape, dtype) of an .npy file, or None if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            read = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, _, dtype = read(f)
+            return shape, dtype
+    except (OSError, ValueError):
+        return None
+
+
+class RingSeries:
+    """
+    Fixed-capacity, memory-mapped, column-oriented time series.
+
+    columns maps metric name -> per-sample shape: () for one value per sample,
+    (n_sectors,) for one value per sector. Files whose layout no longer matches
+    (another capacity, sector count or dtype) are started over. archive: a
+    DayArchive with the same columns that receives the rows of every closed day.
+    """
+
+    def __init__(self, directory, columns, capacity=DEFAULT_CAPACITY, dtype=np.float32, archive=None):
+        if TS in columns:
+            raise ValueError(f"{TS!r} is reserved for the timestamps")
+        self.directory = directory
+        self.archive = archive
+        self.capacity = int(capacity)
+        self.columns = {name: tuple(shape) for name, shape in columns.items()}
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        layout = {TS: ((2 * self.capacity,), np.dtype(np.float64))}
+        layout.update({name: ((2 * self.capacity,) + shape, self.dtype) for name, shape in self.columns.items()})
+        layout["_count"] = ((1,), np.dtype(np.int64))
+        paths = {name: os.path.join(directory, f"{name}.npy") for name in layout}
+        if any(_npy_header(paths[name]) != (shape, dt) for name, (shape, dt) in layout.items()):
+            # new series or a changed layout: every column starts over together
+            for path in paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+        # new files stay sparse: rows are only ever read back after they were written
+        self._cols = {
+            name: np.lib.format.open_memmap(paths[name], mode="r+") if os.path.exists(paths[name])
+            else np.lib.format.open_memmap(paths[name], mode="w+", shape=shape, dtype=dt)
+            for name, (shape, dt) in layout.items()
+        }
+        self._count = self._cols.pop("_count")
+
+    def __len__(self):
+        return min(int(self._count[0]), self.capacity)
+
+    @property
+    def total(self):
+        """Samples appended over the series' lifetime (the oldest beyond capacity are overwritten)."""
+        return int(self._count[0])
+
+    def append(self, ts=None, **values):
+        """
+        Add one sample (ts: datetime or epoch seconds, default now). Columns left out
+        are stored as NaN. Overwrites the oldest sample once the ring is full.
+        """
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        if ts is None:
+            ts = datetime.now()
+        values[TS] = ts.timestamp() if isinstance(ts, datetime) else float(ts)
+        if self.archive is not None:
+            self._spill(values[TS])
+        with self._lock:
+            n = int(self._count[0])
+            slot = n % self.capacity
+            for name, col in self._cols.items():
+                value = values.get(name, np.nan)
+                col[slot] = value
+                col[slot + self.capacity] = value
+            self._count[0] = n + 1
+
+    def _spill(self, ts):
+        """On the first sample of a new local day, archive the kept rows not archived yet."""
+        last = self.window(1)[TS]
+        if not last.size or local_days(ts) == local_days(last[0]):
+            return
+        rows = self.window()
+        done = self.archive.last_ts
+        lo = 0 if done is None else int(np.searchsorted(rows[TS], done + TS_RESOLUTION, side="right"))
+        if lo < rows[TS].size:
+            self.archive.write(rows[TS][lo:], **{name: rows[name][lo:] for name in self.columns})
+
+    def history(self, start=None, end=None, columns=None, sectors=None):
+        """
+        Samples with start <= ts < end (datetimes or epoch seconds, open-ended when
+        None) from the archive and the ring, oldest first, as {"ts", column: array}
+        copies. sectors: indices to keep of the per-sector columns (default all).
+        """
+        start = start.timestamp() if isinstance(start, datetime) else start
+        end = end.timestamp() if isinstance(end, datetime) else end
+        columns = list(self.columns if columns is None else columns)
+        ring = self.window(columns=columns)
+        ts = ring[TS]
+        lo = 0 if start is None else int(np.searchsorted(ts, start))
+        hi = ts.size if end is None else int(np.searchsorted(ts, end))
+        parts = []
+        if self.archive is not None:
+            done = self.archive.last_ts
+            if done is not None:
+                parts.append(self.archive.read(start, end, columns, sectors))
+                lo = max(lo, int(np.searchsorted(ts, done + TS_RESOLUTION, side="right")))
+        recent = {TS: ts[lo:hi]}
+        for name in columns:
+            col = ring[name][lo:hi]
+            recent[name] = col if sectors is None or col.ndim == 1 else col[:, np.sort(sectors)]
+        parts.append(recent)
+        return {name: np.concatenate([part[name] for part in parts]) for name in [TS] + columns}
+
+    def window(self, n=None, columns=None):
+        """
+        The latest n samples (default: all kept) as {"ts", column: array} in time
+        order. The arrays are views into the mapped files: later appends overwrite
+        their oldest rows once the ring wraps, so copy what has to stay fixed.
+        """
+        with self._lock:
+            count = int(self._count[0])
+        k = min(count, self.capacity) if n is None else max(0, min(int(n), count, self.capacity))
+        end = (count - 1) % self.capacity + 1 + self.capacity if count else self.capacity
+        names = [TS] + list(self.columns if columns is None else columns)
+        return {name: self._cols[name][end - k:end].view(np.ndarray) for name in names}
+
+    def flush(self):
+        """Write the mapped pages to disk now (the OS does it on its own otherwise)."""
+        with self._lock:
+            for col in self._cols.values():
+                col.flush()
+            self._count.flush()
+
+    def close(self):
+        """Flush and unmap the files (views already handed out keep their mapping)."""
+        self.flush()
+        self._cols = {}
+
+    def clear(self):
+        """Forget every sample (the files stay allocated)."""
+        with self._lock:
+            self._count[0] = 0
+
+
+def _bucket(ts, width):
+    """Start of the local-time bucket of `width` seconds holding each ts (days start at local midnight)."""
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    return np.floor((np.asarray(ts, dtype=np.float64) + offset) / width) * width - offset
+
+
+def _rollup(ts, width, stats, count):
+    """
+    Combine rows in time order into buckets of `width` seconds. stats maps a column to
+    its (mean, min, max) row arrays, count is the samples behind each row. Returns
+    (bucket starts, {column: (mean, min, max)}, count per bucket).
+    """
+    buckets = _bucket(ts, width)
+    if buckets.size == 0:
+        return buckets, stats, count
+    first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    total = np.add.reduceat(count, first)
+    out = {}
+    for name, (mean, low, high) in stats.items():
+        w = count.reshape((-1,) + (1,) * (mean.ndim - 1))
+        n = total.reshape((-1,) + (1,) * (mean.ndim - 1))
+        out[name] = (np.add.reduceat(mean * w, first, axis=0) / n,
+                     np.minimum.reduceat(low, first, axis=0), np.maximum.reduceat(high, first, axis=0))
+    return buckets[first], out, total
+
+
+class TieredSeries:
+    """
+    Raw samples in a RingSeries (`recent`) plus rollup levels (`levels`, one RingSeries
+    per bucket width in seconds): per bucket, the mean, min and max of every column
+    ("<column>", "<column>_min", "<column>_max") and the number of samples ("count").
+
+    A bucket is closed when the first sample of a later bucket arrives, from the level
+    below it (the raw samples for the finest level), so every level stays exact and
+    none keeps state of its own: the levels carry on after a restart. Samples are
+    expected in time order.
+    """
+
+    def __init__(self, directory, columns, capacity=DEFAULT_CAPACITY, levels=ROLLUP_LEVELS, dtype=np.float32,
+                 archive=None):
+        rollup_columns = {}
+        for name, shape in columns.items():
+            rollup_columns.update({name: shape, f"{name}_min": shape, f"{name}_max": shape})
+        if COUNT in rollup_columns or len(rollup_columns) != 3 * len(columns):
+            raise ValueError(f"{COUNT!r} and '<column>_min' / '<column>_max' names are reserved for the rollups")
+        rollup_columns[COUNT] = ()
+        self.recent = RingSeries(os.path.join(directory, "recent"), columns, capacity, dtype, archive)
+        self.levels = {int(width): RingSeries(os.path.join(directory, f"rollup_{int(width)}s"), rollup_columns,
+                                              ROLLUP_CAPACITY.get(int(width), capacity), dtype)
+                       for width in sorted(levels)}
+        self.directory = directory
+        self.columns = self.recent.columns
+        self.capacity = self.recent.capacity
+        self.archive = archive
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.recent)
+
+    def append(self, ts=None, **values):
+        """Add one raw sample (see RingSeries.append), closing the buckets it leaves behind."""
+        if ts is None:
+            ts = datetime.now()
+        ts = ts.timestamp() if isinstance(ts, datetime) else float(ts)
+        with self._lock:
+            last = self.recent.window(1)[TS]
+            if last.size:
+                # finest first: each level closes from the one below, already closed here
+                for width in self.levels:
+                    start = _bucket(last[0], width)
+                    if _bucket(ts, width) <= start:
+                        break
+                    self._close(width, float(start))
+            self.recent.append(ts, **values)
+
+    def _source(self, width):
+        """The level below `width`: (series, its bucket width or None for the raw samples)."""
+        below = [w for w in self.levels if w < width]
+        return (self.levels[below[-1]], below[-1]) if below else (self.recent, None)
+
+    def _stats(self, rows, raw, sectors=None):
+        """{column: (mean, min, max)} and counts of ring rows (raw samples count once each)."""
+        pick = (lambda col: col) if sectors is None else (lambda col: col if col.ndim == 1 else col[:, sectors])
+        if raw:
+            stats = {name: (pick(rows[name]),) * 3 for name in self.columns if name in rows}
+            return stats, np.ones(rows[TS].size)
+        stats = {name: (pick(rows[name]), pick(rows[f"{name}_min"]), pick(rows[f"{name}_max"]))
+                 for name in self.columns if name in rows}
+        return stats, rows[COUNT].astype(np.float64)
+
+    def _close(self, width, start):
+        level = self.levels[width]
+        closed = level.window(1)[TS]
+        if closed.size and closed[0] >= start:
+            return  # already closed (before a restart)
+        source, below = self._source(width)
+        rows = source.window()
+        lo, hi = np.searchsorted(rows[TS], [start, start + width])
+        if hi <= lo:
+            return
+        stats, count = self._stats({name: col[lo:hi] for name, col in rows.items()}, below is None)
+        _, out, total = _rollup(rows[TS][lo:hi], width, stats, count)
+        values = {COUNT: total[0]}
+        for name, (mean, low, high) in out.items():
+            values.update({name: mean[0], f"{name}_min": low[0], f"{name}_max": high[0]})
+        level.append(start, **values)
+
+    def _level_rows(self, width, start, end, columns, sectors):
+        """Rows of one level (None: the raw samples, archive included) with start <= ts < end."""
+        if width is None:
+            rows = self.recent.history(start, end, columns, sectors)
+            stats, count = self._stats(rows, True)
+            return rows[TS], stats, count
+        names = [TS, COUNT] + [f"{name}{suffix}" for name in columns for suffix in ("", "_min", "_max")]
+        rows = self.levels[width].window(columns=names[1:])
+        lo = 0 if start is None else int(np.searchsorted(rows[TS], start))
+        hi = rows[TS].size if end is None else int(np.searchsorted(rows[TS], end))
+        stats, count = self._stats({name: rows[name][lo:hi] for name in names}, False, sectors)
+        return rows[TS][lo:hi], stats, count
+
+    def query(self, start=None, end=None, resolution=None, columns=None, sectors=None):
+        """
+        The samples with start <= ts < end (datetimes or epoch seconds, open-ended when
+        None) in buckets of `resolution` seconds: {"ts" (bucket starts), column (mean),
+        "<column>_min", "<column>_max", "count"}. The range is widened to whole
+        buckets. sectors: indices to keep of the per-sector columns.
+
+        Served from the coarsest level whose width divides the resolution (the raw
+        samples and archive when none does, or with no resolution, one row per
+        sample). The stretch that level has not closed yet comes from the finer
+        levels, and what it no longer keeps from the coarser ones.
+        """
+        start = start.timestamp() if isinstance(start, datetime) else start
+        end = end.timestamp() if isinstance(end, datetime) else end
+        columns = list(self.columns if columns is None else columns)
+        if sectors is not None:
+            sectors = np.sort(np.asarray(sectors, dtype=np.intp))
+        if resolution is not None:
+            start = None if start is None else float(_bucket(start, resolution))
+            if end is not None and _bucket(end, resolution) < end:
+                end = float(_bucket(end, resolution)) + resolution
+        widths = [None] + [w for w in self.levels if resolution is not None and resolution % w == 0]
+        coarser = [w for w in self.levels if widths[-1] is not None and w > widths[-1]]
+
+        pieces = []
+        lo = start
+        if widths[-1] is not None:
+            # what the chosen level no longer keeps comes from coarser ones, in whole buckets of theirs
+            chain, lows = [widths[-1]], [start]
+            for width in coarser:
+                level = self.levels[chain[-1]]
+                kept = level.window(columns=[])[TS][:1]
+                if not kept.size or (start is not None and kept[0] <= start) or level.total <= level.capacity:
+                    break  # the level still holds every bucket it has closed
+                held = self.levels[width].window(columns=[])[TS]
+                if not held.size or held[0] > kept[0]:
+                    break  # nothing older there either (a young series, not a wrapped ring)
+                cut = float(_bucket(kept[0], width))
+                # hand over at the coarse bucket boundary, or where the coarse level stops
+                lows[-1] = min(cut + width if cut < kept[0] else cut, float(held[-1]) + width)
+                chain.append(width)
+                lows.append(None if start is None else float(_bucket(start, width)))
+            for k in range(len(chain) - 1, 0, -1):
+                pieces.append(self._level_rows(chain[k], lows[k], lows[k - 1], columns, sectors))
+            lo = lows[0]
+        # the chosen level, then finer ones for what it has not closed yet
+        for width in reversed(widths):
+            ts, stats, count = self._level_rows(width, lo, end, columns, sectors)
+            pieces.append((ts, stats, count))
+            if width is not None:
+                closed = self.levels[width].window(1)[TS]
+                if closed.size:
+                    lo = closed[0] + width if lo is None else max(lo, closed[0] + width)
+
+        ts = np.concatenate([p[0] for p in pieces])
+        stats = {name: tuple(np.concatenate([p[1][name][k] for p in pieces]) for k in range(3)) for name in columns}
+        count = np.concatenate([p[2] for p in pieces])
+        if resolution is not None:
+            ts, stats, count = _rollup(ts, resolution, stats, count)
+        out = {TS: ts}
+        for name, (mean, low, high) in stats.items():
+            out.update({name: mean, f"{name}_min": low, f"{name}_max": high})
+        out[COUNT] = count
+        return out
+
+    def window(self, n=None, columns=None):
+        """The latest n raw samples (see RingSeries.window)."""
+        return self.recent.window(n, columns)
+
+    def history(self, start=None, end=None, columns=None, sectors=None):
+        """Raw samples in a time range from the archive and the ring (see RingSeries.history)."""
+        return self.recent.history(start, end, columns, sectors)
+
+    def flush(self):
+        self.recent.flush()
+        for level in self.levels.values():
+            level.flush()
+
+    def close(self):
+        self.recent.close()
+        for level in self.levels.values():
+            level.close()
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            for level in self.levels.values():
+                level.clear()
+
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def history_series(name, columns, capacity=DEFAULT_CAPACITY, directory=DEFAULT_HISTORY_DIR, rollups=None,
+                   archive_dir=None):
+    """
+    The process-wide series `name` under directory, opened on first use (or when its
+    layout changes): a RingSeries, or a TieredSeries with rollup levels of the given
+    bucket widths (e.g. ROLLUP_LEVELS). With archive_dir, closed days go to a
+    DayArchive under archive_dir/name.
+    """
+    columns = {col: tuple(shape) for col, shape in columns.items()}
+    key = (directory, name)
+    archive_path = None if archive_dir is None else os.path.join(archive_dir, name)
+    with _series_lock:
+        series = _series.get(key)
+        if (series is None or series.columns != columns or series.capacity != capacity
+                or tuple(getattr(series, "levels", ())) != tuple(sorted(rollups or ()))
+                or getattr(series.archive, "directory", None) != archive_path):
+            if series is not None:
+                series.close()
+            path = os.path.join(directory, name)
+            archive = None if archive_path is None else DayArchive(archive_path, columns)
+            if not rollups:
+                series = RingSeries(path, columns, capacity, archive=archive)
+            else:
+                series = TieredSeries(path, columns, capacity, rollups, archive=archive)
+            _series[key] = series
+        return series
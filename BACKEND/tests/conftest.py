@@ -0,0 +1,9 @@
+"""
+Tests for the headless packages (engine, storage, ui); run from BACKEND:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
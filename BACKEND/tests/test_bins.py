@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from engine import bins
+from engine.grid import Grid
+
+
+def make(per_sector=40, seed=0):
+    rng = np.random.default_rng(seed)
+    grid = Grid(3, 4)
+    return bins.make_bins(grid.rows, grid.cols, rng.uniform(0.8, 1.4, grid.n), per_sector, rng)
+
+
+@pytest.mark.parametrize("hour, scale", [(0, 1.0), (7, 1.0), (18, 1.4)])
+def test_time_to_full_matches_hourly_steps(hour, scale):
+    b = make()
+    b["fill_pct"][:5] = 100.0
+    full = b["fill_pct"] >= 100
+    ttf = bins.time_to_full(b, hour, scale)
+    assert np.all(ttf[full] == 0)
+    fill = b.copy()
+    reached = np.full(b.size, np.inf)
+    for h in range(24 * 20):
+        before = fill["fill_pct"].copy()
+        bins.advance_bins(fill, hour + h, scale)
+        crossed = (before < 100) & (fill["fill_pct"] >= 100 - 1e-9) & np.isinf(reached)
+        reached[crossed] = h + 1  # full by the end of hour h
+    assert np.isfinite(reached[~full]).all()
+    # full during hour h: h < ttf <= h + 1
+    assert np.all(reached[~full] - 1 - 1e-6 <= ttf[~full]) and np.all(ttf[~full] <= reached[~full] + 1e-6)
+
+
+def test_sector_summary_matches_per_sector_loops():
+    b = make(seed=1)
+    bins.empty_bins(b, b["sector"] == 2)
+    ttf = bins.time_to_full(b, 9)
+    summary = bins.sector_summary(b, 12, ttf)
+    for s in range(12):
+        mine = b["sector"] == s
+        fill = b["fill_pct"][mine]
+        assert summary["bins"][s] == mine.sum()
+        assert np.isclose(summary["mean_fill"][s], fill.mean())
+        assert summary["max_fill"][s] == fill.max()
+        assert summary["overflow_bins"][s] == (fill > 85).sum()
+        assert summary["min_time_to_full"][s] == ttf[mine].min()
+    assert summary["max_fill"][2] == 0 and np.all(b["hours_since_collection"][b["sector"] == 2] == 0)
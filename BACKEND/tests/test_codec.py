@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from storage import DayArchive
+from storage.codec import BLOCK_SIZE, decode_floats, decode_timestamps, encode_floats, encode_timestamps
+
+
+def readings(n, dtype, rng):
+    """Half smooth (XOR-packed blocks), half noise (raw blocks), with the special values."""
+    smooth = 50 + np.cumsum(rng.normal(0, 1e-3, n - n // 2))
+    values = np.concatenate([rng.uniform(0, 100, n // 2), smooth]).astype(dtype)
+    for i, special in zip((3, 7, 9, 11), (np.nan, np.inf, -0.0, -np.inf)):
+        if i < n:
+            values[i] = special
+    return values
+
+
+def same_bits(a, b):
+    return a.dtype == b.dtype and a.shape == b.shape and np.array_equal(a.view(np.uint8), b.view(np.uint8))
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("n", [0, 1, 5, BLOCK_SIZE, BLOCK_SIZE + 1, 5000])
+def test_floats_round_trip(dtype, n):
+    values = readings(n, dtype, np.random.default_rng(n))
+    data = encode_floats(values)
+    assert same_bits(decode_floats(data), values)
+    for start, stop in [(3, n - 2), (n // 3, n // 2), (BLOCK_SIZE - 1, BLOCK_SIZE + 1), (n, n)]:
+        start, stop = min(start, n), max(min(stop, n), min(start, n))
+        assert same_bits(decode_floats(data, start, stop), values[start:stop])
+
+
+def test_floats_keep_their_shape():
+    values = np.random.default_rng(0).normal(size=(3, 700)).astype(np.float32)
+    assert same_bits(decode_floats(encode_floats(values)), values)
+    assert same_bits(decode_floats(encode_floats(values), 700, 1400), values[1])
+
+
+def test_noise_costs_no_more_than_the_plain_array():
+    noise = np.random.default_rng(0).uniform(0, 100, 10 * BLOCK_SIZE).astype(np.float32)
+    assert len(encode_floats(noise)) < noise.nbytes * 1.01
+    flat = np.full(10 * BLOCK_SIZE, 21.5, dtype=np.float32)
+    assert len(encode_floats(flat)) < 200
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 5000])
+def test_timestamps_round_trip(n):
+    rng = np.random.default_rng(n)
+    for ts in (1.7e9 + 60.0 * np.arange(n), 1.7e9 + np.cumsum(rng.uniform(1, 30, n))):
+        restored = decode_timestamps(encode_timestamps(ts))
+        assert restored.shape == (n,)
+        assert np.allclose(restored, ts, rtol=0, atol=1e-6)
+    assert len(encode_timestamps(1.7e9 + 60.0 * np.arange(5000))) < 100
+
+
+def test_streams_are_checked():
+    with pytest.raises(ValueError):
+        decode_timestamps(encode_floats(np.zeros(3)))
+    with pytest.raises(ValueError):
+        decode_floats(b"NOPE" + bytes(64))
+
+
+def test_archive_reads_back_what_it_wrote(tmp_path):
+    rng = np.random.default_rng(0)
+    archive = DayArchive(str(tmp_path), {"a": (), "s": (4,)})
+    ts = 1.7e9 + np.cumsum(rng.uniform(60, 600, 2000))
+    a = rng.normal(size=ts.size).astype(np.float32)
+    s = rng.uniform(0, 100, (ts.size, 4)).astype(np.float32)
+    archive.write(ts[:1500], a=a[:1500], s=s[:1500])
+    archive.write(ts[1500:], a=a[1500:], s=s[1500:])  # merges into the last day written
+    assert len(archive.days()) > 1
+    assert {name for _, _, files in os.walk(tmp_path) for name in files} == {"ts.gor", "a.gor", "s.gor"}
+    out = archive.read()
+    assert np.allclose(out["ts"], ts, rtol=0, atol=1e-6)
+    assert same_bits(out["a"], a) and same_bits(out["s"], s)
+    part = archive.read(out["ts"][300], out["ts"][1700], columns=["s"], sectors=[3, 1])
+    assert same_bits(part["s"], np.ascontiguousarray(s[300:1700, [1, 3]]))
@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+import pytest
+
+from ui.downsample import downsample, lttb, minmax
+
+
+def reference_lttb(x, y, threshold):
+    """Steinarsson's LTTB, point by point."""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    a, sampled = 0, [0]
+    for i in range(threshold - 2):
+        avg_start, avg_end = math.floor((i + 1) * every) + 1, min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(best)
+        a = best
+    return sampled + [n - 1]
+
+
+@pytest.mark.parametrize("n, points", [(1000, 100), (1001, 37), (5000, 999), (150, 3), (12, 11)])
+def test_lttb_matches_the_reference(n, points):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 2.0, n))  # uneven spacing
+    y = np.cumsum(rng.normal(size=n))
+    assert lttb(x, y, points).tolist() == reference_lttb(x.tolist(), y.tolist(), points)
+
+
+@pytest.mark.parametrize("n, points", [(1000, 100), (1001, 37), (5000, 1000), (10, 4)])
+def test_minmax_keeps_every_extreme(n, points):
+    y = np.random.default_rng(n).normal(size=n)
+    keep = minmax(y, points)
+    assert keep.size <= points and np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == n - 1
+    edges = np.floor(np.linspace(0, n, (points - 2) // 2 + 1)).astype(int)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        assert lo + int(np.argmin(y[lo:hi])) in keep and lo + int(np.argmax(y[lo:hi])) in keep
+
+
+def test_downsample_keeps_x_and_short_series():
+    t = np.datetime64("2026-01-01T00:00") + np.arange(3000) * np.timedelta64(10, "s")
+    y = np.sin(np.arange(3000) / 50.0)
+    xs, ys = downsample(t, y, 200)
+    assert xs.dtype == t.dtype and xs.size == ys.size == 200
+    assert np.array_equal(ys, y[np.searchsorted(t, xs)])
+    assert np.array_equal(xs, t[lttb(np.arange(3000) * 10.0, y, 200)])  # datetimes spaced like seconds
+    short_x, short_y = downsample(t[:50], y[:50], 200)
+    assert np.array_equal(short_x, t[:50]) and np.array_equal(short_y, y[:50])
+    with pytest.raises(ValueError):
+        downsample(t, y, 200, mode="average")
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+
+from engine.grid import Grid, load_grid, row_label
+
+
+def test_names_and_lookups():
+    grid = Grid(30, 4, inactive=["A1", "AC3"])
+    assert [row_label(r) for r in (0, 25, 26, 27, 701, 702)] == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
+    assert grid.n == 118 and grid.sectors[:3] == ["A2", "A3", "A4"] and "AC3" not in grid.index
+    idx = grid.sector_index(["B1", "AD4", "A1", "nope"])
+    assert idx.tolist()[2:] == [-1, -1]
+    assert grid.sector_at(grid.rows[idx[:2]], grid.cols[idx[:2]]).tolist() == idx[:2].tolist()
+    assert grid.sector_at([-1, 0, 30, 5], [0, 0, 0, 4]).tolist() == [-1, -1, -1, -1]
+
+    # neighbours: the brute-force scan of every sector pair
+    for diagonal in (False, True):
+        table = grid.neighbors(diagonal=diagonal)
+        for i in range(grid.n):
+            near = {j for j in range(grid.n) if j != i and abs(grid.rows[j] - grid.rows[i]) <= 1
+                    and abs(grid.cols[j] - grid.cols[i]) <= 1
+                    and (diagonal or grid.rows[j] == grid.rows[i] or grid.cols[j] == grid.cols[i])}
+            assert set(table[i][table[i] >= 0].tolist()) == near
+
+
+def test_point_index_matches_a_scan():
+    rng = np.random.default_rng(0)
+    grid = Grid(7, 9, inactive=["C5"], origin=(121.0, 14.6), cell_size=(0.01, -0.01))
+    x = rng.uniform(120.99, 121.1, 5000)
+    y = rng.uniform(14.52, 14.61, 5000)
+    x[0] = np.nan
+    index = grid.index_points(x, y)
+    col, row = np.floor((x - 121.0) / 0.01), np.floor((y - 14.6) / -0.01)
+    for k, (r, c) in enumerate(zip(grid.rows.tolist(), grid.cols.tolist())):
+        assert sorted(index.points(k).tolist()) == np.flatnonzero((row == r) & (col == c)).tolist()
+    outside = np.setdiff1d(np.arange(x.size), index.order)
+    assert np.all(index.sector[outside] == -1) and np.all(index.sector[index.order] >= 0)
+    assert index.sector[0] == -1
+    assert sorted(index.within([0, 5]).tolist()) == sorted(index.points(0).tolist() + index.points(5).tolist())
+    assert index.within([]).size == 0
+
+
+def test_grid_from_config(tmp_path):
+    path = tmp_path / "grid.json"
+    path.write_text(json.dumps({"rows": 2, "cols": 3, "inactive": ["B3"], "types": {"A1": "Commercial"}}))
+    grid = load_grid(str(path))
+    assert grid.sectors == ["A1", "A2", "A3", "B1", "B2"]
+    assert grid.types[:2] == ["Commercial", "Commercial"] and grid.type_mult[0] == 1.6
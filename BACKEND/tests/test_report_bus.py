@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from engine.reports import WINDOW_H
+from storage import ReportBus, ReportStore
+
+SECTORS = ["A1", "A2", "B1", "B2"]
+
+
+def test_reports_leave_the_bus_with_the_window():
+    store = ReportStore(":memory:")
+    bus = ReportBus(SECTORS, store)
+    start = datetime(2026, 3, 1)
+    for i in range(200):
+        bus.publish([{"sector": SECTORS[i % 4], "issue": "Accident", "severity": 3, "comment": f"crash {i}",
+                      "ts": start + timedelta(hours=i)}])
+    now = start + timedelta(hours=199)
+    view = bus.subscribe("traffic")
+    with bus.lock:
+        view.citizen_norm(5, now)
+    assert len(view) == WINDOW_H + 1
+    assert len(bus._domain) == len(bus._seen) == len(view)
+    assert len(store) == 200  # the admin queue keeps every report
+
+    # reports still in the window are still known to the bus
+    assert bus.publish([{"id": next(iter(view))["id"], "sector": "A1", "issue": "Accident", "ts": now}]) == []
+    assert bus.remove(next(iter(view))["id"]) is not None
@@ -0,0 +1,133 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from storage import ReportStore
+from storage.report_store import KEY_SLOTS, STATUS_RANK, TRANSITIONS, content_hash
+
+CATEGORIES = ["Traffic", "Streetlight", "Waste Management"]
+WORDS = ["garbage", "bin", "light", "pothole", "flood", "noise"]
+
+
+def make_reports(n, ts, rng):
+    return [{"id": f"r{i:05d}", "ts": float(ts[i]), "name": f"Citizen {i}",
+             "category": CATEGORIES[i % 3], "location_text": f"Sector {i % 7}",
+             "severity": ["Minor", "Major", "Critical"][i % 3 if i % 5 else 2],
+             "description": " ".join(rng.choice(WORDS, 3)) + f" #{i}",
+             "status": "Submitted"} for i in range(n)]
+
+
+@pytest.fixture
+def store():
+    store = ReportStore(":memory:")
+    yield store
+    store.close()
+
+
+def walk(store, **kwargs):
+    """Every page of a cursor walk, concatenated."""
+    out, cursor = [], None
+    while True:
+        page, cursor = store.page(cursor=cursor, limit=97, **kwargs)
+        out += page
+        if cursor is None:
+            return out
+
+
+def test_same_millisecond_reports_fill_the_slots_then_fail(store):
+    rng = np.random.default_rng(0)
+    reports = make_reports(KEY_SLOTS + 1, np.full(KEY_SLOTS + 1, 1.7e9), rng)
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_many(reports)
+    assert len(store) == 0  # the whole batch rolled back, nothing silently dropped
+    assert store.add_many(reports[:-1]) == KEY_SLOTS
+    assert store.add_many(reports[:10]) == 0  # same ids: skipped, not an overflow
+    assert len(walk(store)) == KEY_SLOTS
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add(reports[-1])
+    assert store.add(dict(reports[-1], ts=1.7e9 + 0.001)) == 1  # the next millisecond has room
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"sort": "Status"}, {"sort": "Severity (Critical→Minor)"},
+                                    {"search": "flood"}, {"categories": ["Traffic"], "search": "bin"}])
+def test_pages_are_newest_first(store, kwargs):
+    rng = np.random.default_rng(1)
+    ts = 1.7e9 + rng.integers(0, 50, 1200).astype(float)  # many ties, inserted out of order
+    reports = make_reports(1200, ts, rng)
+    store.add_many(reports)
+    store.transition("Verified", categories=["Streetlight"])
+
+    rows = walk(store, **kwargs)
+    assert [r["id"] for r in rows] == [r["id"] for r in store.query(limit=None, **kwargs)]
+    assert len({r["id"] for r in rows}) == len(rows) == store.count(**{k: v for k, v in kwargs.items() if k != "sort"})
+    keys = {"Status": lambda r: -["Submitted", "Verified"].index(r["status"]),
+            "Severity (Critical→Minor)": lambda r: ["Minor", "Major", "Critical"].index(r["severity"])}
+    group = keys.get(kwargs.get("sort"), lambda r: 0)
+    # sort groups in order, newest first within each, ties in insertion order reversed
+    order = [(group(r), r["ts"], int(r["id"][1:])) for r in rows]
+    assert order == sorted(order, reverse=True)
+
+
+def test_duplicates_are_bucketed_by_local_date(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        report = {"location_text": "Sector 3", "category": "Waste Management", "description": "Bin overflowing"}
+        evening, night = datetime(2026, 7, 1, 19, 30), datetime(2026, 7, 1, 20, 30)  # UTC midnight between
+        assert content_hash(dict(report, ts=evening)) == content_hash(dict(report, ts=night))
+        assert content_hash(dict(report, ts=night)) != content_hash(dict(report, ts=datetime(2026, 7, 2, 0, 30)))
+        assert content_hash(dict(report, ts=night)) != content_hash(dict(report, ts=night, description="Bin broken"))
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_same_text_from_different_reporters_is_kept(store):
+    report = {"ts": datetime(2026, 7, 1, 9, 0), "category": "Waste Management", "location_text": "Sector 3",
+              "description": "Bin overflowing"}
+    first = [dict(report, id="a", name="Ana Cruz"), dict(report, id="b", name="Ben Reyes")]
+    assert store.add_many(first) == 2
+    again = dict(report, id="c", name=" ana  CRUZ ", ts=datetime(2026, 7, 1, 17, 0), description="bin overflowing")
+    assert store.add_many([again]) == 0
+    assert store.count() == 2
+
+
+def test_bulk_transitions_follow_the_state_machine(store):
+    rng = np.random.default_rng(2)
+    reports = make_reports(600, 1.7e9 + np.arange(600.0), rng)
+    store.add_many(reports)
+    model = {r["id"]: dict(r, assigned_to="") for r in reports}
+    with pytest.raises(ValueError):
+        store.transition("Submitted")
+    for step in range(40):
+        status = [None, "Verified", "Assigned", "In Progress", "Resolved"][step % 5]
+        kwargs = {"categories": [CATEGORIES[step % 3]] if step % 2 else None,
+                  "statuses": ["Submitted", "Verified"] if step % 3 == 0 else None,
+                  "search": WORDS[step % 6] if step % 4 == 1 else "",
+                  "ids": [f"r{i:05d}" for i in rng.choice(600, 100)] if step % 2 == 0 or status == "Resolved" else None}
+        assigned_to = f"Team {step % 3}" if step % 3 == 1 else None
+        matched = [r for r in model.values()
+                   if (kwargs["categories"] is None or r["category"] in kwargs["categories"])
+                   and (kwargs["statuses"] is None or r["status"] in kwargs["statuses"])
+                   and (not kwargs["search"] or kwargs["search"] in r["description"].split())
+                   and (kwargs["ids"] is None or r["id"] in kwargs["ids"])]
+        moving = [r for r in matched if status is not None and r["status"] in TRANSITIONS[status]]
+        expected = {"matched": len(matched), "moved": len(moving), "rejected": len(matched) - len(moving),
+                    "assigned": sum(assigned_to is not None and r["assigned_to"] != assigned_to for r in matched)}
+        if status is None:
+            expected["rejected"] = 0
+        assert store.transition(status, assigned_to, (2, 5), **kwargs) == expected
+        for r in moving:
+            r["status"] = status
+        for r in matched:
+            r["assigned_to"] = assigned_to if assigned_to is not None else r["assigned_to"]
+        rows = {r["id"]: r for r in store.query(limit=None)}
+        assert all(rows[i]["status"] == r["status"] and rows[i]["assigned_to"] == r["assigned_to"]
+                   for i, r in model.items())
+        assert all(2 <= rows[r["id"]]["response_time_days"] <= 5 for r in moving)
+        for s in STATUS_RANK:  # the per-group counts follow the moves
+            assert store.count(statuses=[s]) == sum(r["status"] == s for r in model.values())
+    assert {r["status"] for r in model.values()} == set(STATUS_RANK)
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from engine.reports import HALF_LIFE_H, WINDOW_H, ReportIndex, ReportWindow
+from ui.reports import REPORT_COLUMNS, reports_table
+
+T0 = 1.7e9
+SECTORS = ["A1", "A2", "B1", "B2"]
+
+
+def test_severity_halves_every_half_life():
+    window = ReportWindow(2)
+    window.add("r1", 1, 4.0, ts=T0)
+    assert window.severity(T0)[1] == pytest.approx(4.0)
+    assert window.severity(T0 + HALF_LIFE_H * 3600)[1] == pytest.approx(2.0)
+    assert window.severity(T0 + 3 * HALF_LIFE_H * 3600)[1] == pytest.approx(0.5)
+    assert not window.severity(T0 + WINDOW_H * 3600 + 1).any()
+    assert len(window) == 0
+
+
+def test_window_matches_brute_force():
+    rng = np.random.default_rng(0)
+    window = ReportWindow(len(SECTORS), capacity=8)  # small, so it grows and compacts
+    rate = np.log(2) / (HALF_LIFE_H * 3600)
+    live = {}
+    t = order = T0
+    for i in range(3000):
+        t += rng.exponential(600)
+        ts = t - rng.uniform(0, 3600) if i % 7 == 0 else t  # some arrive late ...
+        order = max(order, ts)  # ... and leave the window with the report they arrived after
+        sector = int(rng.integers(0, len(SECTORS)))
+        severity = float(rng.integers(1, 6))
+        window.add(i, sector, severity, severity >= 4, ts=ts)
+        live[i] = (ts, order, sector, severity)
+        if i % 5 == 0:
+            gone = int(rng.choice(list(live)))
+            window.remove(gone)
+            del live[gone]
+        if i % 50 == 0:
+            live = {k: v for k, v in live.items() if v[1] >= t - WINDOW_H * 3600}
+            expected = np.zeros(len(SECTORS))
+            severe = np.zeros(len(SECTORS), dtype=np.int64)
+            for ts_, _, s, sev in live.values():
+                expected[s] += sev * np.exp(-rate * (t - ts_))
+                severe[s] += sev >= 4
+            assert np.allclose(window.severity(t), expected, rtol=1e-9, atol=1e-9)
+            assert np.array_equal(window.severe, severe)
+            assert len(window) == len(live)
+    assert len(window) < 500  # bounded by the window, not by the 3000 reports
+
+
+def test_late_reports_expire_in_order():
+    window = ReportWindow(1)
+    window.add("new", 0, 1.0, ts=T0)
+    window.add("old", 0, 1.0, ts=T0 - 3600)  # arrives after "new"
+    window.expire(T0 - 3600 + WINDOW_H * 3600 + 1)
+    assert len(window) == 2  # held back until "new" leaves too
+    window.expire(T0 + WINDOW_H * 3600 + 1)
+    assert len(window) == 0
+
+
+def test_index_evicts_reports_outside_the_window():
+    index = ReportIndex(SECTORS)
+    evicted = []
+    index.on_evict = evicted.append
+    for i in range(100):
+        index.add({"id": f"r{i}", "sector": SECTORS[i % 4], "issue": "Accident", "severity": 3,
+                   "ts": T0 + i * 3600})
+    now = T0 + 99 * 3600
+    norm = index.citizen_norm(5, now)
+    assert norm.shape == (len(SECTORS),)
+    kept = [r["id"] for r in index]
+    assert kept == [f"r{i}" for i in range(100) if T0 + i * 3600 >= now - WINDOW_H * 3600]
+    assert len(index) == len(kept) and len(evicted) == 100 - len(kept)
+    assert "r0" not in index
+    assert index.count.sum() == len(kept)
+    assert index.recent_severe(now) == index.severe_total == len(kept)
+    assert {r["id"] for r in index.select(["Accident"])} == set(kept)
+
+
+def test_index_aggregates_match_the_reports():
+    rng = np.random.default_rng(1)
+    index = ReportIndex(SECTORS)
+    reports = {}
+    issues = ["Accident", "Pothole", "Flooding"]
+    for i in range(2000):
+        if reports and rng.random() < 0.3:
+            gone = str(rng.choice(sorted(reports)))
+            assert index.remove(gone) is reports.pop(gone)
+        else:  # some ids come back: the new report replaces the old one
+            report = {"id": f"r{int(rng.integers(0, 400)):03d}", "sector": str(rng.choice(SECTORS + ["Z9"])),
+                      "issue": str(rng.choice(issues)), "severity": int(rng.integers(1, 6)), "ts": T0 + i}
+            index.add(report)
+            reports[report["id"]] = report
+    assert index.remove("missing") is None
+    live = list(reports.values())
+    for k, sector in enumerate(SECTORS):
+        mine = [r for r in live if r["sector"] == sector]
+        assert index.count[k] == len(mine)
+        assert index.severity_sum[k] == sum(r["severity"] for r in mine)
+        assert index.severe_count[k] == sum(index.is_severe(r) for r in mine)
+        assert index.incidents_norm(T0 + 2000)[k] == float(index.severe_count[k] > 0)
+    assert index.severe_total == index.recent_severe(T0 + 2000) == sum(index.is_severe(r) for r in live)
+    assert len(index) == len(live) and all(r["id"] in index for r in live)
+    for wanted, min_severity in [(["Accident"], 3), (["Pothole", "Flooding"], 1), ([], 1)]:
+        expected = sorted((r for r in live if r["issue"] in wanted and r["severity"] >= min_severity),
+                          key=lambda r: (r["ts"], r["id"]))
+        assert index.select(wanted, min_severity) == expected
+
+
+def test_report_table_survives_an_emptied_window():
+    index = ReportIndex(SECTORS)
+    start = datetime(2026, 3, 1, 8)
+    for i in range(3):
+        index.add({"id": f"r{i}", "sector": "A1", "issue": "Accident", "severity": 2, "comment": "",
+                   "ts": start + timedelta(hours=i)})
+    table = reports_table(index)
+    assert table["id"].tolist() == ["r2", "r1", "r0"]  # newest first
+    index.citizen_norm(5, start + timedelta(hours=WINDOW_H + 3))  # every report has left the window
+    assert len(index) == 0
+    table = reports_table(index)
+    assert table.empty and table.columns.tolist() == REPORT_COLUMNS
+
+
+def test_select_orders_by_report_time():
+    index = ReportIndex(SECTORS)
+    for report_id, hours in [("f3a9", 2), ("07bc", 0), ("c1d2", 1), ("0aaa", 1)]:
+        index.add({"id": report_id, "sector": "A1", "issue": "Accident", "severity": 3, "ts": T0 + hours * 3600})
+    assert [r["id"] for r in index.select(["Accident"])] == ["07bc", "0aaa", "c1d2", "f3a9"]
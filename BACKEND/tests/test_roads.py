@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from engine import roads
+from engine.grid import Grid
+from engine.roads import RoadNetwork, Rerouter, sample_od
+
+
+def assert_exact(rerouter):
+    """Trees match a fresh Dijkstra on the current costs, and every parent road is tight."""
+    network = rerouter.network
+    costs = rerouter.costs.tolist()
+    for r, s in enumerate(rerouter.sources.tolist()):
+        dist, _, _ = network.tree(s, costs)
+        assert np.allclose(rerouter.dist[r], dist, rtol=0, atol=1e-9)
+        via = rerouter.via[r]
+        has = via >= 0
+        assert np.array_equal(network.src[via[has]], rerouter.parent[r][has])
+        assert np.allclose(rerouter.dist[r][has], rerouter.dist[r][rerouter.parent[r][has]] + rerouter.costs[via[has]])
+
+
+@pytest.mark.parametrize("repair_max_roads", [1.0, roads.REPAIR_MAX_ROADS])
+def test_repaired_trees_match_dijkstra(monkeypatch, repair_max_roads):
+    monkeypatch.setattr(roads, "REPAIR_MAX_ROADS", repair_max_roads)  # 1.0: always repair
+    rng = np.random.default_rng(0)
+    grid = Grid(8, 8)
+    rerouter = Rerouter(RoadNetwork(grid.neighbors()), *sample_od(grid.n, rng, n_pairs=300))
+    congestion = rng.uniform(30, 140, grid.n)
+    for step in range(30):
+        changed = rng.random(grid.n) < [0.02, 0.1, 0.5][step % 3]
+        congestion = np.where(changed, rng.uniform(0, 200, grid.n), congestion)
+        rerouter.update(congestion)
+        assert_exact(rerouter)
+
+
+def test_incident_reroutes_around_the_blocked_sector():
+    grid = Grid(5, 5)
+    network = RoadNetwork(grid.neighbors())
+    rerouter = Rerouter(network, [0], [4], [1.0])  # along the top row
+    congestion = np.full(grid.n, 50.0)
+    rerouter.update(congestion)
+    assert rerouter.path(0, 4) == [0, 1, 2, 3, 4]
+    congestion[2] = 1000.0
+    rerouter.update(congestion)
+    path = rerouter.path(0, 4)
+    assert 2 not in path and path[0] == 0 and path[-1] == 4
+    assert rerouter.rerouted().all()
+    flow = rerouter.flows()
+    assert flow[path].tolist() == [1.0] * len(path) and flow.sum() == len(path)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from engine.routing import CELL_KM, SERVICE_H, TRUCK_SPEED_KMH, plan_routes
+
+H = CELL_KM / TRUCK_SPEED_KMH  # hours per grid unit
+
+
+def check_tour(route, x, y, demand, ready, due, capacity, shift_h, depot=(0.0, 0.0)):
+    """Drive one tour stop by stop: (load, distance in grid units, return time), asserting every window."""
+    t, load, dist = 0.0, 0.0, 0.0
+    px, py = depot
+    for s in route.tolist():
+        leg = abs(x[s] - px) + abs(y[s] - py)
+        dist += leg
+        t = max(t + leg * H, ready[s])
+        assert t <= due[s] + 1e-9, f"stop {s} reached after its due time"
+        t += SERVICE_H
+        load += demand[s]
+        px, py = x[s], y[s]
+    leg = abs(depot[0] - px) + abs(depot[1] - py)
+    dist += leg
+    t += leg * H
+    assert load <= capacity + 1e-9
+    assert t <= shift_h + 1e-9
+    return load, dist, t
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("windows", [False, True])
+def test_routes_are_feasible(seed, windows):
+    rng = np.random.default_rng(seed)
+    n, n_trucks, capacity, shift_h = 120, 4, 12.0, 1.5
+    x, y = rng.uniform(0, 10, n), rng.uniform(0, 10, n)
+    demand = rng.uniform(0.3, 1.2, n)
+    ready = rng.uniform(0, 0.8, n) if windows else np.zeros(n)
+    due = ready + rng.uniform(0.2, 1.0, n) if windows else np.full(n, np.inf)
+    plan = plan_routes(x, y, demand, n_trucks, capacity, ready=ready if windows else None, due=due, shift_h=shift_h)
+
+    served = plan["served"]
+    assert np.unique(served).size == served.size  # no bin twice
+    assert np.array_equal(np.sort(np.concatenate([served, plan["unserved"]])), np.arange(n))
+    for k, route in enumerate(plan["routes"]):
+        load, dist, t = check_tour(route, x, y, demand, ready, due, capacity, shift_h)
+        assert np.isclose(plan["load"][k], load)
+        assert np.isclose(plan["distance_km"][k], dist * CELL_KM)
+        if route.size:
+            assert np.isclose(plan["duration_h"][k], t)
+    assert served.size > 0
+
+    greedy = plan_routes(x, y, demand, n_trucks, capacity, ready=ready if windows else None, due=due,
+                         shift_h=shift_h, local_search=False)
+    assert served.size >= greedy["served"].size  # local search only moves or adds bins
+
+
+def test_no_trucks_or_no_stops():
+    plan = plan_routes(np.arange(3.0), np.zeros(3), np.ones(3), 0)
+    assert plan["routes"] == [] and plan["unserved"].tolist() == [0, 1, 2]
+    plan = plan_routes(np.empty(0), np.empty(0), np.empty(0), 2)
+    assert [r.size for r in plan["routes"]] == [0, 0] and plan["served"].size == 0
@@ -0,0 +1,67 @@
+import numpy as np
+
+from engine import CitySimulation, TickScheduler
+
+
+class RecordingCity(CitySimulation):
+    """Remembers the citizen inputs each domain was stepped with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.seen = {}
+
+    def step_traffic(self, **controls):
+        self.seen["traffic"] = self.citizen_norm.copy()
+        return super().step_traffic(**controls)
+
+    def step_waste(self, hour, **controls):
+        self.seen["waste"] = self.citizen_norm.copy()
+        return super().step_waste(hour, **controls)
+
+
+def test_citizen_inputs_are_per_domain():
+    city = RecordingCity(seed=0)
+    scheduler = TickScheduler(city)
+    scheduler.set_citizen_inputs("traffic", np.full(city.n, 0.8))
+    scheduler.tick(0)
+    assert np.all(city.seen["traffic"] == 0.8)
+    assert not city.seen["waste"].any()  # not traffic's leftovers
+
+    scheduler.set_citizen_inputs("waste", np.full(city.n, 0.3))
+    scheduler.tick(10)
+    assert np.all(city.seen["traffic"] == 0.8)
+    assert np.all(city.seen["waste"] == 0.3)
+
+
+def test_rerun_does_not_undo_another_sessions_change():
+    scheduler = TickScheduler(CitySimulation(seed=0))
+    mine = dict(situation="Normal", lane_closure=0)
+    assert scheduler.set_controls("traffic", None, **mine)["situation"] == "Normal"
+    scheduler.set_controls("traffic", mine, **dict(mine, situation="Rush Hour"))  # another session
+
+    running = scheduler.set_controls("traffic", mine, **mine)  # the first one reruns
+    assert running["situation"] == "Rush Hour"
+    running = scheduler.set_controls("traffic", mine, **dict(mine, lane_closure=20))
+    assert running["situation"] == "Rush Hour" and running["lane_closure"] == 20
+
+
+def test_early_collection_applies_once():
+    city = CitySimulation.from_grid(10, 10, seed=0)  # more sectors than the trucks reach
+    scheduler = TickScheduler(city)
+    city.hours_since_collection[:] = 20
+    scheduler.set_controls("waste", early_collection=True)
+    scheduler.tick(0)
+    assert scheduler.controls("waste")["early_collection"] is False
+    scheduler.tick(10)
+    # 20 - 8 once, then an hour per tick (sectors the trucks collected start again from 0)
+    hours = city.hours_since_collection
+    assert (hours > 2).any()
+    assert np.all((hours == 14) | (hours <= 2))
+
+
+def test_run_applies_early_collection_once():
+    plain = CitySimulation(seed=0).run(48, record=("hours_since_collection",))["hours_since_collection"]
+    early = CitySimulation(seed=0).run(48, record=("hours_since_collection",),
+                                       early_collection=True)["hours_since_collection"]
+    assert np.all(early[:, 0] <= plain[:, 0])
+    assert (early[:, 1:] - early[:, :-1] <= 1).all()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from engine.sweep import ALERT_PCT, pareto_front, sample_weights, score, sweep
+
+
+def history(rng, n=4000):
+    inputs = rng.random((3, n))
+    outcome = inputs[0] + 0.5 * inputs[1] + rng.normal(0, 0.3, n) > 1.0
+    return inputs, outcome
+
+
+def test_sweep_matches_direct_rates():
+    rng = np.random.default_rng(0)
+    inputs, outcome = history(rng)
+    weights = sample_weights(50, 3, rng, (0.6, 0.3, 0.1))
+    result = sweep(inputs, outcome, weights)
+    for i in (0, 7, 49):
+        s = score(inputs, weights[i:i + 1])[0]
+        assert result["hit_rate"][i] == (s[outcome] >= ALERT_PCT).mean()
+        assert result["false_alarm"][i] == (s[~outcome] >= ALERT_PCT).mean()
+        # agreement: chance an event scores above a non-event, ties half
+        diff = s[outcome][:, None] - s[~outcome][None, :]
+        assert np.isclose(result["agreement"][i], (diff > 0).mean() + 0.5 * (diff == 0).mean())
+    assert result["agreement"][result["rank"][0]] == np.nanmax(result["agreement"])
+
+
+def test_worker_processes_give_the_same_result():
+    rng = np.random.default_rng(1)
+    inputs, outcome = history(rng, 600)
+    weights = sample_weights(4000, 3, rng)  # several blocks
+    one = sweep(inputs, outcome, weights)
+    two = sweep(inputs, outcome, weights, workers=2)
+    for key in ("hit_rate", "false_alarm", "agreement", "rank", "front"):
+        assert np.array_equal(one[key], two[key], equal_nan=True)
+
+
+def test_pareto_front():
+    hit = np.array([0.5, 0.6, 0.6, 0.9, 0.4])
+    false = np.array([0.1, 0.1, 0.3, 0.5, 0.0])
+    assert pareto_front(hit, false).tolist() == [4, 1, 3]
@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from engine import TICK_SECONDS
+from storage import DAY, DEFAULT_CAPACITY, HOUR, MINUTE, DayArchive, RingSeries, TieredSeries
+from storage import timeseries
+from storage.timeseries import _bucket
+
+COLUMNS = {"a": (), "s": (3,)}
+
+
+def brute(ts, a, s, start, end, res, sectors):
+    """Rollups of the samples in [start, end) widened to whole buckets, computed directly."""
+    start = _bucket(start, res)
+    edge = _bucket(end, res)
+    end = edge + res if edge < end else end
+    m = (ts >= start) & (ts < end)
+    b = _bucket(ts[m], res)
+    u = np.unique(b)
+    return {"ts": u, "a": np.array([a[m][b == x].mean() for x in u]),
+            "a_min": np.array([a[m][b == x].min() for x in u]),
+            "count": np.array([(b == x).sum() for x in u]),
+            "s_max": np.array([s[m][:, sectors][b == x].max(0) for x in u]).reshape(-1, len(sectors))}
+
+
+@pytest.fixture(scope="module")
+def filled(tmp_path_factory):
+    """Two days of irregular samples, with a restart part way through."""
+    directory = tmp_path_factory.mktemp("tiered")
+    rng = np.random.default_rng(0)
+    n = 6000
+    ts = 1.7e9 + np.cumsum(rng.uniform(5, 40, n))
+    a = rng.normal(size=n).astype(np.float32)
+    s = rng.normal(size=(n, 3)).astype(np.float32)
+    series = TieredSeries(str(directory), COLUMNS, capacity=1500)
+    for i in range(n):
+        series.append(ts[i], a=a[i], s=s[i])
+        if i == 2000:
+            series.close()
+            series = TieredSeries(str(directory), COLUMNS, capacity=1500)
+    return series, ts, a, s
+
+
+def test_ring_keeps_latest_rows(tmp_path):
+    ring = RingSeries(str(tmp_path), COLUMNS, capacity=10)
+    for i in range(25):
+        ring.append(1000.0 + i, a=i, s=np.full(3, i))
+    rows = ring.window()
+    assert len(ring) == 10
+    np.testing.assert_array_equal(rows["a"], np.arange(15, 25))
+    np.testing.assert_array_equal(rows["s"][:, 1], np.arange(15, 25))
+
+
+@pytest.mark.parametrize("lo, hi, res", [(-1200, None, 300), (-1400, -100, MINUTE), (-3000, None, HOUR),
+                                         (-900, -1, 45), (-500, None, 2 * HOUR)])
+def test_query_matches_brute_force(filled, lo, hi, res):
+    series, ts, a, s = filled
+    start, end = ts[lo], ts[-1] + 1 if hi is None else ts[hi]
+    q = series.query(start, end, res, sectors=[2, 0])
+    ref = brute(ts, a, s, start, end, res, [0, 2])
+    # compare the buckets both hold: the rings no longer keep the oldest samples
+    common = np.isin(q["ts"], ref["ts"])
+    keep = np.isin(ref["ts"], q["ts"][common])
+    assert common.sum() > 0
+    np.testing.assert_allclose(q["a"][common], ref["a"][keep], atol=1e-4)
+    np.testing.assert_allclose(q["a_min"][common], ref["a_min"][keep])
+    np.testing.assert_array_equal(q["count"][common], ref["count"][keep])
+    np.testing.assert_allclose(q["s_max"][common], ref["s_max"][keep])
+
+
+@pytest.mark.parametrize("res", [HOUR, 3 * HOUR, DAY])
+def test_coarse_queries_answer_the_whole_history(filled, res):
+    """Hour and day rollups outlive the raw ring: every bucket of the full range is exact."""
+    series, ts, a, s = filled
+    q = series.query(ts[0], ts[-1] + 1, res, sectors=[1])
+    ref = brute(ts, a, s, ts[0], ts[-1] + 1, res, [1])
+    np.testing.assert_array_equal(q["ts"], ref["ts"])
+    np.testing.assert_array_equal(q["count"], ref["count"])
+    np.testing.assert_allclose(q["a"], ref["a"], atol=1e-4)
+    np.testing.assert_allclose(q["a_min"], ref["a_min"])
+    np.testing.assert_allclose(q["s_max"], ref["s_max"])
+
+
+def test_wrapped_levels_hand_over_to_coarser_ones(tmp_path, monkeypatch):
+    """Minutes older than the minute ring come from the hour and day rings, every sample counted once."""
+    monkeypatch.setitem(timeseries.ROLLUP_CAPACITY, MINUTE, 90)
+    monkeypatch.setitem(timeseries.ROLLUP_CAPACITY, HOUR, 30)
+    rng = np.random.default_rng(4)
+    ts = 1.7e9 + np.cumsum(rng.uniform(20, 100, 4000))  # about three days
+    a = rng.normal(size=ts.size)
+    series = TieredSeries(str(tmp_path), COLUMNS, capacity=200)
+    for t, v in zip(ts, a):
+        series.append(t, a=v, s=np.full(3, v))
+    for res, coarser in ((MINUTE, HOUR), (HOUR, DAY)):
+        ring = timeseries.ROLLUP_CAPACITY[res]
+        q = series.query(ts[0], resolution=res, columns=["a"])
+        assert q["count"].sum() == ts.size
+        assert np.all(np.diff(q["ts"]) > 0) and q["ts"][0] < ts[-1] - ring * res  # older than the ring
+        ref = brute(ts, a, np.tile(a[:, None], 3), ts[0], ts[-1] + 1, res, [0])
+        # since the last coarse boundary the requested resolution is still held
+        recent, keep = q["ts"] >= _bucket(ts[-1], coarser), ref["ts"] >= _bucket(ts[-1], coarser)
+        np.testing.assert_array_equal(q["ts"][recent], ref["ts"][keep])
+        np.testing.assert_array_equal(q["count"][recent], ref["count"][keep])
+        np.testing.assert_allclose(q["a"][recent], ref["a"][keep], atol=1e-5)
+
+
+def test_query_daily_counts_every_sample(filled):
+    series, ts, _, _ = filled
+    q = series.query(ts[0], resolution=DAY, columns=["a"])
+    assert q["count"].sum() == ts.size
+    assert np.all(np.diff(q["ts"]) == DAY)
+
+
+def test_query_without_resolution_returns_raw_rows(filled):
+    series, ts, a, _ = filled
+    q = series.query(ts[-100], columns=["a"])
+    np.testing.assert_array_equal(q["ts"], ts[-100:])
+    np.testing.assert_array_equal(q["a"], a[-100:])
+
+
+def test_query_counts_on_young_series(tmp_path):
+    """Randomized: no sample in range is lost while the coarse levels are still empty or partial."""
+    rng = np.random.default_rng(3)
+    steps = [1, 10, 30, 59, 61, 299, 301, 3599, 3601, 86401]
+    for trial in range(40):
+        directory = tmp_path / str(trial)
+        series = TieredSeries(str(directory), COLUMNS, capacity=50,
+                              archive=DayArchive(str(directory / "archive"), COLUMNS))
+        ts = 1.79e9 + rng.uniform(0, 86400)
+        times = []
+        for _ in range(rng.integers(1, 30)):
+            ts += rng.choice(steps)
+            series.append(ts, a=1.0, s=np.ones(3))
+            times.append(ts)
+            now = ts + rng.uniform(0, 5)
+            for res in (None, MINUTE, 300, HOUR, DAY):
+                for span in (HOUR, DAY, 7 * DAY, 365 * DAY):
+                    q = series.query(now - span, resolution=res, columns=["s"], sectors=[0])
+                    exact = sum(1 for t in times if t >= now - span)
+                    assert q["count"].sum() >= exact, (trial, res, span)
+
+
+def test_default_ring_holds_a_week_of_ticks():
+    assert timeseries.SAMPLE_SECONDS == TICK_SECONDS  # one sample per tick
+    assert DEFAULT_CAPACITY * TICK_SECONDS == 7 * DAY
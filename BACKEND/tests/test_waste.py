@@ -0,0 +1,14 @@
+import numpy as np
+
+from engine import CitySimulation, waste
+
+
+def test_collection_noise_covers_every_truck_dispatched():
+    rng = np.random.default_rng(0)
+    for scenario in waste.SCENARIO_PARAMS:
+        trucks = {waste.scenario_params(scenario, rng)[1] for _ in range(200)}
+        assert max(trucks) <= waste.MAX_TRUCKS
+    sim = CitySimulation.from_grid(10, 10, seed=0)
+    for extra in (0, 3):
+        _, reduction = sim._waste_noise(4, dict(sim._controls({}), extra_trucks=extra))
+        assert reduction.shape == (4, (waste.MAX_TRUCKS + extra) * waste.TRUCK_CAPACITY_SECTORS)
@@ -0,0 +1,16 @@
+"""
+Plotly building blocks shared by the dashboard pages (no Streamlit).
+"""
+from .downsample import MAX_POINTS, MODE_LABELS, downsample, lttb, minmax
+from .heatmap import add_markers, add_report_markers, band_index, sector_centers, sector_grid
+from .map_assets import DEFAULT_MAP_PATH, add_map_background, map_background
+from .reports import REPORT_COLUMNS, reports_table
+from .sweep import sweep_figure, sweep_table, weight_labels
+
+__all__ = [
+    "MAX_POINTS", "MODE_LABELS", "downsample", "lttb", "minmax",
+    "DEFAULT_MAP_PATH", "add_map_background", "map_background",
+    "add_markers", "add_report_markers", "band_index", "sector_centers", "sector_grid",
+    "REPORT_COLUMNS", "reports_table",
+    "sweep_figure", "sweep_table", "weight_labels",
+]
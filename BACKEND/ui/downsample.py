@@ -0,0 +1,98 @@
+"""
+Downsampling of line-chart series to a point budget before they go to Plotly.
+
+A chart a few hundred pixels wide cannot show more than a couple of points per
+pixel, but Plotly ships (and the browser draws) every point it is given, so a
+history of days of steps makes for megabytes of JSON per rerun. Two modes:
+
+- "lttb": Largest-Triangle-Three-Buckets. The first and last points are kept and
+  the rest split into points - 2 buckets; from each bucket the point forming the
+  largest triangle with the point kept before it and the mean of the next bucket
+  is kept. Keeps the visual shape of the line.
+- "minmax": the lowest and highest point of every bucket (in time order), so
+  every spike and dip survives, drawn as the envelope of the series.
+
+Both return indices into the series, so any x (numbers, datetime64, datetimes)
+and several traces over the same x can share one selection.
+"""
+import numpy as np
+
+MAX_POINTS = 1000  # default point budget per trace
+MODES = ("lttb", "minmax")
+MODE_LABELS = {"lttb": "Shape (LTTB)", "minmax": "Min/max envelope"}  # for the pages' mode pickers
+
+
+def _as_float(x):
+    """Chart x values as float64 (datetimes as microseconds; labels as positions)."""
+    x = np.asarray(x)
+    if x.dtype.kind == "O":
+        try:
+            x = x.astype("datetime64[us]")
+        except (TypeError, ValueError):
+            return np.arange(x.size, dtype=np.float64)
+    if x.dtype.kind == "M":
+        return x.astype("datetime64[us]").astype(np.int64).astype(np.float64)
+    if x.dtype.kind in "USV":
+        return np.arange(x.size, dtype=np.float64)
+    return x.astype(np.float64)
+
+
+def _buckets(edges):
+    """(buckets, widest) indices of each bucket edges[i]:edges[i+1], short ones padded with their last index."""
+    width = int(np.diff(edges).max())
+    return np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)
+
+
+def lttb(x, y, points=MAX_POINTS):
+    """Indices of the (at most) `points` points LTTB keeps of the series (x, y), in order."""
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if n <= max(points, 2) or points < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(np.intp)
+    idx = _buckets(edges)
+    bx, by = x[idx], y[idx]
+    counts = np.diff(edges)
+    # mean of each bucket's successor (the last point for the last bucket)
+    cx = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])[1:]
+    cy = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])[1:]
+
+    keep = np.empty(points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    ax, ay = x[0], y[0]
+    for i in range(points - 2):
+        # twice the triangle area (a, b, c), linear in b = (bx, by)
+        p, q = cy[i] - ay, ax - cx[i]
+        j = int(np.abs(p * bx[i] + q * by[i] - (p * ax + q * ay)).argmax())
+        keep[i + 1] = idx[i, j]
+        ax, ay = bx[i, j], by[i, j]
+    return keep
+
+
+def minmax(y, points=MAX_POINTS):
+    """Indices of the first and last points and of the min and max of (points - 2) // 2 buckets, in order."""
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if n <= max(points, 2) or points < 4:
+        return np.arange(n)
+    edges = np.floor(np.linspace(0, n, (points - 2) // 2 + 1)).astype(np.intp)
+    idx = _buckets(edges)
+    values = y[idx]
+    rows = np.arange(idx.shape[0])
+    low, high = idx[rows, values.argmin(axis=1)], idx[rows, values.argmax(axis=1)]
+    return np.unique(np.concatenate([[0, n - 1], low, high]))
+
+
+def downsample(x, y, points=MAX_POINTS, mode="lttb"):
+    """
+    (x, y) cut down to at most `points` points by `mode` ("lttb" or "minmax").
+    Series already within the budget come back as they are.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+    y = np.asarray(y)
+    if y.size <= points:
+        return x, y
+    keep = lttb(x, y, points) if mode == "lttb" else minmax(y, points)
+    return np.asarray(x)[keep], y[keep]
@@ -0,0 +1,137 @@
+"""
+Sector heat maps built from a fixed handful of traces.
+
+The grid is one Heatmap trace (a cell per sector, coloured by band, labels as
+its text) plus one line trace for the cell borders, and every overlay marker
+goes into one Scatter trace with per-point size / colour / hover arrays. A map
+with 5,000 citizen reports is still three traces of bounded size, instead of a
+shape and an annotation per sector and a trace per report.
+"""
+import numpy as np
+import plotly.graph_objects as go
+from PIL import ImageColor
+
+
+def band_index(values, thresholds, upper_inclusive=False):
+    """
+    Colour band of each value for ascending thresholds: 0 below thresholds[0], up to
+    len(thresholds) at the top. A value equal to a threshold goes to the band above it,
+    or stays in the band below with upper_inclusive=True (bands like "<= 50").
+    """
+    return np.searchsorted(thresholds, values, side="left" if upper_inclusive else "right")
+
+
+def _rgba(color, alpha):
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"rgba({r},{g},{b},{alpha})"
+
+
+def band_colorscale(colors, opacity=1.0):
+    """Stepped colorscale: band i is drawn for z in [i, i + 1) with zmin=0, zmax=len(colors)."""
+    n = len(colors)
+    scale = []
+    for i, color in enumerate(colors):
+        scale += [[i / n, _rgba(color, opacity)], [(i + 1) / n, _rgba(color, opacity)]]
+    return scale
+
+
+def grid_shape(rows, cols):
+    return int(np.max(rows)) + 1, int(np.max(cols)) + 1
+
+
+def sector_centers(sectors, rows, cols):
+    """Sector -> (x, y) of its cell centre in plot coordinates (row 0 at the top)."""
+    n_rows, _ = grid_shape(rows, cols)
+    return {s: (c + 0.5, n_rows - 1 - r + 0.5) for s, r, c in zip(sectors, rows, cols)}
+
+
+def sector_grid(fig, rows, cols, band, colors, text=None, hover=None, opacity=0.55, border_width=2,
+                font=None):
+    """
+    Draw the sector cells as one Heatmap trace: cell i at (rows[i], cols[i]) in colors[band[i]]
+    at `opacity` (labels stay opaque), labelled text[i], hover[i] on hover (default: the label).
+    Also sets the axes to the grid.
+    """
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    n_rows, n_cols = grid_shape(rows, cols)
+    y = n_rows - 1 - rows
+    z = np.full((n_rows, n_cols), np.nan)
+    z[y, cols] = np.asarray(band) + 0.5
+    labels = np.full((n_rows, n_cols), "", dtype=object)
+    if text is not None:
+        labels[y, cols] = text
+    hovertext = labels
+    if hover is not None:
+        hovertext = np.full((n_rows, n_cols), "", dtype=object)
+        hovertext[y, cols] = hover
+    fig.add_trace(go.Heatmap(
+        z=z, x=np.arange(n_cols) + 0.5, y=np.arange(n_rows) + 0.5,
+        zmin=0, zmax=len(colors), colorscale=band_colorscale(colors, opacity), showscale=False,
+        text=labels, texttemplate="%{text}", textfont=font or dict(color="black", size=11),
+        hovertext=hovertext, hovertemplate="%{hovertext}<extra></extra>",
+    ))
+    if border_width:
+        # every cell border in one polyline, segments separated by None
+        xs, ys = [], []
+        for c in range(n_cols + 1):
+            xs += [c, c, None]
+            ys += [0, n_rows, None]
+        for r in range(n_rows + 1):
+            xs += [0, n_cols, None]
+            ys += [r, r, None]
+        fig.add_trace(go.Scatter(x=xs, y=ys, mode="lines", line=dict(color="black", width=border_width),
+                                 hoverinfo="skip", showlegend=False))
+    fig.update_xaxes(visible=False, range=[0, n_cols])
+    fig.update_yaxes(visible=False, range=[0, n_rows])
+    return fig
+
+
+def add_markers(fig, x, y, size, color, text=None, hover=None, opacity=0.8, line_width=1):
+    """All overlay markers as one Scatter trace (per-point size / colour / label / hover)."""
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode="markers+text" if text is not None else "markers",
+        marker=dict(size=size, color=color, opacity=opacity,
+                    line=dict(color="black", width=line_width) if line_width else None),
+        text=text, textposition="top center",
+        hovertext=hover, hovertemplate="%{hovertext}<extra></extra>" if hover is not None else None,
+        hoverinfo=None if hover is not None else "skip",
+        showlegend=False,
+    ))
+    return fig
+
+
+def add_report_markers(fig, reports, centers, issue_colors, default_color="purple", size_base=8,
+                       opacity=0.8, labels=True, line_width=1, max_comments=3):
+    """
+    Citizen reports ({"sector", "issue", "severity", "comment"}) as one marker trace at
+    their sector centres: size severity * 10 + size_base, colour by issue.
+
+    Reports of the same sector, issue and severity would be drawn on the same spot, so
+    they share one marker (count in the label, first comments in the hover): the trace
+    has at most sectors x issues x severities points however many reports there are.
+    """
+    groups = {}
+    for r in reports:
+        if r["sector"] in centers:
+            groups.setdefault((r["sector"], r["issue"], r["severity"]), []).append(r.get("comment", ""))
+    if not groups:
+        return fig
+    keys = list(groups)
+    xy = np.array([centers[sector] for sector, _, _ in keys])
+    text = hover = None
+    if labels:
+        text, hover = [], []
+        for (sector, issue, severity), comments in groups.items():
+            n = len(comments)
+            shown = " / ".join(comments[:max_comments]) + (f" (+{n - max_comments} more)" if n > max_comments else "")
+            text.append(f"{issue} ({severity})" + (f" x{n}" if n > 1 else ""))
+            hover.append(f"Sector: {sector}<br>Issue: {issue}<br>Severity: {severity}"
+                         + (f"<br>Reports: {n}" if n > 1 else "") + f"<br>Comment: {shown}")
+    add_markers(
+        fig, xy[:, 0], xy[:, 1],
+        size=np.array([severity * 10 + size_base for _, _, severity in keys]),
+        color=[issue_colors.get(issue, default_color) for _, issue, _ in keys],
+        text=text, hover=hover, opacity=opacity, line_width=line_width,
+    )
+    return fig
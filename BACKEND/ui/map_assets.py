@@ -0,0 +1,67 @@
+"""
+Map background for the heat maps, decoded and scaled once per process.
+
+Passing a PIL image to Plotly re-encodes the full-resolution file into every
+figure on every rerun. Here the file is decoded once, shrunk to the size the
+figures are drawn at and kept as an encoded data URI; it is read again only
+when the file's modification time (or size) changes.
+"""
+import base64
+import io
+import os
+import threading
+
+from PIL import Image
+
+DEFAULT_MAP_PATH = r"C:\Users\User\Desktop\DASHBOARD\ortigas_dashboard\map.png"
+MAP_MAX_PX = 640  # the heat maps are drawn at most ~600 px wide / tall
+JPEG_QUALITY = 85
+
+_cache = {}  # (path, max_px) -> ((mtime_ns, size), data URI or None)
+_lock = threading.Lock()
+
+
+def _encode(path, max_px):
+    with Image.open(path) as img:
+        img.draft("RGB", (max_px, max_px))  # JPEG files decode straight at a reduced scale
+        img.thumbnail((max_px, max_px), Image.LANCZOS)
+        buf = io.BytesIO()
+        if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+            img.convert("RGBA").save(buf, format="PNG", optimize=True)
+            mime = "image/png"
+        else:
+            img.convert("RGB").save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            mime = "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+
+def map_background(path=DEFAULT_MAP_PATH, max_px=MAP_MAX_PX):
+    """Data URI of the map image scaled to fit max_px, or None if it cannot be read."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key, stamp = (os.path.abspath(path), max_px), (st.st_mtime_ns, st.st_size)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    try:
+        uri = _encode(path, max_px)
+    except (OSError, ValueError):
+        uri = None  # not an image: remembered until the file changes
+    with _lock:
+        _cache[key] = (stamp, uri)
+    return uri
+
+
+def add_map_background(fig, path=DEFAULT_MAP_PATH, x=0, y=3, sizex=3, sizey=3, max_px=MAP_MAX_PX):
+    """Stretch the cached map under a figure's data; returns False (figure untouched) without a map."""
+    source = map_background(path, max_px)
+    if source is None:
+        return False
+    fig.add_layout_image(dict(source=source, xref="x", yref="y", x=x, y=y, sizex=sizex, sizey=sizey,
+                              sizing="stretch", opacity=1, layer="below"))
+    return True
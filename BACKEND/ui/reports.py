@@ -0,0 +1,22 @@
+"""
+Citizen-report table shared by the traffic and waste pages.
+"""
+import pandas as pd
+
+REPORT_COLUMNS = ["id", "ts", "sector", "issue", "severity", "comment"]
+
+
+def reports_table(reports):
+    """
+    The reports (engine.reports.ReportIndex records) as a table, newest first. Always
+    has REPORT_COLUMNS, also when the window has let every report go.
+    """
+    rows = [{
+        "id": r["id"],
+        "ts": r["ts"].strftime("%Y-%m-%d %H:%M:%S"),
+        "sector": r["sector"],
+        "issue": r["issue"],
+        "severity": r["severity"],
+        "comment": r.get("comment", ""),
+    } for r in sorted(reports, key=lambda r: r["ts"], reverse=True)]
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
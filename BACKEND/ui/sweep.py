@@ -0,0 +1,58 @@
+"""
+Fusion-weight sweep chart: false alarm rate vs hit rate of every weight combination
+(one WebGL trace however many there are), with the Pareto front and the current
+weights drawn on top.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+HOVER = "%{text}<br>Hit rate %{y:.1%}<br>False alarms %{x:.1%}<br>Agreement %{customdata:.3f}<extra></extra>"
+
+
+def weight_labels(weights, names):
+    """"name 0.60, name 0.30, ..." per row of weights."""
+    return [", ".join(f"{name} {w:.2f}" for name, w in zip(names, row)) for row in np.asarray(weights)]
+
+
+def sweep_figure(result, names, current=0, height=420):
+    """
+    Every combination of an engine.sweep result coloured by agreement, the Pareto front
+    as a line and combination `current` (the sliders' weights) as a star.
+    """
+    labels = np.array(weight_labels(result["weights"], names))
+    false_alarm, hit_rate, agreement = result["false_alarm"], result["hit_rate"], result["agreement"]
+    front = result["front"]
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=false_alarm, y=hit_rate, mode="markers", name="Weight combinations",
+        marker=dict(size=4, color=agreement, colorscale="Viridis", showscale=True, colorbar=dict(title="Agreement")),
+        text=labels, customdata=agreement, hovertemplate=HOVER,
+    ))
+    fig.add_trace(go.Scatter(
+        x=false_alarm[front], y=hit_rate[front], mode="lines+markers", name="Pareto front",
+        line=dict(color="crimson", width=2), marker=dict(size=6, color="crimson"),
+        text=labels[front], customdata=agreement[front], hovertemplate=HOVER,
+    ))
+    fig.add_trace(go.Scatter(
+        x=[false_alarm[current]], y=[hit_rate[current]], mode="markers", name="Current weights",
+        marker=dict(symbol="star", size=16, color="gold", line=dict(color="black", width=1)),
+        text=[labels[current]], customdata=[agreement[current]], hovertemplate=HOVER,
+    ))
+    fig.update_layout(xaxis_title="False alarm rate", yaxis_title="Hit rate", xaxis_tickformat=".0%",
+                      yaxis_tickformat=".0%", height=height, margin=dict(l=0, r=0, t=10, b=0),
+                      legend=dict(orientation="h", y=1.08))
+    return fig
+
+
+def sweep_table(result, names, top=10):
+    """Rows for the best `top` combinations by agreement: weights, rates and Pareto membership."""
+    on_front = np.zeros(result["weights"].shape[0], dtype=bool)
+    on_front[result["front"]] = True
+    rows = []
+    for i in result["rank"][:top]:
+        row = {name: round(float(w), 2) for name, w in zip(names, result["weights"][i])}
+        row.update({"agreement": round(float(result["agreement"][i]), 3),
+                    "hit rate": f"{result['hit_rate'][i]:.0%}", "false alarms": f"{result['false_alarm'][i]:.1%}",
+                    "Pareto front": bool(on_front[i])})
+        rows.append(row)
+    return rows